@@ -16,6 +16,8 @@ from agent_lens import (
     # register_sam_service,
     # register_similarity_search_service,
 )
+from agent_lens.artifact_manager import AgentLensArtifactManager
+from agent_lens.dataset_mirror import mirror_dataset
 
 
 async def start_services(server):
@@ -101,6 +103,41 @@ def start_connect_server(args):
     loop.run_forever()
 
 
+async def run_mirror_dataset(args):
+    token = get_token(is_workspace=True)
+    server = await connect_to_server(
+        {"server_url": args.server_url, "token": token, "method_timeout": 500}
+    )
+    artifact_manager = AgentLensArtifactManager()
+    try:
+        await artifact_manager.connect_server(server)
+        summary = await mirror_dataset(
+            artifact_manager,
+            args.dataset_id,
+            args.local_dir,
+            timepoints=args.timepoints,
+            channels=args.channels,
+            max_concurrency=args.concurrency,
+            verify=args.verify,
+        )
+    finally:
+        await artifact_manager.close()
+        await server.disconnect()
+
+    print(
+        f"Mirrored {len(summary['downloaded'])} files, "
+        f"{len(summary['skipped'])} already up to date, {len(summary['failed'])} failed"
+    )
+    for file_path, error in summary["failed"].items():
+        print(f"  {file_path}: {error}")
+    if summary["failed"]:
+        sys.exit(1)
+
+
+def start_mirror_dataset(args):
+    asyncio.run(run_mirror_dataset(args))
+
+
 def main():
     parser = argparse.ArgumentParser(description="Start the Hypha server")
     subparsers = parser.add_subparsers()
@@ -118,6 +155,16 @@ def main():
     )
     parser_connect_server.set_defaults(func=start_connect_server)
 
+    parser_mirror_dataset = subparsers.add_parser("mirror-dataset")
+    parser_mirror_dataset.add_argument("--server_url", type=str, default="https://hypha.aicell.io")
+    parser_mirror_dataset.add_argument("--dataset_id", type=str, required=True)
+    parser_mirror_dataset.add_argument("--local_dir", type=str, required=True)
+    parser_mirror_dataset.add_argument("--timepoints", type=str, nargs="*", default=None)
+    parser_mirror_dataset.add_argument("--channels", type=str, nargs="*", default=None)
+    parser_mirror_dataset.add_argument("--concurrency", type=int, default=2)
+    parser_mirror_dataset.add_argument("--verify", action="store_true")
+    parser_mirror_dataset.set_defaults(func=start_mirror_dataset)
+
     args = parser.parse_args()
     if hasattr(args, "func"):
         args.func(args)
@@ -0,0 +1,320 @@
+"""
+This module provides caches for artifact manager lookups, so repeated requests
+for the same file URL or directory listing do not each pay for a Hypha RPC
+round trip.
+"""
+
+import asyncio
+import base64
+import bisect
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from urllib.parse import urlparse, parse_qs
+
+
+def parse_presigned_url_expiry(url, default_ttl=3600, now=None):
+    """
+    Get the absolute expiry time of a pre-signed URL.
+
+    SigV4 URLs carry their signing time in `X-Amz-Date` (YYYYMMDDTHHMMSSZ, UTC)
+    and their lifetime in seconds in `X-Amz-Expires`; SigV2 URLs carry an
+    absolute epoch in `Expires`.
+
+    Args:
+        url (str): The pre-signed URL.
+        default_ttl (float, optional): Lifetime assumed for URLs without expiry parameters.
+        now (float, optional): The current time, defaults to time.time().
+
+    Returns:
+        float: The expiry time as a Unix timestamp.
+    """
+    now = time.time() if now is None else now
+    try:
+        query = parse_qs(urlparse(url).query)
+        if "X-Amz-Date" in query and "X-Amz-Expires" in query:
+            signed_at = datetime.strptime(query["X-Amz-Date"][0], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+            return signed_at.timestamp() + int(query["X-Amz-Expires"][0])
+        if "Expires" in query:
+            return float(query["Expires"][0])
+    except (ValueError, TypeError):
+        pass
+    return now + default_ttl
+
+
+class PresignedUrlCache:
+    """
+    Cache of pre-signed download URLs keyed by (artifact_id, file_path).
+
+    An entry is served until its parsed expiry minus `expiry_buffer`, so callers
+    always get a URL with at least that much lifetime left. Concurrent misses
+    for the same key share a single lookup.
+    """
+
+    def __init__(self, expiry_buffer=300, default_ttl=3600, max_entries=10000):
+        """
+        Args:
+            expiry_buffer (float, optional): Seconds before expiry at which a URL is refreshed.
+            default_ttl (float, optional): Lifetime assumed for URLs without expiry parameters.
+            max_entries (int, optional): Maximum number of cached URLs.
+        """
+        self.expiry_buffer = expiry_buffer
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (artifact_id, file_path) -> (url, expiry)
+        self._pending = {}  # (artifact_id, file_path) -> asyncio.Task
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0}
+
+    async def get(self, artifact_id, file_path, fetch):
+        """
+        Get a URL from the cache, calling `fetch` on a miss.
+
+        Args:
+            artifact_id (str): The artifact ID.
+            file_path (str): The file path within the artifact.
+            fetch (callable): Coroutine function returning a fresh pre-signed URL.
+
+        Returns:
+            str: The pre-signed URL.
+        """
+        url, _ = await self.get_with_expiry(artifact_id, file_path, fetch)
+        return url
+
+    async def get_with_expiry(self, artifact_id, file_path, fetch):
+        """Like `get`, but returns a (url, expiry) tuple."""
+        key = (artifact_id, file_path)
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] - self.expiry_buffer > time.time():
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry
+
+        task = self._pending.get(key)
+        if task is None:
+            self.stats["misses"] += 1
+            task = asyncio.ensure_future(self._fetch(key, fetch))
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        # Shield the lookup so a cancelled caller does not cancel it for the others
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key, fetch):
+        url = await fetch()
+        entry = (url, parse_presigned_url_expiry(url, self.default_ttl))
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self, artifact_id=None, file_path=None):
+        """
+        Drop cached URLs: one file, every file of an artifact, or everything.
+
+        Args:
+            artifact_id (str, optional): The artifact ID. Defaults to all artifacts.
+            file_path (str, optional): The file path. Defaults to all files of the artifact.
+        """
+        if artifact_id is None:
+            self._entries.clear()
+        elif file_path is not None:
+            self._entries.pop((artifact_id, file_path), None)
+        else:
+            for key in [key for key in self._entries if key[0] == artifact_id]:
+                del self._entries[key]
+
+    def get_stats(self):
+        """Return hit/miss counts and the number of cached URLs."""
+        return {**self.stats, "size": len(self._entries)}
+
+
+class MetadataCache:
+    """
+    TTL cache for artifact listings with stale-while-revalidate.
+
+    Entries younger than their TTL are served directly. Entries that are older
+    but still within `stale_ttl` are served immediately while a background
+    lookup refreshes them. Anything older is fetched before returning.
+    Concurrent lookups of the same key share one fetch.
+    """
+
+    def __init__(self, default_ttl=30, stale_ttl=300, max_entries=4096):
+        """
+        Args:
+            default_ttl (float, optional): Seconds an entry is fresh.
+            stale_ttl (float, optional): Seconds after the TTL during which a stale
+                entry is still served while it is refreshed.
+            max_entries (int, optional): Maximum number of cached entries.
+        """
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, fetched_at)
+        self._pending = {}  # key -> asyncio.Task
+        # Bumped on every invalidation, so fetches started before a write are not stored
+        self._generation = 0
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "refresh_errors": 0}
+
+    async def get(self, key, fetch, ttl=None, stale_ttl=None):
+        """
+        Get a value from the cache, calling `fetch` when it is missing or expired.
+
+        Args:
+            key (tuple): The cache key.
+            fetch (callable): Coroutine function returning a fresh value.
+            ttl (float, optional): Seconds the value is fresh. Defaults to `default_ttl`.
+            stale_ttl (float, optional): Stale-while-revalidate window. Defaults to `stale_ttl`.
+
+        Returns:
+            The cached or freshly fetched value.
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < ttl:
+                self.stats["hits"] += 1
+                self._entries.move_to_end(key)
+                return value
+            if age < ttl + stale_ttl:
+                self.stats["stale_hits"] += 1
+                self._start_fetch(key, fetch, background=True)
+                return value
+
+        self.stats["misses"] += 1
+        return await asyncio.shield(self._start_fetch(key, fetch))
+
+    def _start_fetch(self, key, fetch, background=False):
+        task = self._pending.get(key)
+        if task is not None:
+            return task
+        if background:
+            self.stats["refreshes"] += 1
+        task = asyncio.ensure_future(self._fetch(key, fetch, self._generation))
+        self._pending[key] = task
+
+        def _done(done_task):
+            if self._pending.get(key) is done_task:
+                del self._pending[key]
+            if not done_task.cancelled() and done_task.exception() is not None and background:
+                # Keep serving the stale value, the next request retries
+                self.stats["refresh_errors"] += 1
+
+        task.add_done_callback(_done)
+        return task
+
+    async def _fetch(self, key, fetch, generation):
+        value = await fetch()
+        if generation == self._generation:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, match=None):
+        """
+        Drop cached entries.
+
+        Args:
+            match (callable, optional): Predicate on keys selecting the entries to
+                drop. Defaults to dropping everything.
+        """
+        self._generation += 1
+        for key in [key for key in self._entries if match is None or match(key)]:
+            del self._entries[key]
+        for key in [key for key in self._pending if match is None or match(key)]:
+            del self._pending[key]
+
+    def get_stats(self):
+        """Return hit/miss counts and the number of cached entries."""
+        return {**self.stats, "size": len(self._entries)}
+
+
+class SortedListingIndex:
+    """
+    Directory listing sorted once (directories first, then files, each by name)
+    for cursor-based pagination.
+
+    A cursor encodes the sort key of the last returned item, so the next page
+    starts with a binary search instead of re-sorting or skipping items.
+    """
+
+    def __init__(self, items):
+        """
+        Args:
+            items (list): Entries of a `list_files` call.
+        """
+        ordered = sorted(items, key=self._sort_key)
+        self.items = ordered
+        self.keys = [self._sort_key(item) for item in ordered]
+
+    @staticmethod
+    def _sort_key(item):
+        return (0 if item.get("type") == "directory" else 1, item.get("name", ""))
+
+    @staticmethod
+    def encode_cursor(key):
+        return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            rank, name = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return (int(rank), str(name))
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    def _ranges(self, prefix):
+        """Index ranges [start, end) of the items whose name starts with `prefix`."""
+        if not prefix:
+            return [(0, len(self.keys))]
+        # Every name starting with the prefix sorts before prefix + the highest code point
+        return [
+            (bisect.bisect_left(self.keys, (rank, prefix)), bisect.bisect_left(self.keys, (rank, prefix + "\U0010ffff")))
+            for rank in (0, 1)
+        ]
+
+    def page(self, cursor=None, limit=20, prefix=None, offset=0):
+        """
+        Get one page of the listing.
+
+        Args:
+            cursor (str, optional): The `next_cursor` of the previous page.
+            limit (int, optional): Maximum number of items to return.
+            prefix (str, optional): Only include items whose name starts with this.
+            offset (int, optional): Items to skip, for callers without a cursor.
+
+        Returns:
+            dict: The items, the total number of matching items and the cursor of
+                the next page (None on the last page).
+        """
+        ranges = self._ranges(prefix)
+        total = sum(end - start for start, end in ranges)
+        after = self.decode_cursor(cursor) if cursor else None
+
+        items = []
+        last_index = None
+        for start, end in ranges:
+            if after is not None:
+                start = max(start, bisect.bisect_right(self.keys, after))
+            if offset:
+                skipped = min(offset, max(end - start, 0))
+                start += skipped
+                offset -= skipped
+            for index in range(start, min(end, start + limit - len(items))):
+                items.append(self.items[index])
+                last_index = index
+            if len(items) >= limit:
+                break
+
+        has_more = last_index is not None and any(
+            end > max(start, last_index + 1) for start, end in ranges
+        )
+        next_cursor = self.encode_cursor(self.keys[last_index]) if has_more else None
+        return {"items": items, "total": total, "next_cursor": next_cursor}
@@ -7,8 +7,11 @@ and handling file uploads and downloads.
 import httpx
 from hypha_rpc.rpc import RemoteException
 import asyncio
+import inspect
 import os
 import io
+import json
+import tempfile
 import dotenv
 from hypha_rpc import connect_to_server
 from PIL import Image
@@ -17,12 +20,17 @@ import base64
 import numcodecs
 import blosc
 import aiohttp
-from collections import deque
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
 import zarr
 from zarr.storage import LRUStoreCache, FSStore
 import fsspec
 import time
 from asyncio import Lock
+from agent_lens.zip_store import HTTPZipStore, MmapZipStore
+from agent_lens.artifact_cache import MetadataCache, PresignedUrlCache, SortedListingIndex, parse_presigned_url_expiry
+from agent_lens.vector_mirror import VectorMirror
 
 # Configure logging
 import logging
@@ -46,19 +54,130 @@ def setup_logging(log_file="artifact_manager.log", max_bytes=100000, backup_coun
 
 logger = setup_logging()
 
+try:
+    import h2  # noqa: F401  # enables HTTP/2 in httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 dotenv.load_dotenv()  
 ENV_FILE = dotenv.find_dotenv()  
 if ENV_FILE:  
     dotenv.load_dotenv(ENV_FILE)  
 
+async def _read_file_chunks(path, chunk_size=2**20, progress_callback=None):
+    """Read a local file as an async stream of chunks, reporting the bytes read so far."""
+    total = os.path.getsize(path)
+    done = 0
+    with open(path, "rb") as f:
+        while chunk := await asyncio.to_thread(f.read, chunk_size):
+            yield chunk
+            done += len(chunk)
+            await _report_progress(progress_callback, done, total)
+
+async def _aiter(items):
+    """Iterate a list, iterator or async iterator asynchronously."""
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+def _estimate_payload_bytes(value):
+    """Roughly estimate the serialized size of an RPC payload."""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(len(str(key)) + _estimate_payload_bytes(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_payload_bytes(item) for item in value)
+    return 8
+
+def is_not_found_error(error):
+    """Check whether an artifact manager error means the artifact does not exist."""
+    message = str(error).lower()
+    return "does not exist" in message or "not found" in message
+
+def _vector_dim(value):
+    """Dimension of a vector from the vector engine, sent as a list or as float32 bytes."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value) // 4
+    return len(value)
+
+async def _report_progress(callback, done, total):
+    """Call a progress callback, awaiting it if it is a coroutine function or remote function."""
+    if callback is not None:
+        result = callback(done, total)
+        if inspect.isawaitable(result):
+            await result
+
 class AgentLensArtifactManager:
     """
     Manages artifacts for the application.
+
+    All file transfers go through one long-lived pooled httpx client, so
+    consecutive uploads and downloads reuse connections to S3/MinIO instead of
+    paying for DNS, TCP and TLS setup on every call.
     """
 
-    def __init__(self):
+    # Responses worth retrying: throttling and transient gateway/server errors
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        max_connections=100,
+        max_keepalive_connections=20,
+        keepalive_expiry=60.0,
+        http2=True,
+        max_retries=3,
+        retry_backoff=0.5,
+    ):
+        """
+        Args:
+            max_connections (int, optional): Maximum number of concurrent connections.
+            max_keepalive_connections (int, optional): Maximum number of idle connections kept open.
+            keepalive_expiry (float, optional): Seconds an idle connection is kept open.
+            http2 (bool, optional): Use HTTP/2 when the `h2` package is installed.
+            max_retries (int, optional): Retries for failed transfers.
+            retry_backoff (float, optional): Base delay in seconds, doubled on every retry.
+        """
         self._svc = None
         self.server = None
+        self.http_limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._http_client = None
+        self._http_client_owner = None  # the manager whose client is shared, if any
+        # Pre-signed download URLs, reused until shortly before they expire
+        self.url_cache = PresignedUrlCache()
+        # Artifact and file listings, served stale while they are refreshed in the background
+        self.metadata_cache = MetadataCache()
+        self.metadata_ttls = {"list": 60, "list_files": 30}  # seconds
+        self.list_files_limit = 1000  # entries of the first listing request, the server default
+        # Sorted indexes of directory listings, rebuilt whenever the cached listing changes
+        self._listing_indexes = OrderedDict()  # (artifact_id, dir_path) -> (listing, SortedListingIndex)
+        self.max_listing_indexes = 256
+        # IDs of vector collections known to exist, so they are not re-created on every call
+        self._known_collections = set()
+        # Local mirrors of vector collections answering searches in-process, off by default
+        self.mirror_vectors = False
+        self.vector_mirror_dir = None  # persist mirrors here between restarts
+        self.vector_mirrors = {}  # collection ID -> VectorMirror
+        self._mirror_loads = {}  # collection ID -> asyncio.Task
+        # Downloads at least this large are fetched as parallel byte ranges
+        self.parallel_download_threshold = 2**26  # 64 MB
+        self.download_part_size = 2**24  # 16 MB
+        self.max_parallel_downloads = 4
+        self.max_parallel_uploads = 4
+        self.http_stats = {"requests": 0, "new_connections": 0, "retries": 0, "errors": 0}
 
     async def connect_server(self, server):
         """
@@ -70,6 +189,201 @@ class AgentLensArtifactManager:
         self.server = server
         self._svc = await server.get_service("public/artifact-manager")
 
+    @property
+    def http_client(self):
+        """The shared pooled httpx client, created on first use."""
+        if self._http_client_owner is not None:
+            return self._http_client_owner.http_client
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(500, connect=30),
+                # The transport also retries failed connection attempts on its own
+                transport=httpx.AsyncHTTPTransport(
+                    http2=self.http2, limits=self.http_limits, retries=self.max_retries
+                ),
+            )
+        return self._http_client
+
+    def share_http_client(self, owner):
+        """
+        Send this manager's transfers through the pooled client of another manager.
+
+        Both managers then share one connection pool and one set of HTTP
+        statistics. The client stays open until `owner` is closed.
+
+        Args:
+            owner (AgentLensArtifactManager): The manager whose client is used.
+        """
+        self._http_client_owner = owner
+        self.http_stats = owner.http_stats
+
+    async def close(self):
+        """Close the shared HTTP client and its pooled connections, and persist vector mirrors."""
+        for task in self._mirror_loads.values():
+            task.cancel()
+        await asyncio.gather(*self._mirror_loads.values(), return_exceptions=True)
+        self._mirror_loads.clear()
+        for mirror in self.vector_mirrors.values():
+            await asyncio.to_thread(mirror.save)
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    async def _trace_http(self, event_name, info):
+        """httpx trace hook counting newly opened connections."""
+        if event_name == "connection.connect_tcp.complete":
+            self.http_stats["new_connections"] += 1
+
+    def get_http_stats(self):
+        """
+        Get connection reuse statistics for the shared HTTP client.
+
+        Returns:
+            dict: Counts of requests, new connections, reused connections, retries and errors.
+        """
+        stats = dict(self.http_stats)
+        stats["reused_connections"] = max(stats["requests"] - stats["new_connections"], 0)
+        stats["http2"] = self.http2
+        return stats
+
+    async def _request(self, method, url, content_factory=None, **kwargs):
+        """
+        Send a request on the shared client, retrying transient failures with
+        exponential backoff.
+
+        Args:
+            content_factory (callable, optional): Returns the request body for each
+                attempt, for bodies such as file streams that cannot be sent twice.
+
+        Returns:
+            httpx.Response: The successful response.
+        """
+        extensions = {**kwargs.pop("extensions", {}), "trace": self._trace_http}
+        for attempt in range(self.max_retries + 1):
+            self.http_stats["requests"] += 1
+            if content_factory is not None:
+                kwargs["content"] = content_factory()
+            try:
+                response = await self.http_client.request(method, url, extensions=extensions, **kwargs)
+                if response.status_code not in self.RETRY_STATUS_CODES or attempt == self.max_retries:
+                    response.raise_for_status()
+                    return response
+                logger.info(f"{method} {response.url.path} returned {response.status_code}, retrying")
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    self.http_stats["errors"] += 1
+                    raise
+                logger.info(f"{method} request failed with {e!r}, retrying")
+            except httpx.HTTPStatusError:
+                self.http_stats["errors"] += 1
+                raise
+            self.http_stats["retries"] += 1
+            await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def get_file_url(self, artifact_id, file_path):
+        """
+        Get a pre-signed download URL for a file, from the URL cache when possible.
+
+        Args:
+            artifact_id (str): The artifact ID.
+            file_path (str): The file path within the artifact.
+
+        Returns:
+            str: The pre-signed URL.
+        """
+        return await self.url_cache.get(
+            artifact_id, file_path, lambda: self._svc.get_file(artifact_id, file_path)
+        )
+
+    async def list_files(self, artifact_id, dir_path=None, ttl=None):
+        """
+        List the files of an artifact directory, from the metadata cache when possible.
+
+        Args:
+            artifact_id (str): The artifact ID.
+            dir_path (str, optional): The directory path. Defaults to the root directory.
+            ttl (float, optional): Seconds a cached listing is fresh.
+
+        Returns:
+            list: The file and directory entries. The list is shared with the cache
+                and must not be modified.
+        """
+        return await self.metadata_cache.get(
+            ("list_files", artifact_id, dir_path),
+            lambda: self._list_all_files(artifact_id, dir_path),
+            ttl=self.metadata_ttls["list_files"] if ttl is None else ttl,
+        )
+
+    async def _list_all_files(self, artifact_id, dir_path=None):
+        """List every entry of a directory, however many the server returns per request."""
+        # The server's list_files takes a limit but no offset, so a full page is
+        # requested again with a larger limit until the listing is exhausted
+        limit = self.list_files_limit
+        while True:
+            entries = await self._svc.list_files(artifact_id, dir_path=dir_path, limit=limit)
+            if len(entries) < limit:
+                return entries
+            limit *= 4
+
+    async def list_directory_page(self, artifact_id, dir_path=None, cursor=None, limit=20, prefix=None, offset=0):
+        """
+        Get one page of a directory listing, directories first, then files, each sorted by name.
+
+        The listing is sorted once per (artifact_id, dir_path) and kept until the
+        cached listing changes, so later pages cost O(log n + limit).
+
+        Args:
+            artifact_id (str): The artifact ID.
+            dir_path (str, optional): The directory path. Defaults to the root directory.
+            cursor (str, optional): The `next_cursor` of the previous page.
+            limit (int, optional): Maximum number of items to return.
+            prefix (str, optional): Only include items whose name starts with this.
+            offset (int, optional): Items to skip, for callers without a cursor.
+
+        Returns:
+            dict: The items, the total number of matching items and the cursor of the next page.
+        """
+        listing = await self.list_files(artifact_id, dir_path=dir_path)
+        key = (artifact_id, dir_path)
+        cached = self._listing_indexes.get(key)
+        if cached is None or cached[0] is not listing:
+            cached = (listing, SortedListingIndex(listing))
+            self._listing_indexes[key] = cached
+            while len(self._listing_indexes) > self.max_listing_indexes:
+                self._listing_indexes.popitem(last=False)
+        self._listing_indexes.move_to_end(key)
+        return cached[1].page(cursor=cursor, limit=limit, prefix=prefix, offset=offset)
+
+    async def list_children(self, parent_id, ttl=None):
+        """
+        List the child artifacts of a collection, from the metadata cache when possible.
+
+        Args:
+            parent_id (str): The collection ID.
+            ttl (float, optional): Seconds a cached listing is fresh.
+
+        Returns:
+            list: The child artifacts. The list is shared with the cache and must not be modified.
+        """
+        return await self.metadata_cache.get(
+            ("list", parent_id),
+            lambda: self._svc.list(parent_id=parent_id),
+            ttl=self.metadata_ttls["list"] if ttl is None else ttl,
+        )
+
+    def invalidate_metadata(self, artifact_id=None):
+        """
+        Drop cached listings after a write.
+
+        Args:
+            artifact_id (str, optional): The artifact that changed. Its file listings
+                and all collection listings are dropped. Defaults to everything.
+        """
+        if artifact_id is None:
+            self.metadata_cache.invalidate()
+        else:
+            self.metadata_cache.invalidate(lambda key: key[0] == "list" or key[1] == artifact_id)
+
     def _artifact_alias(self, name):
         """
         Generate an alias for the artifact.
@@ -95,6 +409,15 @@ class AgentLensArtifactManager:
         """
         return f"{workspace}/{self._artifact_alias(name)}"
 
+    async def _stage(self, art_id):
+        """
+        Put an artifact into staging mode, keeping the files of its latest version.
+
+        Every commit creates a new version, and a version staged without
+        `copy_files` starts empty, so files committed earlier would drop out.
+        """
+        await self._svc.edit(artifact_id=art_id, version="stage", copy_files=True)
+
     async def create_vector_collection(
         self, workspace, name, manifest, config, overwrite=False, exists_ok=False
     ):
@@ -107,6 +430,7 @@ class AgentLensArtifactManager:
             manifest (dict): The collection manifest.
             config (dict): The collection configuration.
             overwrite (bool, optional): Whether to overwrite the existing collection.
+            exists_ok (bool, optional): Whether an existing collection is not an error.
         """
         art_id = self._artifact_id(workspace, name)
         try:
@@ -118,22 +442,129 @@ class AgentLensArtifactManager:
                 overwrite=overwrite,
             )
         except RemoteException as e:
-            if not exists_ok:
+            # Only a collection that already exists may be remembered as known
+            if not exists_ok or "already exists" not in str(e).lower():
                 raise e
+        self.invalidate_metadata(art_id)
+        self._known_collections.add(art_id)
+
+    async def ensure_vector_collection(self, workspace, name, manifest, config):
+        """
+        Create a vector collection unless it is already known to exist.
 
-    async def add_vectors(self, workspace, coll_name, vectors):
+        Collections created or seen by this manager are remembered, so the
+        create round trip only happens once per collection and process.
+
+        Args:
+            workspace (str): The workspace.
+            name (str): The collection name.
+            manifest (dict): The collection manifest.
+            config (dict): The collection configuration.
         """
-        Add vectors to the collection.
+        if self._artifact_id(workspace, name) in self._known_collections:
+            return
+        await self.create_vector_collection(workspace, name, manifest, config, exists_ok=True)
+
+    async def get_vector_collection_config(self, workspace, name):
+        """
+        Get the configuration of a vector collection, e.g. its vector fields.
+
+        Args:
+            workspace (str): The workspace.
+            name (str): The collection name.
+
+        Returns:
+            dict: The collection configuration.
+        """
+        collection = await self._svc.read(self._artifact_id(workspace, name))
+        return collection.get("config") or {}
+
+    def forget_vector_collection(self, workspace, name):
+        """Drop a collection from the registry of known collections."""
+        self._known_collections.discard(self._artifact_id(workspace, name))
+
+    async def add_vectors(
+        self,
+        workspace,
+        coll_name,
+        vectors,
+        batch_size=256,
+        max_batch_bytes=2**23,
+        max_concurrency=4,
+    ):
+        """
+        Add vectors to the collection in size-bounded batches.
+
+        Batches are cut at `batch_size` vectors or `max_batch_bytes` of estimated
+        payload, whichever comes first, and up to `max_concurrency` batches are
+        sent at once. Failed batches are retried with exponential backoff.
 
         Args:
             workspace (str): The workspace.
             coll_name (str): The collection name.
-            vectors (list): The vectors to add.
+            vectors (list or Iterable or AsyncIterable): The vectors to add. Iterators
+                are consumed lazily, so producing vectors overlaps with uploading them.
+            batch_size (int, optional): Maximum number of vectors per request.
+            max_batch_bytes (int, optional): Maximum estimated payload per request.
+            max_concurrency (int, optional): Number of requests sent at once.
+
+        Returns:
+            dict: The number of inserted and failed vectors, the errors of failed
+                batches and the IDs of the failed vectors that had one.
         """
         art_id = self._artifact_id(workspace, coll_name)
-        await self._svc.add_vectors(artifact_id=art_id, vectors=vectors)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        result = {"inserted": 0, "failed": 0, "errors": [], "failed_ids": []}
+        tasks = []
 
-    async def search_vectors(self, workspace, coll_name, vector, top_k=None):
+        async def _add_batch(batch):
+            try:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        await self._svc.add_vectors(artifact_id=art_id, vectors=batch)
+                        result["inserted"] += len(batch)
+                        if art_id in self.vector_mirrors:
+                            self.vector_mirrors[art_id].add(batch)
+                        return
+                    except Exception as e:
+                        if attempt == self.max_retries:
+                            logger.info(f"Failed to add {len(batch)} vectors to {art_id}: {e}")
+                            result["failed"] += len(batch)
+                            result["errors"].append(str(e))
+                            result["failed_ids"].extend(vector["id"] for vector in batch if "id" in vector)
+                            if art_id in self.vector_mirrors:
+                                # The batch may have been partially written
+                                self.vector_mirrors[art_id].mark_stale()
+                            return
+                        logger.info(f"Adding {len(batch)} vectors to {art_id} failed with {e}, retrying")
+                        await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+            finally:
+                semaphore.release()
+
+        async def _dispatch(batch):
+            # Wait for a free slot before producing more, so iterators are not drained ahead of the uploads
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(_add_batch(batch)))
+
+        batch, batch_bytes = [], 0
+        try:
+            async for vector in _aiter(vectors):
+                vector_bytes = _estimate_payload_bytes(vector)
+                if batch and (len(batch) >= batch_size or batch_bytes + vector_bytes > max_batch_bytes):
+                    await _dispatch(batch)
+                    batch, batch_bytes = [], 0
+                batch.append(vector)
+                batch_bytes += vector_bytes
+            if batch:
+                await _dispatch(batch)
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        return result
+
+    async def search_vectors(self, workspace, coll_name, vector, top_k=None, return_fields=None, filters=None):
         """
         Search for vectors in the collection.
 
@@ -142,14 +573,34 @@ class AgentLensArtifactManager:
             coll_name (str): The collection name.
             vector (ndarray): The query vector.
             top_k (int, optional): The number of top results to return.
+            return_fields (list, optional): Fields of each result besides its ID.
+                Defaults to every field except the vectors.
+            filters (dict, optional): Pre-filters applied inside the vector search. A string
+                matches a TAG field, e.g. {"annotation": "mitotic"}, and a [min, max] pair
+                matches a NUMERIC field range.
 
         Returns:
             list: The search results.
         """
         art_id = self._artifact_id(workspace, coll_name)
-        return await self._svc.search_vectors(
-            artifact_id=art_id, query={"cell_image_vector": vector}, limit=top_k
-        )
+        mirror = self.vector_mirrors.get(art_id)
+        if mirror is not None and mirror.is_fresh() and mirror.can_filter(filters):
+            return mirror.search(vector, top_k, return_fields, filters)
+        if self.mirror_vectors:
+            # Search remotely while the mirror is (re)loaded in the background
+            self._start_mirror_load(workspace, coll_name)
+        try:
+            return await self._svc.search_vectors(
+                artifact_id=art_id,
+                query={"cell_image_vector": vector},
+                limit=top_k,
+                return_fields=return_fields,
+                filters=filters,
+            )
+        except Exception as e:
+            if is_not_found_error(e):
+                self._known_collections.discard(art_id)
+            raise
 
     async def add_file(self, workspace, coll_name, file_content, file_path):
         """
@@ -162,12 +613,185 @@ class AgentLensArtifactManager:
             file_path (str): The file path.
         """
         art_id = self._artifact_id(workspace, coll_name)
-        await self._svc.edit(artifact_id=art_id, version="stage")
+        await self._stage(art_id)
         put_url = await self._svc.put_file(art_id, file_path, download_weight=1.0)
-        async with httpx.AsyncClient() as client:
-            response = await client.put(put_url, data=file_content, timeout=500)
-        response.raise_for_status()
+        await self._request("PUT", put_url, content=file_content)
+        await self._svc.commit(art_id)
+        self.url_cache.invalidate(art_id, file_path)
+        self.invalidate_metadata(art_id)
+
+    async def upload_file(self, workspace, coll_name, source, file_path, size=None, progress_callback=None):
+        """
+        Upload a large file to the collection without holding it in memory.
+
+        The file is sent with a single streamed PUT read from disk chunk by
+        chunk, and the whole PUT is retried on transient errors. A byte stream
+        of known size is sent as it arrives and, since it cannot be replayed,
+        gets a single attempt.
+
+        Args:
+            workspace (str): The workspace.
+            coll_name (str): The collection name.
+            source (str or AsyncIterable[bytes]): A local file path or an async byte stream.
+            file_path (str): The file path in the collection.
+            size (int, optional): Total size of a byte stream. Streams of unknown
+                size are spooled to a temporary file first, so they are retried
+                like files.
+            progress_callback (callable, optional): Called with (bytes_uploaded, total_bytes)
+                while the file is sent; may be a coroutine function.
+        """
+        art_id = self._artifact_id(workspace, coll_name)
+        await self._stage(art_id)
+        await self._put_object(art_id, file_path, source, size=size, progress_callback=progress_callback)
         await self._svc.commit(art_id)
+        self.url_cache.invalidate(art_id, file_path)
+        self.invalidate_metadata(art_id)
+
+    async def add_files(self, workspace, coll_name, files, max_concurrency=None):
+        """
+        Add many files to the collection with a single stage/commit cycle.
+
+        Upload URLs are requested concurrently up front, files are uploaded
+        concurrently and the artifact is committed once.
+
+        Args:
+            workspace (str): The workspace.
+            coll_name (str): The collection name.
+            files (dict): Maps file paths in the collection to their content,
+                as bytes, a local file path or an async byte stream.
+            max_concurrency (int, optional): Number of files uploaded at once.
+                Defaults to `max_parallel_uploads`.
+
+        Returns:
+            dict: The uploaded file paths, and the error of every file that is
+                missing from the committed artifact, keyed by file path.
+        """
+        art_id = self._artifact_id(workspace, coll_name)
+        await self._stage(art_id)
+
+        # Bytes and existing files get their upload URL in one concurrent batch
+        batched = [
+            file_path for file_path, source in files.items()
+            if isinstance(source, (bytes, bytearray, memoryview))
+            or (isinstance(source, (str, os.PathLike)) and os.path.isfile(source))
+        ]
+        put_urls = await asyncio.gather(
+            *[self._svc.put_file(art_id, file_path, download_weight=1.0) for file_path in batched],
+            return_exceptions=True,
+        )
+        put_urls = dict(zip(batched, put_urls))
+
+        report = {"uploaded": [], "failed": {}}
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_parallel_uploads)
+
+        async def _upload(file_path, source):
+            async with semaphore:
+                try:
+                    put_url = put_urls.get(file_path)
+                    if isinstance(put_url, BaseException):
+                        raise put_url
+                    await self._put_object(art_id, file_path, source, put_url=put_url)
+                except Exception as e:
+                    logger.info(f"Failed to upload {file_path} to {art_id}: {e}")
+                    report["failed"][file_path] = str(e)
+                    return
+                report["uploaded"].append(file_path)
+
+        await asyncio.gather(*[_upload(file_path, source) for file_path, source in files.items()])
+        # A path is staged once it has an upload URL and the commit fails on staged
+        # paths without an object, so unstage every failed upload first
+        staged_failures = [
+            file_path for file_path in report["failed"]
+            if not isinstance(put_urls.get(file_path), BaseException)
+        ]
+        await asyncio.gather(
+            *[self._svc.remove_file(art_id, file_path) for file_path in staged_failures],
+            return_exceptions=True,
+        )
+        if report["uploaded"]:
+            await self._svc.commit(art_id)
+            self.url_cache.invalidate(art_id)
+            self.invalidate_metadata(art_id)
+        if report["failed"]:
+            logger.info(f"{len(report['failed'])} of {len(files)} files missing from {art_id}: {sorted(report['failed'])}")
+        return report
+
+    async def remove_files(self, workspace, coll_name, file_paths, max_concurrency=None):
+        """
+        Remove many files from the collection with a single stage/commit cycle.
+
+        Args:
+            workspace (str): The workspace.
+            coll_name (str): The collection name.
+            file_paths (list): The file paths in the collection.
+            max_concurrency (int, optional): Number of files removed at once.
+                Defaults to `max_parallel_uploads`.
+
+        Returns:
+            dict: The removed file paths, and the error of every file that could
+                not be removed, keyed by file path.
+        """
+        art_id = self._artifact_id(workspace, coll_name)
+        await self._stage(art_id)
+        report = {"removed": [], "failed": {}}
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_parallel_uploads)
+
+        async def _remove(file_path):
+            async with semaphore:
+                try:
+                    await self._svc.remove_file(art_id, file_path)
+                except Exception as e:
+                    report["failed"][file_path] = str(e)
+                    return
+                report["removed"].append(file_path)
+
+        await asyncio.gather(*[_remove(file_path) for file_path in file_paths])
+        await self._svc.commit(art_id)
+        self.url_cache.invalidate(art_id)
+        self.invalidate_metadata(art_id)
+        if report["failed"]:
+            logger.info(f"Failed to remove {len(report['failed'])} of {len(file_paths)} files from {art_id}")
+        return report
+
+    async def _put_object(self, art_id, file_path, source, size=None, progress_callback=None, put_url=None):
+        """Upload a file path, byte stream or bytes to a staged artifact with a single PUT."""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            put_url = put_url or await self._svc.put_file(art_id, file_path, download_weight=1.0)
+            await self._request("PUT", put_url, content=bytes(source))
+            await _report_progress(progress_callback, len(source), len(source))
+            return
+
+        if not isinstance(source, (str, os.PathLike)) and size is None:
+            # A pre-signed PUT needs the length up front, so spool the stream to disk
+            with tempfile.NamedTemporaryFile(delete=False) as f:
+                async for chunk in source:
+                    await asyncio.to_thread(f.write, chunk)
+            try:
+                await self._put_object(
+                    art_id, file_path, f.name, progress_callback=progress_callback, put_url=put_url
+                )
+            finally:
+                os.remove(f.name)
+            return
+
+        put_url = put_url or await self._svc.put_file(art_id, file_path, download_weight=1.0)
+        if isinstance(source, (str, os.PathLike)):
+            # Every attempt streams the file from the start
+            await self._request(
+                "PUT",
+                put_url,
+                headers={"Content-Length": str(os.path.getsize(source))},
+                content_factory=lambda: _read_file_chunks(source, progress_callback=progress_callback),
+            )
+            return
+
+        # A stream cannot be replayed, so it gets a single attempt
+        self.http_stats["requests"] += 1
+        response = await self.http_client.put(
+            put_url, headers={"Content-Length": str(size)}, content=source, extensions={"trace": self._trace_http}
+        )
+        response.raise_for_status()
+        await _report_progress(progress_callback, size, size)
 
     async def get_file(self, workspace, coll_name, file_path):
         """
@@ -182,31 +806,234 @@ class AgentLensArtifactManager:
             bytes: The file content.
         """
         art_id = self._artifact_id(workspace, coll_name)
-        get_url = await self._svc.get_file(art_id, file_path)
+        get_url = await self.get_file_url(art_id, file_path)
+        response = await self._request("GET", get_url)
+        return response.content
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(get_url, timeout=500)
-        response.raise_for_status()
+    async def get_files(self, workspace, coll_name, file_paths, max_concurrency=8):
+        """
+        Retrieve many files from the collection concurrently.
 
-        return response.content
+        Args:
+            workspace (str): The workspace.
+            coll_name (str): The collection name.
+            file_paths (list): The file paths.
+            max_concurrency (int, optional): Number of files downloaded at once.
+
+        Returns:
+            dict: The content of each file path, or None if the file does not exist.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _get(file_path):
+            async with semaphore:
+                try:
+                    return await self.get_file(workspace, coll_name, file_path)
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code != 404:
+                        raise
+                except Exception as e:
+                    if not is_not_found_error(e):
+                        raise
+                return None
+
+        contents = await asyncio.gather(*[_get(file_path) for file_path in file_paths])
+        return dict(zip(file_paths, contents))
 
-    async def remove_vectors(self, workspace, coll_name, vector_ids=None):
+    async def clear_vectors(self, workspace, coll_name):
         """
-        Clear the vectors in the collection.
+        Remove every vector of a collection by deleting the collection and
+        recreating it with its stored manifest and config.
+
+        The files of the collection, such as thumbnails, are deleted with it,
+        since no vector is left to refer to them.
 
         Args:
             workspace (str): The workspace.
             coll_name (str): The collection name.
         """
         art_id = self._artifact_id(workspace, coll_name)
+        collection = await self._svc.read(art_id)
+        await self._svc.delete(artifact_id=art_id, delete_files=True)
+        await self._svc.create(
+            alias=art_id,
+            type="vector-collection",
+            manifest=collection["manifest"],
+            config=collection["config"],
+        )
+        self.url_cache.invalidate(art_id)
+        self.invalidate_metadata(art_id)
+        if art_id in self.vector_mirrors:
+            self.vector_mirrors[art_id].clear()
+        logger.info(f"Cleared vector collection {art_id}")
+
+    def _start_mirror_load(self, workspace, coll_name):
+        art_id = self._artifact_id(workspace, coll_name)
+        task = self._mirror_loads.get(art_id)
+        if task is None or task.done():
+            self._mirror_loads[art_id] = asyncio.create_task(self._load_mirror_quietly(workspace, coll_name))
+
+    async def _load_mirror_quietly(self, workspace, coll_name):
+        try:
+            await self.load_vector_mirror(workspace, coll_name)
+        except Exception as e:
+            logger.info(f"Failed to mirror {self._artifact_id(workspace, coll_name)}: {e}")
+
+    async def load_vector_mirror(self, workspace, coll_name, mirror=None, page_size=1000, max_concurrency=4):
+        """
+        Mirror a vector collection locally, so searches are answered in-process.
+
+        A mirror persisted under `vector_mirror_dir` is reused when it was exported
+        from the same version of the collection, its last modification time and
+        vector count, and still holds that many vectors of the collection's
+        dimension; otherwise the collection is exported page by page. Writes
+        through this manager keep the mirror in sync, including writes made while
+        it loads, and searches fall back to the collection while the mirror is stale.
+
+        Args:
+            workspace (str): The workspace.
+            coll_name (str): The collection name.
+            mirror (VectorMirror, optional): The mirror to fill. Defaults to the
+                collection's current mirror or a new one.
+            page_size (int, optional): Number of vectors per exported page.
+            max_concurrency (int, optional): Number of pages fetched at once.
+
+        Returns:
+            VectorMirror: The loaded mirror.
+        """
+        art_id = self._artifact_id(workspace, coll_name)
+        if mirror is None:
+            mirror = self.vector_mirrors.get(art_id) or VectorMirror(
+                path=os.path.join(self.vector_mirror_dir, art_id.replace("/", "__")) if self.vector_mirror_dir else None
+            )
+        # Registered before the export, so writes made meanwhile are recorded by the mirror
+        mirror.begin_load()
+        self.vector_mirrors[art_id] = mirror
+        return_fields = ["id", mirror.vector_field, *mirror.fields]
+        try:
+            collection, first_page = await asyncio.gather(
+                self._svc.read(art_id),
+                self._svc.list_vectors(
+                    art_id, offset=0, limit=page_size, return_fields=return_fields, pagination=True
+                ),
+            )
+            version = {"last_modified": collection.get("last_modified"), "total": first_page["total"]}
+            reusable = (
+                await asyncio.to_thread(mirror.load_from_disk)
+                and mirror.version == version
+                and len(mirror) == first_page["total"]
+                and all(
+                    _vector_dim(item[mirror.vector_field]) == mirror.dim
+                    for item in first_page["items"][:1]
+                )
+            )
+            if reusable:
+                complete = True
+                logger.info(f"Loaded mirror of {art_id} with {len(mirror)} vectors from disk")
+            else:
+                pages = [first_page["items"]]
+                semaphore = asyncio.Semaphore(max_concurrency)
+
+                async def _list_page(offset):
+                    async with semaphore:
+                        return await self._svc.list_vectors(
+                            art_id, offset=offset, limit=page_size, return_fields=return_fields
+                        )
+
+                pages += await asyncio.gather(
+                    *[_list_page(offset) for offset in range(page_size, first_page["total"], page_size)]
+                )
+                complete = await asyncio.to_thread(mirror.load, [item for page in pages for item in page])
+                mirror.version = version
+                await asyncio.to_thread(mirror.save)
+                logger.info(f"Mirrored {art_id} with {len(mirror)} vectors")
+        except BaseException:
+            mirror.abort_load()
+            raise
+        mirror.finish_load()
+        if not complete:
+            mirror.mark_stale()
+        return mirror
+
+    async def list_vector_ids(self, workspace, coll_name, page_size=1000, max_concurrency=4):
+        """
+        List the IDs of all vectors in a collection, fetching pages concurrently.
+
+        Args:
+            workspace (str): The workspace.
+            coll_name (str): The collection name.
+            page_size (int, optional): Number of IDs per page.
+            max_concurrency (int, optional): Number of pages fetched at once.
+
+        Returns:
+            list: The vector IDs.
+        """
+        art_id = self._artifact_id(workspace, coll_name)
+        first_page = await self._svc.list_vectors(
+            art_id, offset=0, limit=page_size, return_fields=["id"], pagination=True
+        )
+        pages = [first_page["items"]]
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _list_page(offset):
+            async with semaphore:
+                return await self._svc.list_vectors(art_id, offset=offset, limit=page_size, return_fields=["id"])
+
+        pages += await asyncio.gather(
+            *[_list_page(offset) for offset in range(page_size, first_page["total"], page_size)]
+        )
+        return [vector["id"] for page in pages for vector in page]
+
+    async def remove_vectors(
+        self,
+        workspace,
+        coll_name,
+        vector_ids=None,
+        fast_clear=True,
+        batch_size=1000,
+        max_concurrency=4,
+        progress_callback=None,
+    ):
+        """
+        Remove vectors from the collection.
+
+        Args:
+            workspace (str): The workspace.
+            coll_name (str): The collection name.
+            vector_ids (list, optional): The vectors to remove. Defaults to all vectors.
+            fast_clear (bool, optional): Remove all vectors by recreating the collection
+                instead of deleting them page by page.
+            batch_size (int, optional): Number of IDs removed per request.
+            max_concurrency (int, optional): Number of removal requests sent at once.
+            progress_callback (callable, optional): Called with (removed, total) after
+                every batch; may be a coroutine function.
+
+        Returns:
+            int: The number of removed vectors, or None after a fast clear.
+        """
         if vector_ids is None:
-            all_vectors = await self._svc.list_vectors(art_id)
-            while len(all_vectors) > 0:
-                vector_ids = [vector["id"] for vector in all_vectors]
-                await self._svc.remove_vectors(art_id, vector_ids)
-                all_vectors = await self._svc.list_vectors(art_id)
-        else:
-            await self._svc.remove_vectors(art_id, vector_ids)
+            if fast_clear:
+                await self.clear_vectors(workspace, coll_name)
+                return None
+            vector_ids = await self.list_vector_ids(workspace, coll_name, batch_size, max_concurrency)
+
+        art_id = self._artifact_id(workspace, coll_name)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        removed = 0
+
+        async def _remove_batch(batch):
+            nonlocal removed
+            async with semaphore:
+                await self._svc.remove_vectors(art_id, batch)
+                removed += len(batch)
+                if art_id in self.vector_mirrors:
+                    self.vector_mirrors[art_id].remove(batch)
+                await _report_progress(progress_callback, removed, len(vector_ids))
+
+        await asyncio.gather(
+            *[_remove_batch(vector_ids[i:i + batch_size]) for i in range(0, len(vector_ids), batch_size)]
+        )
+        return removed
 
     async def list_files_in_dataset(self, dataset_id):
         """
@@ -218,7 +1045,7 @@ class AgentLensArtifactManager:
         Returns:
             list: A list of files in the dataset.
         """
-        files = await self._svc.list_files(dataset_id)
+        files = await self.list_files(dataset_id)
         return files
 
     async def navigate_collections(self, parent_id=None):
@@ -231,7 +1058,7 @@ class AgentLensArtifactManager:
         Returns:
             list: A list of collections and datasets under the specified parent.
         """
-        collections = await self._svc.list(artifact_id=parent_id)
+        collections = await self.list_children(parent_id)
         return collections
 
     async def get_file_details(self, dataset_id, file_path):
@@ -245,27 +1072,193 @@ class AgentLensArtifactManager:
         Returns:
             dict: Details of the file, including size, type, and last modified date.
         """
-        files = await self._svc.list_files(dataset_id)
+        # Only list the file's own directory, the listing is usually cached
+        dir_path, name = os.path.split(file_path)
+        files = await self.list_files(dataset_id, dir_path=dir_path or None)
         for file in files:
-            if file['name'] == file_path:
+            if file['name'] == name:
                 return file
         return None
 
-    async def download_file(self, dataset_id, file_path, local_path):
+    async def get_file_stream(self, workspace, coll_name, file_path, chunk_size=2**20):
+        """
+        Retrieve a file from the collection as an async iterator of byte chunks,
+        so callers can process the content as it arrives.
+
+        Args:
+            workspace (str): The workspace.
+            coll_name (str): The collection name.
+            file_path (str): The file path.
+            chunk_size (int, optional): Size of the yielded chunks in bytes.
+
+        Yields:
+            bytes: The next chunk of the file content.
+        """
+        art_id = self._artifact_id(workspace, coll_name)
+        get_url = await self.get_file_url(art_id, file_path)
+        self.http_stats["requests"] += 1
+        async with self.http_client.stream("GET", get_url, extensions={"trace": self._trace_http}) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+
+    async def _probe_size(self, url):
+        """
+        Get the size of an object and whether its server honours range requests.
+
+        Pre-signed URLs are only valid for the method they were signed for, so
+        this sends a one-byte ranged GET instead of a HEAD.
+
+        Returns:
+            tuple: (size or None, supports_ranges)
+        """
+        self.http_stats["requests"] += 1
+        async with self.http_client.stream(
+            "GET", url, headers={"Range": "bytes=0-0"}, extensions={"trace": self._trace_http}
+        ) as response:
+            response.raise_for_status()
+            content_range = response.headers.get("Content-Range", "")
+            if response.status_code == 206 and "/" in content_range:
+                total = content_range.rsplit("/", 1)[1]
+                return (int(total) if total != "*" else None), True
+            content_length = response.headers.get("Content-Length")
+            return (int(content_length) if content_length else None), False
+
+    async def _download_stream(self, url, part_path, chunk_size):
+        """Stream a URL into `part_path`, continuing from whatever is already there."""
+        existing = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {"Range": f"bytes={existing}-"} if existing else {}
+        self.http_stats["requests"] += 1
+        async with self.http_client.stream(
+            "GET", url, headers=headers, extensions={"trace": self._trace_http}
+        ) as response:
+            if response.status_code == 416:
+                # The partial file already holds the whole object
+                return
+            response.raise_for_status()
+            # 206 continues the partial file, 200 means the server restarted from byte zero
+            mode = "ab" if response.status_code == 206 else "wb"
+            if mode == "ab":
+                logger.info(f"Resuming download of {part_path} at byte {existing}")
+            with open(part_path, mode) as f:
+                async for chunk in response.aiter_bytes(chunk_size):
+                    f.write(chunk)
+
+    async def _download_range(self, url, fd, start, end, progress, chunk_size, executor=None):
+        """
+        Download bytes [start, end] into the file descriptor at their offsets,
+        retrying from the last written byte on failure. Writes run on `executor`.
+        """
+        loop = asyncio.get_running_loop()
+        offset = start
+        for attempt in range(self.max_retries + 1):
+            self.http_stats["requests"] += 1
+            try:
+                async with self.http_client.stream(
+                    "GET", url, headers={"Range": f"bytes={offset}-{end}"}, extensions={"trace": self._trace_http}
+                ) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise ValueError(f"Server ignored range request for bytes {offset}-{end}")
+                    async for chunk in response.aiter_bytes(chunk_size):
+                        await loop.run_in_executor(executor, os.pwrite, fd, chunk, offset)
+                        offset += len(chunk)
+                if offset != end + 1:
+                    raise httpx.ReadError(f"Range {start}-{end} ended early at byte {offset}")
+                progress["completed"].append(start)
+                return
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    self.http_stats["errors"] += 1
+                    raise
+                logger.info(f"Range {start}-{end} failed with {e!r} at byte {offset}, retrying")
+                self.http_stats["retries"] += 1
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+    async def _download_parallel(self, url, part_path, size, chunk_size):
+        """
+        Download an object as concurrent byte ranges written at their offsets.
+
+        Completed ranges are recorded in a progress file next to the partial
+        file, so an interrupted download only fetches the missing ranges.
+        """
+        progress_path = part_path + ".progress"
+        progress = {"size": size, "part_size": self.download_part_size, "completed": []}
+        if os.path.exists(progress_path) and os.path.exists(part_path):
+            with open(progress_path) as f:
+                saved = json.load(f)
+            if saved.get("size") == size and saved.get("part_size") == self.download_part_size:
+                progress = saved
+                logger.info(f"Resuming download of {part_path}, {len(progress['completed'])} ranges done")
+
+        completed = set(progress["completed"])
+        starts = [start for start in range(0, size, self.download_part_size) if start not in completed]
+        semaphore = asyncio.Semaphore(self.max_parallel_downloads)
+
+        def _save_progress():
+            with open(progress_path, "w") as f:
+                json.dump(progress, f)
+
+        async def _fetch(fd, start):
+            async with semaphore:
+                end = min(start + self.download_part_size, size) - 1
+                await self._download_range(url, fd, start, end, progress, chunk_size, executor)
+                await asyncio.to_thread(_save_progress)
+
+        # Writes go to a dedicated pool so every pending write can be waited for before closing the file
+        executor = ThreadPoolExecutor(max_workers=self.max_parallel_downloads)
+        fd = os.open(part_path, os.O_RDWR | os.O_CREAT)
+        try:
+            await asyncio.to_thread(os.ftruncate, fd, size)
+            await asyncio.to_thread(_save_progress)
+            tasks = [asyncio.create_task(_fetch(fd, start)) for start in starts]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # Stop the other ranges and let them finish before the file is closed
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+        finally:
+            await asyncio.to_thread(executor.shutdown, wait=True)
+            os.close(fd)
+        os.remove(progress_path)
+
+    async def download_file(self, dataset_id, file_path, local_path, chunk_size=2**20):
         """
         Download a file from a dataset.
 
+        The content is streamed to disk in chunks. Files of at least
+        `parallel_download_threshold` bytes are fetched as several byte ranges in
+        parallel. Interrupted downloads resume from the partial file
+        `{local_path}.part`.
+
         Args:
             dataset_id (str): The ID of the dataset.
             file_path (str): The path to the file in the dataset.
             local_path (str): The local path to save the downloaded file.
+            chunk_size (int, optional): Size of the chunks written to disk in bytes.
         """
-        get_url = await self._svc.get_file(dataset_id, file_path)
-        async with httpx.AsyncClient() as client:
-            response = await client.get(get_url)
-            response.raise_for_status()
-            with open(local_path, 'wb') as f:
-                f.write(response.content)
+        get_url = await self.get_file_url(dataset_id, file_path)
+        part_path = local_path + ".part"
+        size, supports_ranges = await self._probe_size(get_url)
+
+        if supports_ranges and size is not None and size >= self.parallel_download_threshold:
+            await self._download_parallel(get_url, part_path, size, chunk_size)
+        else:
+            if os.path.exists(part_path + ".progress"):
+                # Left over from a parallel download, which preallocates the file
+                os.remove(part_path + ".progress")
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+            elif size is not None and os.path.exists(part_path) and os.path.getsize(part_path) > size:
+                os.remove(part_path)
+            await self._download_stream(get_url, part_path, chunk_size)
+
+        if size is not None and os.path.getsize(part_path) != size:
+            raise ValueError(f"Size mismatch for {file_path}: expected {size}, got {os.path.getsize(part_path)}")
+        os.replace(part_path, local_path)
 
     async def search_datasets(self, keywords=None, filters=None):
         """
@@ -294,7 +1287,7 @@ class AgentLensArtifactManager:
         """
         try:
             logger.info(f"Listing files for dataset_id={dataset_id}, dir_path={dir_path}")
-            files = await self._svc.list_files(dataset_id, dir_path=dir_path)
+            files = await self.list_files(dataset_id, dir_path=dir_path)
             logger.info(f"Files received, length: {len(files)}")
             subfolders = [file for file in files if file.get('type') == 'directory']
             logger.info(f"Subfolders filtered, length: {len(subfolders)}")
@@ -335,7 +1328,7 @@ class AgentLensArtifactManager:
         try:
             logger.info(f"Getting download URL for: {art_id}/{zip_file_path}")
             # Get the direct download URL for the zip file
-            download_url = await self._svc.get_file(art_id, zip_file_path)
+            download_url = await self.get_file_url(art_id, zip_file_path)
             logger.info(f"Obtained download URL.")
 
             # Construct the URL for FSStore using fsspec's zip chaining
@@ -373,6 +1366,46 @@ WORKSPACE_TOKEN = os.environ.get("WORKSPACE_TOKEN")
 ARTIFACT_ALIAS = "image-map-20250429-treatment-zip"
 DEFAULT_CHANNEL = "BF_LED_matrix_full"
 
+class DecodedChunkCache:
+    """
+    Thread-safe LRU cache of decoded Zarr chunks, bounded by total size in bytes.
+
+    The LRUStoreCache wrapped around each store only keeps the encoded bytes, so
+    without this cache every tile that is cut out of a larger chunk (e.g. four 256px
+    tiles from one 512px chunk) would decompress that chunk again.
+    """
+
+    def __init__(self, max_bytes=2**27):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._chunks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            chunk = self._chunks.get(key)
+            if chunk is not None:
+                self._chunks.move_to_end(key)
+            return chunk
+
+    def put(self, key, chunk):
+        if chunk.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._chunks.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.nbytes
+            self._chunks[key] = chunk
+            self.current_bytes += chunk.nbytes
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._chunks.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._chunks.clear()
+            self.current_bytes = 0
+
 # New class to replace TileManager using Zarr for efficient access
 class ZarrTileManager:
     def __init__(self):
@@ -382,6 +1415,10 @@ class ZarrTileManager:
         self.tile_size = 256  # Default chunk size for Zarr
         # Define the chunk size for test access
         self.chunk_size = 256  # Assuming chunk size is the same as tile size
+        # Clients may request larger tiles (multiples of chunk_size) up to this size
+        self.max_tile_size = 2048
+        # Decoded chunks shared by all tiles cut from the same chunk
+        self.decoded_chunk_cache = DecodedChunkCache(max_bytes=2**27)  # 128 MB
         self.channels = [
             "BF_LED_matrix_full",
             "Fluorescence_405_nm_Ex",
@@ -395,6 +1432,17 @@ class ZarrTileManager:
         self.zarr_group_locks = {}  # format: {cache_key: asyncio.Lock()}
         self.is_running = True
         self.session = None
+        # Read chunks with asyncio range requests on self.session instead of a
+        # synchronous fsspec FSStore running in a thread
+        self.use_async_store = True
+        # Connection pool settings for self.session
+        self.http_connection_limit = 64
+        self.http_keepalive_timeout = 60  # seconds
+        # Optional local mirror laid out as {local_data_dir}/{dataset_id}/{timestamp}/{channel}.zip,
+        # used instead of the artifact manager whenever the zip exists locally
+        self.local_data_dir = os.environ.get("AGENT_LENS_LOCAL_DATA_DIR")
+        # Local stores have no URL to expire, they are only reopened once a day
+        self.local_store_expiry = 86400  # seconds
         self.default_timestamp = "2025-04-29_16-38-27"  # Set a default timestamp
         # Set URL expiration buffer - refresh URLs 5 minutes before they expire
         self.url_expiry_buffer = 300  # seconds
@@ -409,6 +1457,9 @@ class ZarrTileManager:
         self.in_progress_tiles = set()
         # Start the tile request processor
         self.tile_processor_task = None
+        # Maximum number of Zarr groups opened / regions read at the same time
+        # when fanning out over timepoints or channels
+        self.max_concurrent_reads = 8
 
     def _create_open_zarr_sync_function(self):
         """Create a reusable function for opening zarr stores synchronously"""
@@ -440,8 +1491,14 @@ class ZarrTileManager:
             self.artifact_manager = AgentLensArtifactManager()
             await self.artifact_manager.connect_server(self.artifact_manager_server)
             
-            # Initialize aiohttp session for any HTTP requests
-            self.session = aiohttp.ClientSession()
+            # Initialize the aiohttp session used for all chunk range requests, with a
+            # pooled keep-alive connector so tiles reuse connections to S3/MinIO
+            connector = aiohttp.TCPConnector(
+                limit=self.http_connection_limit,
+                keepalive_timeout=self.http_keepalive_timeout,
+                ttl_dns_cache=300,
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
             
             # Start the tile request processor
             if self.tile_processor_task is None or self.tile_processor_task.done():
@@ -468,41 +1525,40 @@ class ZarrTileManager:
                 pass
         
         # Close the cached Zarr groups
-        self.zarr_groups_cache.clear()
+        self.decoded_chunk_cache.clear()
+        for cache_key in list(self.zarr_groups_cache):
+            self._evict_zarr_group(cache_key)
         
         # Close the aiohttp session
         if self.session:
             await self.session.close()
             self.session = None
         
+        if self.artifact_manager:
+            await self.artifact_manager.close()
+        
         # Disconnect from the server
         if self.artifact_manager_server:
             await self.artifact_manager_server.disconnect()
             self.artifact_manager_server = None
             self.artifact_manager = None
 
+    def _evict_zarr_group(self, cache_key):
+        """Remove a Zarr group from the cache, unmapping its zip if it was opened from the local mirror"""
+        cached_data = self.zarr_groups_cache.pop(cache_key, None)
+        if cached_data and isinstance(cached_data.get('store'), MmapZipStore):
+            cached_data['store'].close()
+
     def _extract_expiry_from_url(self, url):
         """Extract expiration time from pre-signed URL"""
-        try:
-            # Try to find X-Amz-Expires parameter
-            if "X-Amz-Expires=" in url:
-                parts = url.split("X-Amz-Expires=")[1].split("&")[0]
-                expires_seconds = int(parts)
-                
-                # Find the date from X-Amz-Date
-                if "X-Amz-Date=" in url:
-                    date_str = url.split("X-Amz-Date=")[1].split("&")[0]
-                    # Date format is typically 'YYYYMMDDTHHMMSSZ'
-                    # This is a simplified approach - in production, properly parse this
-                    # For now, we'll just use current time + expires_seconds
-                    return time.time() + expires_seconds
-            
-            # If we can't extract, use default expiry
-            return time.time() + self.default_url_expiry
-        except Exception as e:
-            logger.info(f"Error extracting URL expiry: {e}")
-            # Default to current time + 1 hour
-            return time.time() + self.default_url_expiry
+        return parse_presigned_url_expiry(url, self.default_url_expiry)
+
+    def get_local_zip_path(self, dataset_id, timestamp, channel):
+        """Return the path of a channel zip in the local mirror, or None if it is not available locally"""
+        if not self.local_data_dir:
+            return None
+        path = os.path.join(self.local_data_dir, dataset_id, timestamp, f"{channel}.zip")
+        return path if os.path.isfile(path) else None
 
     async def get_zarr_group(self, dataset_id, timestamp, channel):
         """Get (or reuse from cache) a Zarr group for a specific dataset, with URL expiration handling"""
@@ -517,7 +1573,7 @@ class ZarrTileManager:
             if cached_data['expiry'] - now < self.url_expiry_buffer:
                 logger.info(f"URL for {cache_key} is about to expire, refreshing")
                 # Remove from cache to force refresh
-                del self.zarr_groups_cache[cache_key]
+                self._evict_zarr_group(cache_key)
             else:
                 logger.info(f"Using cached Zarr group for {cache_key}, expires in {int(cached_data['expiry'] - now)} seconds")
                 return cached_data['group']
@@ -535,7 +1591,24 @@ class ZarrTileManager:
                 if cached_data['expiry'] - now >= self.url_expiry_buffer:
                     logger.info(f"Using cached Zarr group for {cache_key} after lock acquisition")
                     return cached_data['group']
+                self._evict_zarr_group(cache_key)
             
+            local_path = self.get_local_zip_path(dataset_id, timestamp, channel)
+            if local_path is not None:
+                try:
+                    store = await asyncio.to_thread(MmapZipStore, local_path)
+                    zarr_group = zarr.open_group(store=store, mode="r")
+                    self.zarr_groups_cache[cache_key] = {
+                        'group': zarr_group,
+                        'url': local_path,
+                        'expiry': now + self.local_store_expiry,
+                        'store': store
+                    }
+                    logger.info(f"Cached local Zarr group for {cache_key} from {local_path}")
+                    return zarr_group
+                except Exception as e:
+                    logger.info(f"Error opening local zip {local_path}, falling back to artifact manager: {e}")
+
             try:
                 # We no longer need to parse the dataset_id into workspace and artifact_alias
                 # Just use the dataset_id directly since it's already the full path
@@ -543,17 +1616,27 @@ class ZarrTileManager:
                 
                 # Get the direct download URL for the zip file
                 zip_file_path = f"{timestamp}/{channel}.zip"
-                download_url = await self.artifact_manager._svc.get_file(dataset_id, zip_file_path)
+                download_url = await self.artifact_manager.get_file_url(dataset_id, zip_file_path)
                 
                 # Extract expiration time from URL
                 expiry_time = self._extract_expiry_from_url(download_url)
                 
-                # Construct the URL for FSStore using fsspec's zip chaining
-                store_url = f"zip::{download_url}"
+                zarr_group = None
+                if self.use_async_store and self.session is not None:
+                    try:
+                        # Read the zip index and metadata with range requests on the shared session
+                        store = await HTTPZipStore.open(download_url, self.session)
+                        zarr_group = zarr.open_group(store=store, mode="r")
+                    except Exception as e:
+                        logger.info(f"Async zip store failed for {cache_key}, falling back to FSStore: {e}")
                 
-                # Run the synchronous Zarr operations in a thread pool
-                logger.info("Running Zarr open in thread executor...")
-                zarr_group = await asyncio.to_thread(self._open_zarr_sync, store_url, 2**28)  # Using default cache size
+                if zarr_group is None:
+                    # Construct the URL for FSStore using fsspec's zip chaining
+                    store_url = f"zip::{download_url}"
+                    
+                    # Run the synchronous Zarr operations in a thread pool
+                    logger.info("Running Zarr open in thread executor...")
+                    zarr_group = await asyncio.to_thread(self._open_zarr_sync, store_url, 2**28)  # Using default cache size
                 
                 # Cache the Zarr group for future use, along with expiration time
                 self.zarr_groups_cache[cache_key] = {
@@ -593,7 +1676,7 @@ class ZarrTileManager:
             if cached_data['expiry'] - now < self.url_expiry_buffer:
                 logger.info(f"URL for {cache_key} is about to expire, refreshing")
                 # Remove from cache to force refresh
-                del self.zarr_groups_cache[cache_key]
+                self._evict_zarr_group(cache_key)
             else:
                 # Still valid, nothing to do
                 return True
@@ -608,10 +1691,10 @@ class ZarrTileManager:
             while self.is_running:
                 try:
                     # Get the next tile request with highest priority (lowest number)
-                    priority, (dataset_id, timestamp, channel, scale, x, y) = await self.tile_request_queue.get()
+                    priority, (dataset_id, timestamp, channel, scale, x, y, tile_size) = await self.tile_request_queue.get()
                     
                     # Create a unique key for this tile
-                    tile_key = f"{dataset_id}:{timestamp}:{channel}:{scale}:{x}:{y}"
+                    tile_key = f"{dataset_id}:{timestamp}:{channel}:{scale}:{x}:{y}:{tile_size}"
                     
                     # Skip if this tile is already being processed
                     if tile_key in self.in_progress_tiles:
@@ -623,7 +1706,7 @@ class ZarrTileManager:
                     
                     try:
                         # Process the tile request
-                        await self.get_tile_np_data(dataset_id, timestamp, channel, scale, x, y)
+                        await self.get_tile_np_data(dataset_id, timestamp, channel, scale, x, y, tile_size)
                     except Exception as e:
                         logger.info(f"Error processing tile request: {e}")
                     finally:
@@ -644,7 +1727,7 @@ class ZarrTileManager:
             import traceback
             logger.info(traceback.format_exc())
 
-    async def request_tile(self, dataset_id, timestamp, channel, scale, x, y, priority=10):
+    async def request_tile(self, dataset_id, timestamp, channel, scale, x, y, priority=10, tile_size=None):
         """
         Queue a tile request with a specific priority.
         Lower priority numbers are processed first.
@@ -657,121 +1740,88 @@ class ZarrTileManager:
             x (int): X coordinate
             y (int): Y coordinate
             priority (int): Priority level (lower is higher priority, default is 10)
+            tile_size (int, optional): Tile size in pixels, defaults to self.tile_size
         """
-        tile_key = f"{dataset_id}:{timestamp}:{channel}:{scale}:{x}:{y}"
+        tile_size = tile_size or self.tile_size
+        tile_key = f"{dataset_id}:{timestamp}:{channel}:{scale}:{x}:{y}:{tile_size}"
         
         # Skip if already in progress
         if tile_key in self.in_progress_tiles:
             return
         
         # Add to the priority queue
-        await self.tile_request_queue.put((priority, (dataset_id, timestamp, channel, scale, x, y)))
+        await self.tile_request_queue.put((priority, (dataset_id, timestamp, channel, scale, x, y, tile_size)))
+
+    def validate_tile_size(self, tile_size=None):
+        """
+        Check a client-requested tile size.
+
+        Args:
+            tile_size (int, optional): Requested tile size in pixels
 
-    async def get_tile_np_data(self, dataset_id, timestamp, channel, scale, x, y):
+        Returns:
+            int: The tile size to use, self.tile_size if none was requested
+
+        Raises:
+            ValueError: If the tile size is not a multiple of the chunk size or too large
+        """
+        if tile_size is None:
+            return self.tile_size
+        if tile_size <= 0 or tile_size % self.chunk_size != 0 or tile_size > self.max_tile_size:
+            raise ValueError(
+                f"tile_size must be a multiple of {self.chunk_size} between "
+                f"{self.chunk_size} and {self.max_tile_size}, got {tile_size}"
+            )
+        return tile_size
+
+    async def get_tile_np_data(self, dataset_id, timestamp, channel, scale, x, y, tile_size=None):
         """
-        Get a tile as numpy array using Zarr for efficient access
+        Get a tile as numpy array using Zarr for efficient access.
+
+        The tile is assembled from the chunks it covers, so the tile size does not have
+        to match the chunk size of the store: large tiles are built from a batched fetch
+        of several chunks, and small tiles cut from a larger chunk reuse the decoded chunk.
         
         Args:
             dataset_id (str): The dataset ID (workspace/artifact_alias)
             timestamp (str): The timestamp folder 
             channel (str): Channel name
             scale (int): Scale level
-            x (int): X coordinate (in tile/chunk units)
-            y (int): Y coordinate (in tile/chunk units)
+            x (int): X coordinate (in tile units)
+            y (int): Y coordinate (in tile units)
+            tile_size (int, optional): Tile size in pixels, defaults to self.tile_size
             
         Returns:
             np.ndarray: Tile data as numpy array
         """
+        tile_size = tile_size or self.tile_size
         try:
             # Use default timestamp if none provided
             timestamp = timestamp or self.default_timestamp
-            
-            # Ensure the zarr group is in cache without returning it
-            cache_key = f"{dataset_id}:{timestamp}:{channel}"
-            await self.ensure_zarr_group(dataset_id, timestamp, channel)
-            
-            # Access the cached zarr group
-            if cache_key not in self.zarr_groups_cache:
-                return np.zeros((self.tile_size, self.tile_size), dtype=np.uint8)
-                
-            zarr_group = self.zarr_groups_cache[cache_key]['group']
-            
-            # Navigate to the right array in the Zarr hierarchy
-            try:
-                # Get the scale array
-                scale_array = zarr_group[f'scale{scale}']
-                
-                # Since tile_size equals chunk_size, we can directly get the chunk
-                # This is more efficient than slicing
-                try:
-                    # Get the chunk directly using zarr's chunk-based access
-                    # This avoids reading unnecessary data and is more efficient
-                    chunk_coords = (y, x)  # zarr uses (y, x) order for coordinates
-                    chunk_key = '.'.join(map(str, chunk_coords))
-                    
-                    # Try to get the chunk directly from the chunk store
-                    if hasattr(scale_array.store, 'get_partial_values'):
-                        # Some stores support direct chunk access
-                        chunk = scale_array.store.get_partial_values([chunk_key])[chunk_key]
-                        if chunk is not None:
-                            # Decompress the chunk
-                            chunk = scale_array._decode_chunk(chunk)
-                            return chunk
-                    
-                    # If direct chunk access failed or isn't supported, use the standard method
-                    # but access exactly one chunk
-                    chunk = scale_array.get_orthogonal_selection((slice(y * self.chunk_size, (y+1) * self.chunk_size), 
-                                                                 slice(x * self.chunk_size, (x+1) * self.chunk_size)))
-                    
-                    # Make sure we have a properly shaped array
-                    if chunk.shape != (self.tile_size, self.tile_size):
-                        # Resize or pad if necessary
-                        result = np.zeros((self.tile_size, self.tile_size), dtype=np.uint8)
-                        h, w = chunk.shape
-                        result[:min(h, self.tile_size), :min(w, self.tile_size)] = chunk[:min(h, self.tile_size), :min(w, self.tile_size)]
-                        return result
-                    
-                    return chunk
-                    
-                except Exception as chunk_error:
-                    logger.info(f"Error accessing chunk directly: {chunk_error}, falling back to standard slicing")
-                    # Fall back to standard slicing if direct chunk access fails
-                    tile_data = scale_array[y*self.tile_size:(y+1)*self.tile_size, 
-                                           x*self.tile_size:(x+1)*self.tile_size]
-                    
-                    # Make sure we have a properly shaped array
-                    if tile_data.shape != (self.tile_size, self.tile_size):
-                        # Resize or pad if necessary
-                        result = np.zeros((self.tile_size, self.tile_size), dtype=np.uint8)
-                        h, w = tile_data.shape
-                        result[:min(h, self.tile_size), :min(w, self.tile_size)] = tile_data[:min(h, self.tile_size), :min(w, self.tile_size)]
-                        return result
-                    logger.info(f"Returning tile data for {dataset_id}:{timestamp}:{channel}:{scale}:{x}:{y}")
-                    return tile_data
-                
-            except KeyError as e:
-                logger.info(f"KeyError accessing Zarr array path: {e}")
-                # Try an alternative path structure if needed
-                try:
-                    # Alternative path structure if your zarr is organized differently
-                    tile_data = zarr_group[y, x]  # Direct chunk access for alternative structure
-                    return tile_data
-                except Exception:
-                    return np.zeros((self.tile_size, self.tile_size), dtype=np.uint8)
+
+            scale_array = await self._get_scale_array(dataset_id, timestamp, channel, scale)
+            if scale_array is None:
+                return np.zeros((tile_size, tile_size), dtype=np.uint8)
+
+            return await self._read_region(
+                scale_array, x * tile_size, y * tile_size, tile_size, tile_size,
+                None, f"{dataset_id}:{timestamp}:{channel}:scale{scale}"
+            )
         except Exception as e:
             logger.info(f"Error getting tile data: {e}")
             import traceback
             logger.info(traceback.format_exc())
-            return np.zeros((self.tile_size, self.tile_size), dtype=np.uint8)
+            return np.zeros((tile_size, tile_size), dtype=np.uint8)
 
-    async def get_tile_bytes(self, dataset_id, timestamp, channel, scale, x, y):
+    async def get_tile_bytes(self, dataset_id, timestamp, channel, scale, x, y, tile_size=None):
         """Serve a tile as PNG bytes"""
+        tile_size = tile_size or self.tile_size
         try:
             # Use default timestamp if none provided
             timestamp = timestamp or self.default_timestamp
             
             # Get tile data as numpy array
-            tile_data = await self.get_tile_np_data(dataset_id, timestamp, channel, scale, x, y)
+            tile_data = await self.get_tile_np_data(dataset_id, timestamp, channel, scale, x, y, tile_size)
             
             # Convert to PNG bytes
             image = Image.fromarray(tile_data)
@@ -780,19 +1830,359 @@ class ZarrTileManager:
             return buffer.getvalue()
         except Exception as e:
             logger.info(f"Error in get_tile_bytes: {str(e)}")
-            blank_image = Image.new("L", (self.tile_size, self.tile_size), color=0)
+            blank_image = Image.new("L", (tile_size, tile_size), color=0)
             buffer = io.BytesIO()
             blank_image.save(buffer, format="PNG")
             return buffer.getvalue()
 
-    async def get_tile_base64(self, dataset_id, timestamp, channel, scale, x, y):
+    async def get_tile_base64(self, dataset_id, timestamp, channel, scale, x, y, tile_size=None):
         """Serve a tile as base64 string"""
         # Use default timestamp if none provided
         timestamp = timestamp or self.default_timestamp
         
-        tile_bytes = await self.get_tile_bytes(dataset_id, timestamp, channel, scale, x, y)
+        tile_bytes = await self.get_tile_bytes(dataset_id, timestamp, channel, scale, x, y, tile_size)
         return base64.b64encode(tile_bytes).decode('utf-8')
 
+    async def list_timepoints(self, dataset_id, start_timepoint=None, end_timepoint=None):
+        """
+        List the timepoint folders of a dataset in chronological order.
+
+        Args:
+            dataset_id (str): The dataset ID (workspace/artifact_alias)
+            start_timepoint (str, optional): First timepoint to include (inclusive)
+            end_timepoint (str, optional): Last timepoint to include (inclusive)
+
+        Returns:
+            list: Timepoint folder names, sorted chronologically
+        """
+        files = await self.artifact_manager.list_files(dataset_id)
+        # Timepoints are folders named YYYY-MM-DD_HH-MM-SS, so sorting by name is chronological
+        timepoints = sorted(item.get('name') for item in files if item.get('type') == 'directory')
+        if start_timepoint:
+            timepoints = [tp for tp in timepoints if tp >= start_timepoint]
+        if end_timepoint:
+            timepoints = [tp for tp in timepoints if tp <= end_timepoint]
+        return timepoints
+
+    def _get_decoded_chunks(self, scale_array, chunk_coords, cache_prefix=None, prefetched=None):
+        """
+        Get decoded chunks of a Zarr array, fetching all chunks that are not cached
+        in a single batched store request.
+
+        Args:
+            scale_array (zarr.Array): The array to read from
+            chunk_coords (list): (chunk_y, chunk_x) indices of the chunks to get
+            cache_prefix (str, optional): Key prefix identifying the array in the
+                decoded chunk cache. Chunks are not cached if omitted.
+            prefetched (dict, optional): Encoded chunks that were already fetched,
+                keyed by chunk key, with None for chunks known not to exist
+
+        Returns:
+            dict: Decoded chunk arrays keyed by chunk coordinates
+        """
+        chunks = {}
+        to_fetch = {}
+        for coords in chunk_coords:
+            cached = self.decoded_chunk_cache.get(f"{cache_prefix}:{coords}") if cache_prefix else None
+            if cached is not None:
+                chunks[coords] = cached
+            else:
+                to_fetch[scale_array._chunk_key(coords)] = coords
+
+        if to_fetch:
+            encoded = dict(prefetched or {})
+            remaining = [chunk_key for chunk_key in to_fetch if chunk_key not in encoded]
+            if remaining:
+                encoded.update(scale_array.chunk_store.getitems(remaining, contexts={}))
+            for chunk_key, coords in to_fetch.items():
+                if encoded.get(chunk_key) is not None:
+                    chunk = scale_array._decode_chunk(encoded[chunk_key])
+                else:
+                    # Chunks that were never written hold the fill value
+                    chunk = np.full(scale_array.chunks, scale_array.fill_value or 0, dtype=scale_array.dtype)
+                if cache_prefix:
+                    self.decoded_chunk_cache.put(f"{cache_prefix}:{coords}", chunk)
+                chunks[coords] = chunk
+        return chunks
+
+    def _region_chunk_coords(self, scale_array, x, y, width, height):
+        """Return the (chunk_y, chunk_x) indices of all chunks overlapping a pixel region"""
+        image_height, image_width = scale_array.shape[:2]
+        y0, y1 = max(y, 0), min(y + height, image_height)
+        x0, x1 = max(x, 0), min(x + width, image_width)
+        if y0 >= y1 or x0 >= x1:
+            return []
+        chunk_height, chunk_width = scale_array.chunks[:2]
+        return [
+            (cy, cx)
+            for cy in range(y0 // chunk_height, (y1 - 1) // chunk_height + 1)
+            for cx in range(x0 // chunk_width, (x1 - 1) // chunk_width + 1)
+        ]
+
+    def _read_region_sync(self, scale_array, x, y, width, height, out=None, cache_prefix=None, prefetched=None):
+        """
+        Read a pixel region from a Zarr array, zero-padding anything outside the image.
+
+        The region is assembled chunk by chunk with slice copies, so it does not need
+        to be aligned with the chunk grid. If `out` is given the region is written into
+        it instead of a new array.
+        """
+        result = np.zeros((height, width), dtype=scale_array.dtype) if out is None else out
+        chunk_coords = self._region_chunk_coords(scale_array, x, y, width, height)
+        if not chunk_coords:
+            return result
+
+        image_height, image_width = scale_array.shape[:2]
+        y0, y1 = max(y, 0), min(y + height, image_height)
+        x0, x1 = max(x, 0), min(x + width, image_width)
+        chunk_height, chunk_width = scale_array.chunks[:2]
+        chunks = self._get_decoded_chunks(scale_array, chunk_coords, cache_prefix, prefetched)
+
+        for (cy, cx), chunk in chunks.items():
+            # Intersection of this chunk with the requested region, in image coordinates
+            top, bottom = max(y0, cy * chunk_height), min(y1, (cy + 1) * chunk_height)
+            left, right = max(x0, cx * chunk_width), min(x1, (cx + 1) * chunk_width)
+            result[top - y:bottom - y, left - x:right - x] = chunk[
+                top - cy * chunk_height:bottom - cy * chunk_height,
+                left - cx * chunk_width:right - cx * chunk_width
+            ]
+        return result
+
+    async def _read_region(self, scale_array, x, y, width, height, out=None, cache_prefix=None):
+        """
+        Read a pixel region without blocking the event loop.
+
+        With an async store the chunks are fetched on the event loop and only decoding
+        and copying run in a thread; other stores do the whole read in a thread.
+        """
+        store = scale_array.chunk_store
+        if not hasattr(store, "getitems_async"):
+            return await asyncio.to_thread(
+                self._read_region_sync, scale_array, x, y, width, height, out, cache_prefix
+            )
+
+        chunk_keys = [
+            scale_array._chunk_key(coords)
+            for coords in self._region_chunk_coords(scale_array, x, y, width, height)
+            if not cache_prefix or self.decoded_chunk_cache.get(f"{cache_prefix}:{coords}") is None
+        ]
+        fetched = await store.getitems_async(chunk_keys) if chunk_keys else {}
+        prefetched = {chunk_key: fetched.get(chunk_key) for chunk_key in chunk_keys}
+        return await asyncio.to_thread(
+            self._read_region_sync, scale_array, x, y, width, height, out, cache_prefix, prefetched
+        )
+
+    async def get_region_np_data(self, dataset_id, timestamp, channel, scale, x, y, width, height):
+        """
+        Get an arbitrary rectangular region of one channel as numpy array.
+
+        Args:
+            dataset_id (str): The dataset ID (workspace/artifact_alias)
+            timestamp (str): The timestamp folder
+            channel (str): Channel name
+            scale (int): Scale level
+            x (int): X coordinate of the top-left corner (in pixels at this scale)
+            y (int): Y coordinate of the top-left corner (in pixels at this scale)
+            width (int): Region width in pixels
+            height (int): Region height in pixels
+
+        Returns:
+            np.ndarray: Region data of shape (height, width), or None if the channel
+            could not be opened
+        """
+        timestamp = timestamp or self.default_timestamp
+        scale_array = await self._get_scale_array(dataset_id, timestamp, channel, scale)
+        if scale_array is None:
+            return None
+        return await self._read_region(
+            scale_array, x, y, width, height,
+            None, f"{dataset_id}:{timestamp}:{channel}:scale{scale}"
+        )
+
+    async def _get_scale_array(self, dataset_id, timestamp, channel, scale):
+        """Open the Zarr array of one channel at a scale level, or return None if unavailable"""
+        zarr_group = await self.get_zarr_group(dataset_id, timestamp, channel)
+        if zarr_group is None:
+            return None
+        try:
+            return zarr_group[f'scale{scale}']
+        except KeyError:
+            logger.info(f"Scale {scale} not found for {dataset_id}:{timestamp}:{channel}")
+            return None
+
+    async def get_multichannel_region_np_data(self, dataset_id, timestamp, scale, x, y, width, height,
+                                              channels=None, max_concurrency=None, dtype=None):
+        """
+        Get the same region of several channels as one (C, Y, X) numpy array.
+
+        The channel groups are opened in parallel and the aligned regions are read
+        concurrently, each one written directly into its slice of a single contiguous
+        output array. Channels that cannot be opened are left zero-filled and reported
+        instead of failing the whole read.
+
+        Args:
+            dataset_id (str): The dataset ID (workspace/artifact_alias)
+            timestamp (str): The timestamp folder
+            scale (int): Scale level
+            x (int): X coordinate of the top-left corner (in pixels at this scale)
+            y (int): Y coordinate of the top-left corner (in pixels at this scale)
+            width (int): Region width in pixels
+            height (int): Region height in pixels
+            channels (list, optional): Channel names, in output order. Defaults to all
+                channels in self.channels.
+            max_concurrency (int, optional): Maximum number of concurrent reads.
+                Defaults to self.max_concurrent_reads.
+            dtype (np.dtype, optional): The output dtype. Defaults to the common dtype of
+                the channels that could be opened.
+
+        Returns:
+            tuple: (data, missing_channels) where data has shape (C, height, width) and
+            missing_channels lists the channel names that could not be read
+        """
+        timestamp = timestamp or self.default_timestamp
+        channels = list(channels or self.channels)
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrent_reads)
+
+        async def _open(channel):
+            async with semaphore:
+                return await self._get_scale_array(dataset_id, timestamp, channel, scale)
+
+        scale_arrays = await asyncio.gather(*[_open(channel) for channel in channels])
+        if dtype is None:
+            available = [array for array in scale_arrays if array is not None]
+            dtype = np.result_type(*[array.dtype for array in available]) if available else np.uint8
+        data = np.zeros((len(channels), height, width), dtype=dtype)
+
+        async def _read(index, channel, scale_array):
+            if scale_array is None:
+                return False
+            try:
+                async with semaphore:
+                    await self._read_region(
+                        scale_array, x, y, width, height,
+                        data[index], f"{dataset_id}:{timestamp}:{channel}:scale{scale}"
+                    )
+                return True
+            except Exception as e:
+                logger.info(f"Error reading region of {dataset_id}:{timestamp}:{channel}: {e}")
+                data[index] = 0
+                return False
+
+        read_ok = await asyncio.gather(
+            *[_read(index, channel, array) for index, (channel, array) in enumerate(zip(channels, scale_arrays))]
+        )
+        missing_channels = [channel for channel, ok in zip(channels, read_ok) if not ok]
+        if missing_channels:
+            logger.info(f"Missing channels for {dataset_id}:{timestamp}: {missing_channels}")
+        return data, missing_channels
+
+    async def _resolve_region_dtype(self, dataset_id, timepoints, channels, scale):
+        """
+        Get the dtype of a region stack from the .zarray metadata of the channels, using
+        the first timepoint at which each channel can be opened.
+        """
+        async def _channel_dtype(channel):
+            for timepoint in timepoints:
+                scale_array = await self._get_scale_array(dataset_id, timepoint, channel, scale)
+                if scale_array is not None:
+                    return scale_array.dtype
+            return None
+
+        dtypes = [dtype for dtype in await asyncio.gather(*[_channel_dtype(c) for c in channels]) if dtype is not None]
+        return np.result_type(*dtypes) if dtypes else np.dtype(np.uint8)
+
+    async def iter_timeseries_region(self, dataset_id, channels, scale, x, y, width, height,
+                                     timepoints=None, start_timepoint=None, end_timepoint=None,
+                                     max_concurrency=None):
+        """
+        Read the same region from a range of timepoints, yielding each timepoint as soon
+        as all of its channels have been read.
+
+        Zarr groups are opened and regions are read concurrently, with at most
+        `max_concurrency` timepoints in flight at once. The channels of a timepoint
+        are read together with get_multichannel_region_np_data. Results are yielded
+        in completion order, not in chronological order.
+
+        Args:
+            dataset_id (str): The dataset ID (workspace/artifact_alias)
+            channels (str or list): A single channel name, or a list of channel names
+            scale (int): Scale level
+            x (int): X coordinate of the top-left corner (in pixels at this scale)
+            y (int): Y coordinate of the top-left corner (in pixels at this scale)
+            width (int): Region width in pixels
+            height (int): Region height in pixels
+            timepoints (list, optional): Explicit timepoints to read. Defaults to all
+                timepoints of the dataset between start_timepoint and end_timepoint.
+            start_timepoint (str, optional): First timepoint to include (inclusive)
+            end_timepoint (str, optional): Last timepoint to include (inclusive)
+            max_concurrency (int, optional): Maximum number of timepoints read at once.
+                Defaults to self.max_concurrent_reads.
+
+        Yields:
+            tuple: (index, timepoint, data, missing_channels) where index is the position
+            of the timepoint in the chronological list, data has shape (Y, X) for a single
+            channel or (C, Y, X) for a list of channels, and missing_channels lists the
+            channels that could not be read and are zero-filled. Every timepoint has the
+            dtype of the channels' arrays, also when all of its channels are missing.
+        """
+        if timepoints is None:
+            timepoints = await self.list_timepoints(dataset_id, start_timepoint, end_timepoint)
+        timepoints = list(timepoints)
+        single_channel = isinstance(channels, str)
+        channel_list = [channels] if single_channel else list(channels)
+        semaphore = asyncio.Semaphore(max_concurrency or self.max_concurrent_reads)
+        dtype = await self._resolve_region_dtype(dataset_id, timepoints, channel_list, scale)
+
+        async def _read_timepoint(index, timepoint):
+            async with semaphore:
+                data, missing_channels = await self.get_multichannel_region_np_data(
+                    dataset_id, timepoint, scale, x, y, width, height,
+                    channels=channel_list, max_concurrency=len(channel_list), dtype=dtype
+                )
+            return index, timepoint, data[0] if single_channel else data, missing_channels
+
+        tasks = [asyncio.create_task(_read_timepoint(i, tp)) for i, tp in enumerate(timepoints)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Stop outstanding reads if the consumer stops iterating early
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def get_timeseries_region(self, dataset_id, channels, scale, x, y, width, height,
+                                    timepoints=None, start_timepoint=None, end_timepoint=None,
+                                    max_concurrency=None):
+        """
+        Read the same region from a range of timepoints into a single stack.
+
+        Takes the same arguments as iter_timeseries_region.
+
+        Returns:
+            tuple: (stack, timepoints) where stack has shape (T, Y, X) for a single channel
+            or (T, C, Y, X) for a list of channels, and timepoints lists the timepoint
+            of each entry along the first axis in chronological order.
+        """
+        if timepoints is None:
+            timepoints = await self.list_timepoints(dataset_id, start_timepoint, end_timepoint)
+        timepoints = list(timepoints)
+
+        stack = None
+        async for index, _, data, _ in self.iter_timeseries_region(
+            dataset_id, channels, scale, x, y, width, height,
+            timepoints=timepoints, max_concurrency=max_concurrency
+        ):
+            if stack is None:
+                # Every timepoint has the dtype from the arrays' metadata
+                stack = np.zeros((len(timepoints),) + data.shape, dtype=data.dtype)
+            stack[index] = data
+
+        if stack is None:
+            channel_shape = () if isinstance(channels, str) else (len(channels),)
+            stack = np.zeros((0,) + channel_shape + (height, width), dtype=np.uint8)
+        return stack, timepoints
+
     async def test_zarr_access(self, dataset_id=None, timestamp=None, channel=None):
         """
         Test function to verify Zarr file access is working correctly.
@@ -0,0 +1,89 @@
+"""
+Benchmark CLIP image embedding throughput against batch size.
+
+Usage:
+    python -m agent_lens.benchmark_embedding --images 256 --batch-sizes 1 8 16 32 64
+    python -m agent_lens.benchmark_embedding --backend onnx-int8 --check-drift
+"""
+
+import argparse
+import base64
+import io
+import time
+import numpy as np
+from PIL import Image
+from agent_lens.register_similarity_search_service import TorchConfig, decode_base64_image, images_to_vectors
+from agent_lens.embedding_backend import BACKENDS, check_accuracy_drift, create_embedding_backend
+
+
+def make_random_images(count, size=(224, 224)):
+    """Create base64 encoded random PNG images, like the cell crops sent by the frontend."""
+    images = []
+    for _ in range(count):
+        image = Image.fromarray(np.random.randint(0, 256, (*size, 3), dtype=np.uint8))
+        buffered = io.BytesIO()
+        image.save(buffered, format="PNG")
+        images.append(base64.b64encode(buffered.getvalue()).decode())
+    return images
+
+
+def run_benchmark(torch_config, images, batch_sizes, repeats=3):
+    """
+    Measure images per second of images_to_vectors for each batch size.
+
+    The embedding cache is bypassed during the measurement, since it would
+    turn repeated runs into lookups.
+
+    Returns:
+        list: (batch_size, images_per_second) tuples, using the best of `repeats` runs.
+    """
+    cache = torch_config.embedding_cache
+    max_entries, disk_dir = cache.max_entries, cache.disk_dir
+    cache.max_entries, cache.disk_dir = 0, None
+    try:
+        # Warm up the model so the first measurement does not include lazy initialization
+        images_to_vectors(images[: max(batch_sizes)], torch_config, batch_size=max(batch_sizes))
+        results = []
+        for batch_size in batch_sizes:
+            best = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                images_to_vectors(images, torch_config, batch_size=batch_size)
+                best = min(best, time.perf_counter() - start)
+            results.append((batch_size, len(images) / best))
+        return results
+    finally:
+        cache.max_entries, cache.disk_dir = max_entries, disk_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CLIP embedding throughput")
+    parser.add_argument("--images", type=int, default=256)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 16, 32, 64])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--backend", choices=BACKENDS, default="torch")
+    parser.add_argument(
+        "--check-drift", action="store_true", help="Compare the backend's vectors with the PyTorch reference"
+    )
+    args = parser.parse_args()
+
+    torch_config = TorchConfig(backend=args.backend)
+    images = make_random_images(args.images)
+    print(f"Embedding {args.images} images with the {args.backend} backend on {torch_config.device}")
+    print(f"{'batch size':>10}  {'images/s':>10}")
+    for batch_size, throughput in run_benchmark(torch_config, images, args.batch_sizes, args.repeats):
+        print(f"{batch_size:>10}  {throughput:>10.1f}")
+
+    if args.check_drift and args.backend != "torch":
+        reference = create_embedding_backend("torch", torch_config.model_id).load()
+        drift = check_accuracy_drift(
+            reference, torch_config.backend, [decode_base64_image(image) for image in images[:64]]
+        )
+        print(
+            f"Cosine similarity to PyTorch: mean {drift['mean_cosine']:.4f}, min {drift['min_cosine']:.4f} "
+            f"({'passed' if drift['passed'] else 'FAILED'})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Benchmark vector index configurations on synthetic 512-d cell vectors.
+
+For every collection size and index config, reports the build time, index
+memory, recall@k against exact search and p50 / p99 query latency.
+
+The local backend runs FLAT configs as exact numpy search and HNSW configs
+with hnswlib. The redis backend creates the same index in a Redis Stack
+server, as the artifact manager's vector engine does.
+
+Usage:
+    python -m agent_lens.benchmark_vector_index --sizes 10000 100000 \\
+        --configs FLAT HNSW:M=16,EF_CONSTRUCTION=200,EF_RUNTIME=64
+    python -m agent_lens.benchmark_vector_index --backend redis --redis-url redis://localhost:6379
+"""
+
+import argparse
+import time
+import numpy as np
+from agent_lens.vector_index import build_vector_field, parse_index_config
+from agent_lens.vector_mirror import HNSWLIB_AVAILABLE, VectorMirror
+
+
+def make_vectors(count, dim=512, clusters=64, seed=0):
+    """
+    Create clustered, unit-length float32 vectors resembling cell embeddings.
+
+    Returns:
+        np.ndarray: The vectors, of shape (count, dim).
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    vectors = centers[rng.integers(0, clusters, count)] + rng.normal(scale=0.5, size=(count, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def exact_neighbors(vectors, queries, k):
+    """Get the indices of the k nearest vectors of every query by cosine distance."""
+    similarity = queries @ vectors.T
+    neighbors = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+    return [set(row) for row in neighbors]
+
+
+def summarize(build_seconds, memory_bytes, found, truth, latencies):
+    """Compute the reported metrics of one benchmark run."""
+    recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "build_s": build_seconds,
+        "memory_mb": memory_bytes / 2**20,
+        "recall": float(recall),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p99_ms": float(np.percentile(latencies_ms, 99)),
+    }
+
+
+def benchmark_local(index_config, vectors, queries, truth, k):
+    """Benchmark an index config with VectorMirror, the in-process backend."""
+    field = build_vector_field(index_config, dim=vectors.shape[1])
+    attributes = field["attributes"]
+    use_hnsw = field["algorithm"] == "HNSW"
+    if use_hnsw and not HNSWLIB_AVAILABLE:
+        return None
+    mirror = VectorMirror(
+        dim=vectors.shape[1],
+        fields=(),
+        use_hnsw=use_hnsw,
+        M=attributes.get("M", 16),
+        ef_construction=attributes.get("EF_CONSTRUCTION", 200),
+        ef_search=attributes.get("EF_RUNTIME", 10),
+    )
+    started = time.perf_counter()
+    mirror.add({"id": i, "cell_image_vector": vector} for i, vector in enumerate(vectors))
+    build_seconds = time.perf_counter() - started
+
+    found, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results = mirror.search(query, top_k=k)
+        latencies.append(time.perf_counter() - started)
+        found.append({result["id"] for result in results})
+    return summarize(build_seconds, mirror.memory_bytes(), found, truth, latencies)
+
+
+def benchmark_redis(index_config, vectors, queries, truth, k, redis_url, batch_size=1000):
+    """Benchmark an index config in Redis search, the artifact manager's vector engine."""
+    import redis
+    from redis.commands.search.field import VectorField
+    try:
+        from redis.commands.search.index_definition import IndexDefinition, IndexType
+    except ImportError:  # redis-py < 6
+        from redis.commands.search.indexDefinition import IndexDefinition, IndexType
+    from redis.commands.search.query import Query
+
+    field = build_vector_field(index_config, dim=vectors.shape[1])
+    client = redis.Redis.from_url(redis_url)
+    index_name = f"agent-lens-benchmark-{time.time_ns()}"
+    prefix = f"{index_name}:"
+    index = client.ft(index_name)
+    index.create_index(
+        [VectorField("v", field["algorithm"], field["attributes"])],
+        definition=IndexDefinition(prefix=[prefix], index_type=IndexType.HASH),
+    )
+    try:
+        started = time.perf_counter()
+        for start in range(0, len(vectors), batch_size):
+            pipeline = client.pipeline(transaction=False)
+            for i in range(start, min(start + batch_size, len(vectors))):
+                pipeline.hset(f"{prefix}{i}", mapping={"v": vectors[i].tobytes()})
+            pipeline.execute()
+        while int(index.info().get("indexing", 0)):
+            time.sleep(0.1)
+        build_seconds = time.perf_counter() - started
+        memory_bytes = float(index.info().get("vector_index_sz_mb", 0)) * 2**20
+
+        query = Query(f"*=>[KNN {k} @v $vec AS score]").sort_by("score").return_fields("score").dialect(2)
+        found, latencies = [], []
+        for vector in queries:
+            started = time.perf_counter()
+            docs = index.search(query, query_params={"vec": vector.tobytes()}).docs
+            latencies.append(time.perf_counter() - started)
+            found.append({int(doc.id[len(prefix):]) for doc in docs})
+        return summarize(build_seconds, memory_bytes, found, truth, latencies)
+    finally:
+        index.dropindex(delete_documents=True)
+
+
+def run_benchmark(index_configs, sizes, num_queries=200, k=10, backend="local", redis_url=None):
+    """
+    Benchmark every index config at every collection size.
+
+    Returns:
+        list: (size, config text, metrics) tuples; metrics is None when the
+            config cannot run on the backend.
+    """
+    rows = []
+    for size in sizes:
+        vectors = make_vectors(size)
+        queries = make_vectors(num_queries, seed=1)
+        truth = exact_neighbors(vectors, queries, k)
+        for text in index_configs:
+            index_config = parse_index_config(text)
+            if backend == "redis":
+                metrics = benchmark_redis(index_config, vectors, queries, truth, k, redis_url)
+            else:
+                metrics = benchmark_local(index_config, vectors, queries, truth, k)
+            rows.append((size, text, metrics))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vector index configurations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument(
+        "--configs", nargs="+", default=["FLAT", "HNSW:M=16,EF_CONSTRUCTION=200,EF_RUNTIME=64"]
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--backend", choices=["local", "redis"], default="local")
+    parser.add_argument("--redis-url", default="redis://localhost:6379")
+    args = parser.parse_args()
+
+    print(f"{'size':>9}  {'config':<40} {'build s':>8} {'MB':>8} {'recall@' + str(args.k):>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for size, text, metrics in run_benchmark(
+        args.configs, args.sizes, args.queries, args.k, args.backend, args.redis_url
+    ):
+        if metrics is None:
+            print(f"{size:>9}  {text:<40} skipped, hnswlib is not installed")
+            continue
+        print(
+            f"{size:>9}  {text:<40} {metrics['build_s']:>8.2f} {metrics['memory_mb']:>8.1f} "
+            f"{metrics['recall']:>9.3f} {metrics['p50_ms']:>8.2f} {metrics['p99_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+This module mirrors the channel zips of an image map dataset from the artifact
+manager to a local directory, using the same {timestamp}/{channel}.zip layout
+that ZarrTileManager reads from its `local_data_dir`.
+
+The mirror is incremental: a manifest next to the data records the size,
+modification time and SHA-256 of every file that was downloaded and verified,
+so unchanged files are skipped on the next run. Interrupted downloads are
+resumed from the partial file with an HTTP range request.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = ".mirror_manifest.json"
+PARTIAL_SUFFIX = ".part"
+# A plain S3 ETag is the MD5 of the object; multipart uploads have "<md5>-<parts>"
+MD5_ETAG_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+def load_manifest(dataset_dir):
+    """Load the mirror manifest of a dataset directory, or an empty one."""
+    path = os.path.join(dataset_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(dataset_dir, manifest):
+    """Write the mirror manifest atomically."""
+    path = os.path.join(dataset_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def file_digests(path, block_size=2**22):
+    """Return the (md5, sha256) hex digests of a file."""
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            md5.update(block)
+            sha256.update(block)
+    return md5.hexdigest(), sha256.hexdigest()
+
+
+def verify_zip(path):
+    """Check the CRC-32 of every member of a zip, raising ValueError on corruption."""
+    with zipfile.ZipFile(path) as zf:
+        bad_member = zf.testzip()
+    if bad_member is not None:
+        raise ValueError(f"CRC mismatch for member {bad_member} in {path}")
+
+
+async def download_with_resume(client, url, part_path, expected_size):
+    """
+    Download a URL to `part_path`, continuing from whatever is already there.
+
+    Args:
+        client (httpx.AsyncClient): The HTTP client.
+        url (str): The pre-signed download URL.
+        part_path (str): The partial file to append to.
+        expected_size (int): The size of the complete file.
+
+    Returns:
+        str: The ETag of the object, or None if the server did not send one.
+    """
+    existing = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    if existing > expected_size:
+        existing = 0
+    headers = {"Range": f"bytes={existing}-"} if existing else {}
+    if existing and existing == expected_size:
+        return None
+
+    async with client.stream("GET", url, headers=headers, timeout=500) as response:
+        response.raise_for_status()
+        # 206 continues the partial file, 200 means the server restarted from byte zero
+        mode = "ab" if response.status_code == 206 else "wb"
+        if mode == "ab":
+            logger.info(f"Resuming {part_path} at byte {existing}")
+        with open(part_path, mode) as f:
+            async for block in response.aiter_bytes():
+                await asyncio.to_thread(f.write, block)
+        return response.headers.get("ETag", "").strip('"') or None
+
+
+async def mirror_file(client, artifact_manager, dataset_id, dataset_dir, file_path, remote_info, manifest, verify=False):
+    """
+    Mirror one file of a dataset, skipping it if the local copy is up to date.
+
+    Returns:
+        bool: True if the file was downloaded, False if it was already up to date.
+    """
+    local_path = os.path.join(dataset_dir, file_path)
+    entry = manifest.get(file_path)
+    if (
+        entry is not None
+        and os.path.exists(local_path)
+        and os.path.getsize(local_path) == remote_info["size"]
+        and entry.get("size") == remote_info["size"]
+        and entry.get("last_modified") == remote_info.get("last_modified")
+    ):
+        if not verify:
+            return False
+        _, sha256 = await asyncio.to_thread(file_digests, local_path)
+        if sha256 == entry.get("sha256"):
+            return False
+        logger.info(f"Checksum mismatch for {local_path}, downloading again")
+
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    part_path = local_path + PARTIAL_SUFFIX
+    url = await artifact_manager.get_file_url(dataset_id, file_path)
+    etag = await download_with_resume(client, url, part_path, remote_info["size"])
+
+    try:
+        size = os.path.getsize(part_path)
+        if size != remote_info["size"]:
+            raise ValueError(f"Size mismatch for {file_path}: expected {remote_info['size']}, got {size}")
+        md5, sha256 = await asyncio.to_thread(file_digests, part_path)
+        if etag and MD5_ETAG_PATTERN.match(etag) and etag != md5:
+            raise ValueError(f"MD5 mismatch for {file_path}: ETag {etag}, local {md5}")
+        if file_path.endswith(".zip"):
+            await asyncio.to_thread(verify_zip, part_path)
+    except Exception:
+        # Do not resume from a corrupt partial file on the next run
+        os.remove(part_path)
+        raise
+
+    os.replace(part_path, local_path)
+    manifest[file_path] = {
+        "size": remote_info["size"],
+        "last_modified": remote_info.get("last_modified"),
+        "sha256": sha256,
+    }
+    return True
+
+
+async def mirror_dataset(artifact_manager, dataset_id, local_data_dir, timepoints=None, channels=None,
+                         max_concurrency=2, verify=False):
+    """
+    Mirror the channel zips of a dataset to a local directory.
+
+    Args:
+        artifact_manager (AgentLensArtifactManager): A connected artifact manager.
+        dataset_id (str): The dataset ID (workspace/artifact_alias).
+        local_data_dir (str): Root of the local mirror; files go to
+            {local_data_dir}/{dataset_id}/{timestamp}/{channel}.zip.
+        timepoints (list, optional): Timepoints to mirror. Defaults to all.
+        channels (list, optional): Channel names to mirror. Defaults to all.
+        max_concurrency (int, optional): Number of files downloaded at once.
+        verify (bool, optional): Re-hash files that look up to date and download
+            them again if they no longer match the manifest.
+
+    Returns:
+        dict: Lists of downloaded and skipped file paths, and errors keyed by file path.
+    """
+    dataset_dir = os.path.join(local_data_dir, dataset_id)
+    os.makedirs(dataset_dir, exist_ok=True)
+    manifest = await asyncio.to_thread(load_manifest, dataset_dir)
+
+    # Mirror what the dataset holds now, not a cached listing
+    artifact_manager.invalidate_metadata(dataset_id)
+    root_items = await artifact_manager.list_files(dataset_id)
+    all_timepoints = sorted(item["name"] for item in root_items if item.get("type") == "directory")
+    selected_timepoints = [tp for tp in all_timepoints if timepoints is None or tp in timepoints]
+
+    remote_files = {}
+    for timepoint in selected_timepoints:
+        for item in await artifact_manager.list_files(dataset_id, dir_path=timepoint):
+            if item.get("type") != "file" or not item["name"].endswith(".zip"):
+                continue
+            if channels is not None and item["name"][:-len(".zip")] not in channels:
+                continue
+            remote_files[f"{timepoint}/{item['name']}"] = item
+    logger.info(f"Mirroring {len(remote_files)} files of {dataset_id} to {dataset_dir}")
+
+    summary = {"downloaded": [], "skipped": [], "failed": {}}
+    semaphore = asyncio.Semaphore(max_concurrency)
+    # Saves run in a thread, one at a time, on a snapshot of the manifest
+    manifest_lock = asyncio.Lock()
+
+    async def _save_manifest():
+        async with manifest_lock:
+            await asyncio.to_thread(save_manifest, dataset_dir, dict(manifest))
+
+    async def _mirror(client, file_path, remote_info):
+        async with semaphore:
+            try:
+                downloaded = await mirror_file(
+                    client, artifact_manager, dataset_id, dataset_dir, file_path, remote_info, manifest, verify
+                )
+            except Exception as e:
+                logger.info(f"Failed to mirror {file_path}: {e}")
+                summary["failed"][file_path] = str(e)
+                return
+            summary["downloaded" if downloaded else "skipped"].append(file_path)
+            if downloaded:
+                logger.info(f"Mirrored {file_path}")
+                await _save_manifest()
+
+    # Reuse the artifact manager's pooled connections for every file
+    client = artifact_manager.http_client
+    await asyncio.gather(*[_mirror(client, path, info) for path, info in sorted(remote_files.items())])
+    await _save_manifest()
+    return summary
@@ -0,0 +1,262 @@
+"""
+This module provides pluggable CLIP image embedding backends: the reference
+PyTorch model, an exported ONNX image encoder run with ONNX Runtime, and a
+dynamically quantized int8 variant of it for CPU-only nodes.
+
+PyTorch, CLIP and ONNX Runtime are imported when a backend is loaded, so only
+the selected backend's dependencies need to be installed.
+"""
+
+import os
+from contextlib import contextmanager
+import numpy as np
+from PIL import Image
+
+BACKENDS = ("torch", "onnx", "onnx-int8")
+CLIP_MEAN = np.array([0.48145466, 0.4578275, 0.40821073], dtype=np.float32)
+CLIP_STD = np.array([0.26862954, 0.26130258, 0.27577711], dtype=np.float32)
+DEFAULT_ONNX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "agent_lens", "onnx")
+
+
+def clip_preprocess_numpy(image, resolution=224):
+    """
+    Preprocess an image like CLIP's torchvision transform, without PyTorch.
+
+    The shorter side is resized to `resolution` with bicubic interpolation,
+    the center is cropped and the pixels are normalized with the CLIP mean and
+    standard deviation.
+
+    Args:
+        image (Image): The image.
+        resolution (int, optional): The input resolution of the model.
+
+    Returns:
+        np.ndarray: A float32 array of shape (3, resolution, resolution).
+    """
+    image = image.convert("RGB")
+    # Match torchvision, which truncates the longer side
+    if image.width <= image.height:
+        size = (resolution, int(resolution * image.height / image.width))
+    else:
+        size = (int(resolution * image.width / image.height), resolution)
+    image = image.resize(size, Image.BICUBIC)
+    left = int(round((image.width - resolution) / 2.0))
+    top = int(round((image.height - resolution) / 2.0))
+    image = image.crop((left, top, left + resolution, top + resolution))
+    pixels = np.asarray(image, dtype=np.float32) / 255.0
+    return ((pixels - CLIP_MEAN) / CLIP_STD).transpose(2, 0, 1)
+
+
+def detect_torch_device():
+    """Get the PyTorch device to run on: "cuda" if available, otherwise "cpu"."""
+    try:
+        import torch
+    except ImportError:
+        return "cpu"
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+class TorchClipBackend:
+    """The reference backend running CLIP with PyTorch."""
+
+    def __init__(self, model_id="ViT-B/32", device="cpu"):
+        self.model_id = model_id
+        self.device = device
+        self.cache_id = model_id
+        self.model = None
+        self._preprocess = None
+
+    def load(self):
+        """Load the CLIP model. Returns the backend."""
+        import clip
+
+        self.model, self._preprocess = clip.load(self.model_id, device=self.device)
+        return self
+
+    def preprocess(self, image):
+        """Preprocess a PIL image into one model input."""
+        return self._preprocess(image.convert("RGB"))
+
+    def encode(self, inputs):
+        """
+        Embed preprocessed images in one forward pass.
+
+        Args:
+            inputs (list): Inputs returned by `preprocess`.
+
+        Returns:
+            np.ndarray: float32 embeddings of shape (len(inputs), dim).
+        """
+        import torch
+
+        batch = torch.stack(inputs).to(self.device)
+        with torch.no_grad():
+            return self.model.encode_image(batch).float().cpu().numpy()
+
+
+class OnnxClipBackend:
+    """
+    CLIP image encoder exported to ONNX and run with ONNX Runtime on CPU.
+
+    The model is exported from the PyTorch weights on first load and, with
+    `quantize=True`, dynamically quantized to int8. Exported files are reused.
+    """
+
+    def __init__(self, model_id="ViT-B/32", onnx_dir=None, quantize=False, resolution=224, num_threads=None):
+        """
+        Args:
+            model_id (str, optional): The CLIP model to export.
+            onnx_dir (str, optional): Directory of exported models. Defaults to the
+                AGENT_LENS_ONNX_DIR environment variable or ~/.cache/agent_lens/onnx.
+            quantize (bool, optional): Use int8 dynamically quantized weights.
+            resolution (int, optional): The input resolution of the model.
+            num_threads (int, optional): ONNX Runtime intra-op threads. Defaults to all cores.
+        """
+        self.model_id = model_id
+        self.onnx_dir = onnx_dir or os.environ.get("AGENT_LENS_ONNX_DIR") or DEFAULT_ONNX_DIR
+        self.quantize = quantize
+        self.resolution = resolution
+        self.num_threads = num_threads
+        self.cache_id = f"{model_id}:onnx-int8" if quantize else f"{model_id}:onnx"
+        self.session = None
+
+    @property
+    def model_path(self):
+        name = self.model_id.replace("/", "-")
+        return os.path.join(self.onnx_dir, f"{name}-int8.onnx" if self.quantize else f"{name}.onnx")
+
+    def load(self):
+        """Export the model if needed and open an ONNX Runtime session. Returns the backend."""
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The onnx embedding backends need the onnxruntime package") from e
+
+        if not os.path.exists(self.model_path):
+            export_onnx_image_encoder(self.model_id, self.model_path, quantize=self.quantize, resolution=self.resolution)
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+        self.session = onnxruntime.InferenceSession(self.model_path, options, providers=["CPUExecutionProvider"])
+        return self
+
+    def preprocess(self, image):
+        """Preprocess a PIL image into one model input."""
+        return clip_preprocess_numpy(image, self.resolution)
+
+    def encode(self, inputs):
+        """
+        Embed preprocessed images in one session run.
+
+        Args:
+            inputs (list): Inputs returned by `preprocess`.
+
+        Returns:
+            np.ndarray: float32 embeddings of shape (len(inputs), dim).
+        """
+        batch = np.stack(inputs).astype(np.float32)
+        (features,) = self.session.run(None, {"image": batch})
+        return features.astype(np.float32)
+
+
+def export_onnx_image_encoder(model_id, output_path, quantize=False, resolution=224):
+    """
+    Export the CLIP image encoder to ONNX with a dynamic batch dimension.
+
+    Files are written to a temporary path and moved into place once complete,
+    so an interrupted export never leaves a partial model to be loaded later.
+
+    Args:
+        model_id (str): The CLIP model to export.
+        output_path (str): Path of the ONNX file.
+        quantize (bool, optional): Quantize the weights to int8 with dynamic quantization.
+        resolution (int, optional): The input resolution of the model.
+    """
+    import clip
+    import torch
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    model, _ = clip.load(model_id, device="cpu", jit=False)
+    encoder = model.visual.float().eval()
+    fp32_path = output_path.replace("-int8.onnx", ".onnx") if quantize else output_path
+    if not os.path.exists(fp32_path):
+        with _atomic_path(fp32_path) as tmp_path:
+            torch.onnx.export(
+                encoder,
+                torch.randn(1, 3, resolution, resolution),
+                tmp_path,
+                input_names=["image"],
+                output_names=["embedding"],
+                dynamic_axes={"image": {0: "batch"}, "embedding": {0: "batch"}},
+                opset_version=17,
+            )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        with _atomic_path(output_path) as tmp_path:
+            quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+
+
+@contextmanager
+def _atomic_path(path):
+    """Yield a temporary path next to `path` that replaces it once the block succeeds."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def create_embedding_backend(name="torch", model_id="ViT-B/32", device="cpu", onnx_dir=None):
+    """
+    Create an embedding backend by name.
+
+    Args:
+        name (str, optional): One of "torch", "onnx" or "onnx-int8".
+        model_id (str, optional): The CLIP model.
+        device (str, optional): The PyTorch device of the torch backend.
+        onnx_dir (str, optional): Directory of exported ONNX models.
+
+    Returns:
+        The backend. Call `load` before embedding.
+    """
+    if name == "torch":
+        return TorchClipBackend(model_id, device=device)
+    if name in ("onnx", "onnx-int8"):
+        return OnnxClipBackend(model_id, onnx_dir=onnx_dir, quantize=name == "onnx-int8")
+    raise ValueError(f"Unknown embedding backend {name!r}, expected one of {', '.join(BACKENDS)}")
+
+
+def embed_images(backend, images):
+    """Embed a list of PIL images with a loaded backend."""
+    return backend.encode([backend.preprocess(image) for image in images])
+
+
+def check_accuracy_drift(reference, candidate, images, min_cosine=0.99):
+    """
+    Compare the embeddings of a candidate backend with the reference backend.
+
+    Args:
+        reference: The loaded reference backend, usually TorchClipBackend.
+        candidate: The loaded backend to check.
+        images (list): PIL images to embed with both backends.
+        min_cosine (float, optional): Lowest acceptable cosine similarity per image.
+
+    Returns:
+        dict: The mean and minimum cosine similarity between the two backends'
+            vectors, the maximum absolute difference, and whether the check passed.
+    """
+    expected = embed_images(reference, images)
+    actual = embed_images(candidate, images)
+    cosine = np.sum(expected * actual, axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    )
+    return {
+        "mean_cosine": float(cosine.mean()),
+        "min_cosine": float(cosine.min()),
+        "max_abs_diff": float(np.abs(expected - actual).max()),
+        "passed": bool(cosine.min() >= min_cosine),
+    }
@@ -0,0 +1,121 @@
+"""
+This module provides a cache of image embeddings keyed by image content and
+model, so the same cell crop is only run through the model once.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def content_key(image_bytes, model_id):
+    """
+    Get the cache key of an image for a model.
+
+    Args:
+        image_bytes (bytes): The encoded image file content.
+        model_id (str): The model identifier, e.g. "ViT-B/32".
+
+    Returns:
+        str: The hex SHA-256 of the model identifier and the image content.
+    """
+    digest = hashlib.sha256(model_id.encode())
+    digest.update(b"\0")
+    digest.update(image_bytes)
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Thread-safe cache of embedding vectors with an in-memory LRU tier and an
+    optional on-disk tier.
+
+    The disk tier stores one .npy file per key under `disk_dir`, so it survives
+    restarts and can be shared by services embedding with the same model.
+    """
+
+    def __init__(self, model_id, max_entries=10000, disk_dir=None):
+        """
+        Args:
+            model_id (str): The model identifier, part of every key.
+            max_entries (int, optional): Maximum number of vectors kept in memory.
+            disk_dir (str, optional): Directory of the on-disk tier. Disabled by default.
+        """
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()  # key -> np.ndarray
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+
+    def key(self, image_bytes):
+        """Get the cache key of an image for this cache's model."""
+        return content_key(image_bytes, self.model_id)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.npy")
+
+    def get(self, key):
+        """
+        Get a cached vector.
+
+        Args:
+            key (str): The key returned by `key`.
+
+        Returns:
+            np.ndarray: The vector, or None if it is not cached.
+        """
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return vector
+
+        if self.disk_dir:
+            try:
+                vector = np.load(self._disk_path(key))
+            except (OSError, ValueError):
+                vector = None
+            if vector is not None:
+                with self._lock:
+                    self.stats["disk_hits"] += 1
+                self._put_memory(key, vector)
+                return vector
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, key, vector):
+        """
+        Cache a vector in memory and, if enabled, on disk.
+
+        Args:
+            key (str): The key returned by `key`.
+            vector (np.ndarray): The embedding vector.
+        """
+        vector = np.asarray(vector, dtype=np.float32)
+        self._put_memory(key, vector)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temporary file first so readers never see a partial vector
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, vector)
+            os.replace(tmp_path, path)
+
+    def _put_memory(self, key, vector):
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_stats(self):
+        """Return hit/miss counts and the number of vectors in memory."""
+        with self._lock:
+            return {**self.stats, "size": len(self._entries)}
@@ -0,0 +1,173 @@
+"""
+This module provides a micro-batching executor for model inference. Requests
+submitted from the event loop are queued, grouped into batches and run on a
+dedicated thread, so concurrent callers share one forward pass and the event
+loop is never blocked by the model.
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+class MicroBatchExecutor:
+    """
+    Group concurrent inference requests into batches.
+
+    The first queued request opens a batch, which is closed once it holds
+    `max_batch_size` requests or `max_wait` seconds have passed. The batch
+    function runs on a single worker thread and every caller gets the result
+    for its own input. When a batch fails, its inputs are retried one by one,
+    so only the callers whose input fails get the error.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=32, max_wait=0.005, max_queue_size=4096, name="inference"):
+        """
+        Args:
+            batch_fn (callable): Maps a list of inputs to a list of results of the same length.
+            max_batch_size (int, optional): Maximum number of requests per batch.
+            max_wait (float, optional): Seconds a batch waits for more requests.
+            max_queue_size (int, optional): Queued requests before `submit` waits.
+            name (str, optional): Name of the worker thread.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_queue_size = max_queue_size
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._queue = None
+        self._worker = None
+        self._latencies = {stage: deque(maxlen=1000) for stage in ("queue_wait", "inference", "total")}
+        self.stats = {
+            "requests": 0, "batches": 0, "batched_requests": 0, "retried_batches": 0, "errors": 0, "max_queue_depth": 0
+        }
+
+    def _ensure_started(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = asyncio.create_task(self._run())
+
+    async def submit(self, item):
+        """
+        Run the batch function on one input.
+
+        Args:
+            item: The input.
+
+        Returns:
+            The result for this input.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future, time.perf_counter()))
+        self.stats["requests"] += 1
+        self.stats["max_queue_depth"] = max(self.stats["max_queue_depth"], self._queue.qsize())
+        return await future
+
+    async def submit_many(self, items):
+        """Run the batch function on many inputs, returning their results in order."""
+        return await asyncio.gather(*[self.submit(item) for item in items])
+
+    async def _next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Callers that were cancelled while queued do not need a result
+        return [request for request in batch if not request[1].done()]
+
+    def _call_batch_fn(self, items):
+        results = self.batch_fn(items)
+        if len(results) != len(items):
+            raise ValueError(f"Batch function returned {len(results)} results for {len(items)} inputs")
+        return results
+
+    def _run_batch(self, items):
+        """
+        Run the batch function, falling back to one input at a time if the batch fails.
+
+        Returns:
+            tuple: (outcomes, retried) where outcomes holds an (ok, result or exception)
+                pair per input.
+        """
+        try:
+            return [(True, result) for result in self._call_batch_fn(items)], False
+        except Exception as e:
+            if len(items) == 1:
+                return [(False, e)], False
+        outcomes = []
+        for item in items:
+            try:
+                outcomes.append((True, self._call_batch_fn([item])[0]))
+            except Exception as e:
+                outcomes.append((False, e))
+        return outcomes, True
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            outcomes, retried = await loop.run_in_executor(
+                self._thread, self._run_batch, [item for item, _, _ in batch]
+            )
+            finished = time.perf_counter()
+
+            self.stats["batches"] += 1
+            self.stats["batched_requests"] += len(batch)
+            self.stats["retried_batches"] += retried
+            self._latencies["inference"].append(finished - started)
+            for (_, future, queued), (ok, result) in zip(batch, outcomes):
+                self._latencies["queue_wait"].append(started - queued)
+                self._latencies["total"].append(finished - queued)
+                if not ok:
+                    self.stats["errors"] += 1
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(result)
+                else:
+                    future.set_exception(result)
+
+    def get_metrics(self):
+        """
+        Get queue, batch and latency metrics.
+
+        Returns:
+            dict: Request and batch counts, the number of failed requests and of
+                batches retried one input at a time, the current and maximum queue
+                depth, the average batch size, and mean / p95 latencies in
+                milliseconds per stage over the last 1000 samples.
+        """
+        metrics = dict(self.stats)
+        metrics["queue_depth"] = self._queue.qsize() if self._queue is not None else 0
+        metrics["avg_batch_size"] = metrics["batched_requests"] / metrics["batches"] if metrics["batches"] else 0
+        for stage, samples in self._latencies.items():
+            values = np.array(samples) * 1000 if samples else np.zeros(1)
+            metrics[f"{stage}_ms"] = {"mean": float(values.mean()), "p95": float(np.percentile(values, 95))}
+        return metrics
+
+    async def close(self):
+        """Stop the worker task and thread."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._thread.shutdown(wait=False)
@@ -0,0 +1,105 @@
+"""
+This module provides lazily loaded resources, such as models and search
+indexes, so services can register before they are loaded and warm them up in
+the background.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class LazyResource:
+    """
+    A resource that is loaded once, on first use or by an explicit warm-up.
+
+    Loading is thread-safe: concurrent callers wait for the same load. A failed
+    load is reported in the status and retried by the next caller.
+    """
+
+    def __init__(self, loader, name):
+        """
+        Args:
+            loader (callable): Loads and returns the resource. Called in a worker thread
+                when warming up from the event loop.
+            name (str): Name of the resource in status reports.
+        """
+        self.loader = loader
+        self.name = name
+        self.state = "cold"
+        self.error = None
+        self.load_seconds = None
+        self._value = None
+        self._lock = threading.Lock()
+        self._warmup_task = None
+
+    def get(self):
+        """
+        Get the resource, loading it in the calling thread if needed.
+
+        Returns:
+            The loaded resource.
+        """
+        if self.state == "ready":
+            return self._value
+        with self._lock:
+            if self.state != "ready":
+                self.state = "warming"
+                started = time.perf_counter()
+                try:
+                    self._value = self.loader()
+                except Exception as e:
+                    self.state = "failed"
+                    self.error = str(e)
+                    raise
+                self.load_seconds = time.perf_counter() - started
+                self.error = None
+                self.state = "ready"
+        return self._value
+
+    async def warm_up(self):
+        """Load the resource in a worker thread without blocking the event loop."""
+        return await asyncio.to_thread(self.get)
+
+    def start_warmup(self):
+        """
+        Start loading the resource in the background.
+
+        Returns:
+            asyncio.Task: The warm-up task. Errors are reported in the status.
+        """
+        if self._warmup_task is None or self._warmup_task.done():
+            if self.state == "cold":
+                # Report warming right away, before the worker thread picks up the load
+                self.state = "warming"
+            self._warmup_task = asyncio.create_task(self._warm_up_quietly())
+        return self._warmup_task
+
+    async def _warm_up_quietly(self):
+        try:
+            await self.warm_up()
+        except Exception as e:
+            print(f"Warm-up of {self.name} failed: {e}")
+
+    def get_status(self):
+        """Return the state, load time in seconds and last error of the resource."""
+        return {"state": self.state, "load_seconds": self.load_seconds, "error": self.error}
+
+
+def get_readiness(resources):
+    """
+    Get the readiness of a service from the status of its resources.
+
+    Args:
+        resources (list): The LazyResource instances the service depends on.
+
+    Returns:
+        str: "ready" when all resources are loaded, "failed" when any failed to
+            load, and "warming" otherwise.
+    """
+    states = [resource.state for resource in resources]
+    if all(state == "ready" for state in states):
+        return "ready"
+    if "failed" in states:
+        return "failed"
+    return "warming"
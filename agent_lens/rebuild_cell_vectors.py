@@ -5,10 +5,14 @@ import sqlite3
 import os
 from PIL import Image
 import numpy as np
+from agent_lens.embedding_cache import EmbeddingCache
 
 # Load the CLIP model
+MODEL_ID = "ViT-B/32"  # Use ViT-B/32 for 512-dim vectors
 device = "cuda" if torch.cuda.is_available() else "cpu"
-model, preprocess = clip.load("ViT-B/32", device=device)  # Use ViT-B/32 for 512-dim vectors
+model, preprocess = clip.load(MODEL_ID, device=device)
+# Reuse vectors of unchanged images across rebuilds and with the similarity services
+embedding_cache = EmbeddingCache(MODEL_ID, disk_dir=os.getenv("AGENT_LENS_EMBEDDING_CACHE_DIR"))
 
 def rebuild_cell_database():
     conn = sqlite3.connect('cell_vectors_db.db')
@@ -50,11 +54,16 @@ def rebuild_cell_database():
             
             if os.path.exists(file_path):
                 print(f"Processing {file_path}")
-                # Regenerate vector with ViT-B/32 model
-                with Image.open(file_path) as img:
-                    image_input = preprocess(img.convert("RGB")).unsqueeze(0).to(device)
-                    with torch.no_grad():
-                        vector = model.encode_image(image_input).cpu().numpy().flatten()
+                # Regenerate vector with ViT-B/32 model, unless this image was embedded before
+                with open(file_path, 'rb') as f:
+                    cache_key = embedding_cache.key(f.read())
+                vector = embedding_cache.get(cache_key)
+                if vector is None:
+                    with Image.open(file_path) as img:
+                        image_input = preprocess(img.convert("RGB")).unsqueeze(0).to(device)
+                        with torch.no_grad():
+                            vector = model.encode_image(image_input).cpu().numpy().flatten().astype(np.float32)
+                    embedding_cache.put(cache_key, vector)
                 
                 # Verify vector dimension
                 if vector.shape[0] != 512:
@@ -5,7 +5,7 @@ that serves the frontend application.
 
 import os
 from fastapi import FastAPI
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from agent_lens.artifact_manager import ZarrTileManager, AgentLensArtifactManager
 from hypha_rpc import connect_to_server
@@ -93,7 +93,8 @@ def get_frontend_api():
         brightness_settings: str = None,
         threshold_settings: str = None,
         color_settings: str = None,
-        priority: int = 10  # Default priority (lower is higher priority)
+        priority: int = 10,  # Default priority (lower is higher priority)
+        tile_size: int = None  # Tile size in pixels, a multiple of the chunk size
     ):
         """
         Endpoint to serve tiles with customizable image processing settings.
@@ -111,20 +112,26 @@ def get_frontend_api():
             threshold_settings (str, optional): JSON string with min/max threshold settings
             color_settings (str, optional): JSON string with color settings
             priority (int, optional): Priority level for tile loading (lower is higher priority)
+            tile_size (int, optional): Tile size in pixels, a multiple of the chunk size (e.g. 512 or 1024)
         
         Returns:
             str: Base64 encoded tile image
         """
         import json
         
+        try:
+            tile_size = tile_manager.validate_tile_size(tile_size)
+        except ValueError as e:
+            return JSONResponse(content={"error": str(e)}, status_code=400)
+        
         try:
             # Queue the tile request with the specified priority
             # This allows the frontend to prioritize visible tiles
-            await tile_manager.request_tile(dataset_id, timestamp, channel_name, z, x, y, priority)
+            await tile_manager.request_tile(dataset_id, timestamp, channel_name, z, x, y, priority, tile_size)
             
             # Get the raw tile data as numpy array using ZarrTileManager
             # ZarrTileManager will handle URL expiration internally
-            tile_data = await tile_manager.get_tile_np_data(dataset_id, timestamp, channel_name, z, x, y)
+            tile_data = await tile_manager.get_tile_np_data(dataset_id, timestamp, channel_name, z, x, y, tile_size)
             
             # Parse settings from JSON strings if provided
             try:
@@ -204,7 +211,7 @@ def get_frontend_api():
                         color = tuple(color_dict[channel_key])
                         
                         # Create an RGB image
-                        rgb_image = np.zeros((tile_manager.tile_size, tile_manager.tile_size, 3), dtype=np.uint8)
+                        rgb_image = np.zeros((tile_size, tile_size, 3), dtype=np.uint8)
                         
                         # Apply the color to each channel - using the enhanced image
                         rgb_image[..., 0] = enhanced * (color[0] / 255.0)  # R
@@ -227,7 +234,7 @@ def get_frontend_api():
             
         except Exception as e:
             logger.error(f"Error in tile_endpoint: {e}")
-            blank_image = Image.new("L", (tile_manager.tile_size, tile_manager.tile_size), color=0)
+            blank_image = Image.new("L", (tile_size, tile_size), color=0)
             buffer = io.BytesIO()
             blank_image.save(buffer, format="PNG")
             return base64.b64encode(buffer.getvalue()).decode('utf-8')
@@ -246,7 +253,8 @@ def get_frontend_api():
         brightness_settings: str = None,
         threshold_settings: str = None,
         color_settings: str = None,
-        priority: int = 10  # Default priority (lower is higher priority)
+        priority: int = 10,  # Default priority (lower is higher priority)
+        tile_size: int = None  # Tile size in pixels, a multiple of the chunk size
     ):
         """
         Endpoint to merge tiles from multiple channels with customizable image processing settings.
@@ -264,17 +272,23 @@ def get_frontend_api():
             threshold_settings (str, optional): JSON string with min/max threshold settings for each channel
             color_settings (str, optional): JSON string with color settings for each channel
             priority (int, optional): Priority level for tile loading (lower is higher priority)
+            tile_size (int, optional): Tile size in pixels, a multiple of the chunk size (e.g. 512 or 1024)
         
         Returns:
             str: Base64 encoded merged tile image
         """
         import json
         
+        try:
+            tile_size = tile_manager.validate_tile_size(tile_size)
+        except ValueError as e:
+            return JSONResponse(content={"error": str(e)}, status_code=400)
+        
         channel_keys = [int(key) for key in channels.split(',') if key]
         
         if not channel_keys:
             # Return a blank tile if no channels are specified
-            blank_image = Image.new("RGB", (tile_manager.tile_size, tile_manager.tile_size), color=(0, 0, 0))
+            blank_image = Image.new("RGB", (tile_size, tile_size), color=(0, 0, 0))
             buffer = io.BytesIO()
             blank_image.save(buffer, format="PNG")
             return base64.b64encode(buffer.getvalue()).decode('utf-8')
@@ -332,25 +346,25 @@ def get_frontend_api():
             try:
                 # Queue the tile request with the specified priority
                 # This allows the frontend to prioritize visible tiles
-                await tile_manager.request_tile(dataset_id, timepoint, channel_name, z, x, y, priority)
+                await tile_manager.request_tile(dataset_id, timepoint, channel_name, z, x, y, priority, tile_size)
                 
                 # Get tile from Zarr store - ZarrTileManager will handle URL expiration internally
-                tile_data = await tile_manager.get_tile_np_data(dataset_id, timepoint, channel_name, z, x, y)
+                tile_data = await tile_manager.get_tile_np_data(dataset_id, timepoint, channel_name, z, x, y, tile_size)
                 
                 # Ensure the tile data is properly shaped (check if empty/None)
                 if tile_data is None or tile_data.size == 0:
                     # Create a blank tile if we couldn't get data
-                    tile_data = np.zeros((tile_manager.tile_size, tile_manager.tile_size), dtype=np.uint8)
+                    tile_data = np.zeros((tile_size, tile_size), dtype=np.uint8)
                 
                 channel_tiles.append((tile_data, channel_key))
             except Exception as e:
                 logger.error(f"Error getting tile for channel {channel_name}: {e}")
                 # Use blank tile on error
-                blank_tile = np.zeros((tile_manager.tile_size, tile_manager.tile_size), dtype=np.uint8)
+                blank_tile = np.zeros((tile_size, tile_size), dtype=np.uint8)
                 channel_tiles.append((blank_tile, channel_key))
         
         # Create an RGB image to merge the channels
-        merged_image = np.zeros((tile_manager.tile_size, tile_manager.tile_size, 3), dtype=np.float32)
+        merged_image = np.zeros((tile_size, tile_size, 3), dtype=np.float32)
         
         # Check if brightfield channel is included
         has_brightfield = 0 in [ch_key for _, ch_key in channel_tiles]
@@ -477,7 +491,7 @@ def get_frontend_api():
                 merged_image = util.img_as_ubyte(merged_image)
             else:
                 # Create blank image if all channels were empty
-                merged_image = np.zeros((tile_manager.tile_size, tile_manager.tile_size, 3), dtype=np.uint8)
+                merged_image = np.zeros((tile_size, tile_size, 3), dtype=np.uint8)
         
         # Convert to PIL image and return as base64
         pil_image = Image.fromarray(merged_image)
@@ -511,7 +525,7 @@ def get_frontend_api():
             # Use the list method to get children of the specified artifact_id
             gallery_id = "agent-lens/image-map-of-u2os-fucci-drug-treatment-zip"
             logger.info(f"Fetching datasets from gallery: {gallery_id}")
-            datasets = await artifact_manager_instance._svc.list(parent_id=gallery_id)
+            datasets = await artifact_manager_instance.list_children(gallery_id)
             
             # Log the response for debugging
             logger.info(f"Gallery response received, datasets found: {len(datasets) if datasets else 0}")
@@ -531,52 +545,50 @@ def get_frontend_api():
             return []
 
     @app.get("/subfolders")
-    async def get_subfolders(dataset_id: str, dir_path: str = None, offset: int = 0, limit: int = 20):
+    async def get_subfolders(
+        dataset_id: str,
+        dir_path: str = None,
+        offset: int = 0,
+        limit: int = 20,
+        cursor: str = None,
+        prefix: str = None,
+    ):
         """
         Endpoint to fetch contents (files and subfolders) from a specified directory within a dataset,
-        with pagination support.
+        with pagination support. Directories come first, then files, both sorted by name.
 
         Args:
             dataset_id (str): The ID of the dataset.
             dir_path (str, optional): The directory path within the dataset to list contents. Defaults to None for the root directory.
             offset (int, optional): Number of items to skip. Defaults to 0.
             limit (int, optional): Maximum number of items to return. Defaults to 20.
+            cursor (str, optional): The `next_cursor` of the previous page, used instead of `offset`.
+            prefix (str, optional): Only include items whose name starts with this prefix.
 
         Returns:
-            dict: A dictionary containing paginated items and total count.
+            dict: A dictionary containing paginated items, total count and the cursor of the next page.
         """
         logger.info(f"Fetching contents for dataset: {dataset_id}, dir_path: {dir_path}, offset: {offset}, limit: {limit}")
         # Ensure the artifact manager is connected
         if artifact_manager_instance.server is None:
             _, artifact_manager_instance._svc = await get_artifact_manager()
         try:
-            # Get all files and directories in the current path
-            all_items = await artifact_manager_instance._svc.list_files(dataset_id, dir_path=dir_path)
-            logger.info(f"All items, length: {len(all_items)}")
-            
-            # Sort: directories first, then files, both alphabetically
-            directories = [item for item in all_items if item.get('type') == 'directory']
-            directories.sort(key=lambda x: x.get('name', ''))
-            
-            files = [item for item in all_items if item.get('type') == 'file']
-            files.sort(key=lambda x: x.get('name', ''))
-            
-            # Combine the sorted lists
-            sorted_items = directories + files
-            
-            # Apply pagination
-            total_count = len(sorted_items)
-            paginated_items = sorted_items[offset:offset + limit] if offset < total_count else []
-            
-            logger.info(f"Returning {len(paginated_items)} of {total_count} items (offset: {offset}, limit: {limit})")
+            page = await artifact_manager_instance.list_directory_page(
+                dataset_id, dir_path=dir_path, cursor=cursor, limit=limit, prefix=prefix,
+                offset=0 if cursor else offset,
+            )
+            logger.info(f"Returning {len(page['items'])} of {page['total']} items (offset: {offset}, limit: {limit})")
             
             # Return both the items and the total count
             return {
-                "items": paginated_items,
-                "total": total_count,
+                "items": page["items"],
+                "total": page["total"],
                 "offset": offset,
-                "limit": limit
+                "limit": limit,
+                "next_cursor": page["next_cursor"],
             }
+        except ValueError as e:
+            return JSONResponse(content={"error": str(e)}, status_code=400)
         except Exception as e:
             logger.error(f"Error fetching contents: {e}")
             import traceback
@@ -601,7 +613,7 @@ def get_frontend_api():
             _, artifact_manager_instance._svc = await get_artifact_manager()
         try:
             # Get the pre-signed URL for the file
-            url = await artifact_manager_instance._svc.get_file(dataset_id, file_path)
+            url = await artifact_manager_instance.get_file_url(dataset_id, file_path)
             return {"url": url}
         except Exception as e:
             logger.error(f"Error getting file URL: {e}")
@@ -627,7 +639,7 @@ def get_frontend_api():
             _, artifact_manager_instance._svc = await get_artifact_manager()
         try:
             # Get the pre-signed URL for the file
-            url = await artifact_manager_instance._svc.get_file(dataset_id, file_path)
+            url = await artifact_manager_instance.get_file_url(dataset_id, file_path)
             from fastapi.responses import RedirectResponse
             return RedirectResponse(url=url)
         except Exception as e:
@@ -637,6 +649,21 @@ def get_frontend_api():
             from fastapi.responses import JSONResponse
             return JSONResponse(content={"error": str(e)}, status_code=404)
 
+    @app.get("/http-stats")
+    async def get_http_stats():
+        """
+        Endpoint to get connection reuse statistics of the shared HTTP client.
+
+        Returns:
+            dict: Statistics of the HTTP client shared by the frontend and the tile
+                manager, and of the pre-signed URL and metadata caches.
+        """
+        return {
+            "artifact_manager": artifact_manager_instance.get_http_stats(),
+            "url_cache": artifact_manager_instance.url_cache.get_stats(),
+            "metadata_cache": artifact_manager_instance.metadata_cache.get_stats(),
+        }
+
     @app.get("/setup-image-map")
     async def setup_image_map(dataset_id: str):
         """
@@ -659,7 +686,7 @@ def get_frontend_api():
             try:
                 # List files to verify the dataset exists and is accessible
                 logger.info(f"Verifying dataset access: {dataset_id}")
-                files = await artifact_manager_instance._svc.list_files(dataset_id)
+                files = await artifact_manager_instance.list_files(dataset_id)
                 
                 if files is not None:
                     logger.info(f"Image map dataset found: {dataset_id} with {len(files)} files")
@@ -709,7 +736,7 @@ def get_frontend_api():
         
         try:
             # List all files at the root level of the dataset (should be timepoint folders)
-            files = await artifact_manager_instance._svc.list_files(dataset_id)
+            files = await artifact_manager_instance.list_files(dataset_id)
             
             # Filter for directories only and sort them (they should be in timestamp format)
             timepoints = [
@@ -747,7 +774,8 @@ def get_frontend_api():
         brightness_settings: str = None,
         threshold_settings: str = None,
         color_settings: str = None,
-        priority: int = 10  # Default priority (lower is higher priority)
+        priority: int = 10,  # Default priority (lower is higher priority)
+        tile_size: int = None  # Tile size in pixels, a multiple of the chunk size
     ):
         """
         Endpoint to serve tiles for a specific timepoint from an image map dataset with customizable processing.
@@ -765,6 +793,7 @@ def get_frontend_api():
             threshold_settings (str, optional): JSON string with min/max threshold settings
             color_settings (str, optional): JSON string with color settings
             priority (int, optional): Priority level for tile loading (lower is higher priority)
+            tile_size (int, optional): Tile size in pixels, a multiple of the chunk size (e.g. 512 or 1024)
 
         Returns:
             str: Base64 encoded tile image.
@@ -773,13 +802,18 @@ def get_frontend_api():
         
         logger.info(f"Fetching tile for timepoint: {timepoint}, z={z}, x={x}, y={y}")
         
+        try:
+            tile_size = tile_manager.validate_tile_size(tile_size)
+        except ValueError as e:
+            return JSONResponse(content={"error": str(e)}, status_code=400)
+        
         try:
             # Queue the tile request with the specified priority
             # This allows the frontend to prioritize visible tiles
-            await tile_manager.request_tile(dataset_id, timepoint, channel_name, z, x, y, priority)
+            await tile_manager.request_tile(dataset_id, timepoint, channel_name, z, x, y, priority, tile_size)
             
             # Get the tile data using ZarrTileManager - URL expiration handled internally
-            tile_data = await tile_manager.get_tile_np_data(dataset_id, timepoint, channel_name, z, x, y)
+            tile_data = await tile_manager.get_tile_np_data(dataset_id, timepoint, channel_name, z, x, y, tile_size)
             
             # Parse settings from JSON strings if provided
             try:
@@ -859,7 +893,7 @@ def get_frontend_api():
                         color = tuple(color_dict[channel_key])
                         
                         # Create an RGB image
-                        rgb_image = np.zeros((tile_manager.tile_size, tile_manager.tile_size, 3), dtype=np.uint8)
+                        rgb_image = np.zeros((tile_size, tile_size, 3), dtype=np.uint8)
                         
                         # Apply the color to each channel - using the enhanced image
                         rgb_image[..., 0] = enhanced * (color[0] / 255.0)  # R
@@ -884,7 +918,7 @@ def get_frontend_api():
             logger.error(f"Error fetching tile for timepoint: {e}")
             import traceback
             logger.error(traceback.format_exc())
-            blank_image = Image.new("L", (tile_manager.tile_size, tile_manager.tile_size), color=0)
+            blank_image = Image.new("L", (tile_size, tile_size), color=0)
             buffer = io.BytesIO()
             blank_image.save(buffer, format="PNG")
             return base64.b64encode(buffer.getvalue()).decode('utf-8')
@@ -1007,6 +1041,12 @@ async def setup_service(server, server_id="agent-lens"):
             logger.warning(f"Warning: Failed to connect AgentLensArtifactManager: {e}")
             logger.warning("Some endpoints may not function correctly.")
     
+    # Both artifact managers use the same token, so they can share pre-signed URLs
+    # and one pool of connections to the object store
+    if tile_manager.artifact_manager is not None:
+        tile_manager.artifact_manager.url_cache = artifact_manager_instance.url_cache
+        tile_manager.artifact_manager.share_http_client(artifact_manager_instance)
+    
     # Register the service
     await server.register_service(
         {
@@ -1027,6 +1067,10 @@ async def setup_service(server, server_id="agent-lens"):
     if not is_local:
         await register_service_probes(server, server_id)
 
+    async def cleanup():
+        await tile_manager.close()
+        await artifact_manager_instance.close()
+
     # Store the cleanup function in the server's config
-    server.config["cleanup"] = tile_manager.close
+    server.config["cleanup"] = cleanup
  
\ No newline at end of file
@@ -12,7 +12,10 @@ import os
 import base64
 from datetime import datetime
 import uuid
+import time
 from dotenv import find_dotenv, load_dotenv
+from agent_lens.embedding_cache import EmbeddingCache
+from agent_lens.lazy_resource import LazyResource, get_readiness
 ENV_FILE = find_dotenv()
 if ENV_FILE:
     load_dotenv(ENV_FILE)
@@ -20,9 +23,24 @@ if ENV_FILE:
 #This code defines a service for performing image similarity searches using CLIP embeddings, FAISS indexing, and a Hypha server connection. 
 # The key steps include loading vectors from an SQLite database, separating the vectors by fluorescent channel, building FAISS indices for each channel, and registering a Hypha service to handle similarity search requests. 
 
-# Load the CLIP model
+# The CLIP model is loaded on first use or by the background warm-up after registration
+MODEL_ID = "ViT-B/32"
 device = "cuda" if torch.cuda.is_available() else "cpu"
-model, preprocess = clip.load("ViT-B/32", device=device)
+clip_model = LazyResource(lambda: clip.load(MODEL_ID, device=device), name="clip")
+embedding_cache = EmbeddingCache(MODEL_ID, disk_dir=os.getenv("AGENT_LENS_EMBEDDING_CACHE_DIR"))
+
+def embed_image_bytes(image_bytes):
+    """Embed an encoded image with CLIP, reusing the cached vector of identical images."""
+    cache_key = embedding_cache.key(image_bytes)
+    vector = embedding_cache.get(cache_key)
+    if vector is None:
+        model, preprocess = clip_model.get()
+        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+        image_input = preprocess(image).unsqueeze(0).to(device)
+        with torch.no_grad():
+            vector = model.encode_image(image_input).cpu().numpy().flatten().astype(np.float32)
+        embedding_cache.put(cache_key, vector)
+    return vector
 
 # Connect to the SQLite database
 def get_db_connection():
@@ -117,16 +135,10 @@ def build_faiss_index(vectors):
     index.add(vectors.astype(np.float32))
     return index
 
-# Load vectors and build FAISS index based on the channel
-image_ids, image_vectors, image_paths, image_channels = load_vectors_from_db()
-print(f"Loaded {len(image_ids)} image vectors")
-if len(image_vectors) > 0:
-    print(f"Image vector shape: {image_vectors[0].shape}")
-else:
-    print("No images found in database")
-
-# Initialize FAISS index
-index = build_faiss_index(image_vectors)
+# The image vectors and FAISS indices are loaded by image_index on first use
+image_ids, image_vectors, image_paths, image_channels = [], np.array([]), {}, {}
+index = None
+channel_indices = {}
 
 """
 Precompute separate FAISS indices for each channel at the time of building the indices.
@@ -147,11 +159,22 @@ def separate_indices_by_channel(image_vectors, image_channels):
             print(f"Built index for channel: {channel}, the length of channel_vectors is {len(channel_vectors)}")
     return indices
 
-channel_indices = separate_indices_by_channel(image_vectors, image_channels)
+def load_image_index():
+    """Load the image vectors from SQLite and build the FAISS index for all images and per channel."""
+    global image_ids, image_vectors, image_paths, image_channels, index, channel_indices
+    image_ids, image_vectors, image_paths, image_channels = load_vectors_from_db()
+    index = build_faiss_index(image_vectors)
+    channel_indices = separate_indices_by_channel(image_vectors, image_channels)
+    return index
+
+image_index = LazyResource(load_image_index, name="image-index")
 
-def find_similar_images(input_image,image_data, top_k=5, index=index):
+def find_similar_images(input_image,image_data, top_k=5, index=None):
     input_image_name=image_data['name']
     try:
+        image_index.get()
+        if index is None:
+            index = globals()['index']
         channel = None
         if '-' in input_image_name:
             'image-green.png'
@@ -162,13 +185,8 @@ def find_similar_images(input_image,image_data, top_k=5, index=index):
              
             channel = input_image_name.split('-')[1].split('.')[0]
 
-        # Convert input bytes to an image
-        image = Image.open(io.BytesIO(input_image)).convert("RGB")
-
-        # Process the image
-        image_input = preprocess(image).unsqueeze(0).to(device)
-        with torch.no_grad():
-            query_vector = model.encode_image(image_input).cpu().numpy().flatten()
+        # Embed the input image
+        query_vector = embed_image_bytes(input_image)
 
         print(f"Query vector shape: {query_vector.shape}")
         
@@ -217,12 +235,8 @@ def find_similar_cells(input_cell_image, original_filename=None, top_k=5):
       if cell_vectors is None:
           return {"status": "error", "message": "No cells in database yet"}
       
-      # Process input cell image
-      image = Image.open(io.BytesIO(input_cell_image)).convert("RGB")
-      image_input = preprocess(image).unsqueeze(0).to(device)
-      
-      with torch.no_grad():
-          query_vector = model.encode_image(image_input).cpu().numpy().flatten()
+      # Embed the input cell image
+      query_vector = embed_image_bytes(input_cell_image)
           
       query_vector = query_vector.reshape(1, -1).astype(np.float32)
       
@@ -267,6 +281,7 @@ def find_similar_cells(input_cell_image, original_filename=None, top_k=5):
   
 def add_image_to_db(image_bytes, image_name, image_channel, image_folder='images'):
   try:
+      image_index.get()
       # Ensure the image folder exists
       os.makedirs(image_folder, exist_ok=True)
 
@@ -275,13 +290,8 @@ def add_image_to_db(image_bytes, image_name, image_channel, image_folder='images
       with open(image_path, 'wb') as f:
           f.write(image_bytes)
 
-      # Open and preprocess the image
-      image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-      image_input = preprocess(image).unsqueeze(0).to(device)
-
       # Compute the image embedding
-      with torch.no_grad():
-          image_vector = model.encode_image(image_input).cpu().numpy().flatten()
+      image_vector = embed_image_bytes(image_bytes)
 
       # Connect to the database and insert the new image data
       conn, c = get_db_connection()
@@ -325,10 +335,7 @@ def save_cell_image(cell_image, mask=None, annotation=""):
           f.write(cell_image)
 
       # Generate vector from image
-      image = Image.open(io.BytesIO(cell_image)).convert("RGB")
-      image_input = preprocess(image).unsqueeze(0).to(device)
-      with torch.no_grad():
-          vector = model.encode_image(image_input).cpu().numpy().flatten()
+      vector = embed_image_bytes(cell_image)
 
       # Save to database
       conn, c = get_cell_db_connection()
@@ -346,6 +353,26 @@ def save_cell_image(cell_image, mask=None, annotation=""):
       traceback.print_exc()
       return {"status": "error", "message": str(e)}
     
+startup = {}
+
+def get_status():
+    """Report "warming" until the model and image index are loaded, then "ready" (or "failed"), with load times."""
+    resources = [clip_model, image_index]
+    return {
+        "status": get_readiness(resources),
+        "resources": {resource.name: resource.get_status() for resource in resources},
+        "registration_seconds": startup.get("registration_seconds"),
+    }
+
+async def warm_up():
+    """Load the model and image index now instead of on the first request, in worker threads."""
+    resources = (clip_model, image_index)
+    results = await asyncio.gather(*[resource.warm_up() for resource in resources], return_exceptions=True)
+    for resource, result in zip(resources, results):
+        if isinstance(result, Exception):
+            print(f"Warm-up of {resource.name} failed: {result}")
+    return get_status()
+
 async def start_hypha_service(server):
     await server.register_service(
         {
@@ -360,14 +387,21 @@ async def start_hypha_service(server):
             "add_image_to_db": add_image_to_db,
             "find_similar_cells": find_similar_cells,
             "save_cell_image": save_cell_image,
+            "get_status": get_status,
+            "warm_up": warm_up,
         },
     )
 
 async def setup():
     server_url = "https://hypha.aicell.io"
     token = os.getenv("AGENT_LENS_WORKSPACE_TOKEN")
+    started = time.perf_counter()
     server = await connect_to_server({"server_url": server_url, "token": token, "workspace": "agent-lens"})
     await start_hypha_service(server)
+    startup["registration_seconds"] = time.perf_counter() - started
+    print(f"Service registered in {startup['registration_seconds']:.2f}s, warming up in the background")
+    clip_model.start_warmup()
+    image_index.start_warmup()
     print(f"Image embedding and similarity search service registered at workspace: {server.config.workspace}")
     print(f"Test it with the HTTP proxy: {server_url}/{server.config.workspace}/services/image-embedding-similarity-search")
  
@@ -4,32 +4,98 @@ that processes and stores image embeddings, and allows for searching similar ima
 """
 
 import io
+import os
+import asyncio
 import base64
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from functools import partial
 import numpy as np
-import torch
-import clip
 from PIL import Image
-from agent_lens.artifact_manager import AgentLensArtifactManager
+from agent_lens.artifact_manager import AgentLensArtifactManager, is_not_found_error
+from agent_lens.embedding_cache import EmbeddingCache
+from agent_lens.inference_executor import MicroBatchExecutor
+from agent_lens.lazy_resource import LazyResource, get_readiness
+from agent_lens.embedding_backend import create_embedding_backend, detect_torch_device
+from agent_lens.vector_index import build_vector_field, default_index_config, vector_fields_match
 
-
-class TorchConfig:
-    def __init__(self):
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        model, preprocess = clip.load("ViT-B/32", device=self.device)
-        self.model = model
-        self.preprocess = preprocess
+# Thumbnails are stored as files of the collection, named by vector ID, instead of in the index
+THUMBNAIL_FORMAT = "WEBP"
+THUMBNAIL_QUALITY = 80
+SEARCH_RETURN_FIELDS = ["annotation", "score"]
 
 
-async def try_create_collection(artifact_manager, workspace, artifact_id):
+class TorchConfig:
+    def __init__(
+        self,
+        batch_size=32,
+        preprocess_workers=None,
+        model_id="ViT-B/32",
+        embedding_cache_dir=None,
+        max_batch_wait=0.005,
+        backend=None,
+    ):
+        """
+        Args:
+            batch_size (int, optional): Number of images per forward pass in images_to_vectors.
+            preprocess_workers (int, optional): Threads decoding and preprocessing images.
+                Defaults to the number of CPUs.
+            model_id (str, optional): The CLIP model to load.
+            embedding_cache_dir (str, optional): Directory of the on-disk embedding cache.
+                Defaults to the AGENT_LENS_EMBEDDING_CACHE_DIR environment variable.
+            max_batch_wait (float, optional): Seconds the inference executor waits to
+                group concurrent requests into one forward pass.
+            backend (str, optional): The embedding backend, "torch", "onnx" or "onnx-int8".
+                Defaults to the AGENT_LENS_EMBEDDING_BACKEND environment variable or "torch".
+        """
+        self.model_id = model_id
+        self.backend_name = backend or os.environ.get("AGENT_LENS_EMBEDDING_BACKEND", "torch")
+        # Only the torch backend needs PyTorch, the ONNX backends run on CPU
+        self.device = detect_torch_device() if self.backend_name == "torch" else "cpu"
+        embedding_backend = create_embedding_backend(
+            self.backend_name, model_id, device=self.device
+        )
+        # The model is loaded on first use or by warm-up, not when the service starts
+        self.clip_model = LazyResource(
+            embedding_backend.load, name=f"{self.backend_name}-{model_id}"
+        )
+        self.batch_size = batch_size
+        self.preprocess_executor = ThreadPoolExecutor(
+            max_workers=preprocess_workers or os.cpu_count(),
+            thread_name_prefix="clip-preprocess",
+        )
+        # Backends produce slightly different vectors, so they do not share cache entries
+        self.embedding_cache = EmbeddingCache(
+            embedding_backend.cache_id,
+            disk_dir=embedding_cache_dir or os.environ.get("AGENT_LENS_EMBEDDING_CACHE_DIR"),
+        )
+        # Embedding requests from all callers share one queue and one model thread
+        self.inference_executor = MicroBatchExecutor(
+            partial(images_to_vectors, torch_config=self),
+            max_batch_size=batch_size,
+            max_wait=max_batch_wait,
+            name="clip-inference",
+        )
+
+    @property
+    def backend(self):
+        """The loaded embedding backend."""
+        return self.clip_model.get()
+
+
+async def try_create_collection(artifact_manager, workspace, artifact_id, index_config=None):
     """
-    Creates a vector collection in the artifact manager for storing image embeddings.
+    Creates a vector collection in the artifact manager for storing image embeddings,
+    unless the artifact manager already knows it exists.
 
     Args:
         artifact_manager (ArtifactManager): The artifact manager instance.
         workspace (str): The workspace.
+        index_config (dict, optional): The index algorithm and parameters of the
+            vector field, see build_vector_field. Defaults to default_index_config().
     """
-    await artifact_manager.create_vector_collection(
+    await artifact_manager.ensure_vector_collection(
         workspace=workspace,
         name=artifact_id,
         manifest={
@@ -38,24 +104,44 @@ async def try_create_collection(artifact_manager, workspace, artifact_id):
         },
         config={
             "vector_fields": [
-                {
-                    "type": "VECTOR",
-                    "name": "cell_image_vector",
-                    "algorithm": "FLAT",
-                    "attributes": {
-                        "TYPE": "FLOAT32",
-                        "DIM": 512,
-                        "DISTANCE_METRIC": "COSINE",
-                    },
-                },
-                {"type": "TEXT", "name": "thumbnail"},
+                build_vector_field(index_config or default_index_config()),
                 {"type": "TAG", "name": "annotation"},
             ]
         },
-        exists_ok=True,
     )
 
 
+async def create_collection(artifact_manager, workspace, artifact_id, index_config=None):
+    """
+    Create a cell image collection with a chosen index, e.g.
+    {"algorithm": "HNSW", "M": 16, "EF_CONSTRUCTION": 200, "EF_RUNTIME": 64}.
+
+    Collections are otherwise created on first use with default_index_config().
+    An existing collection keeps its index, so creating it again with a
+    different index is an error.
+
+    Returns:
+        dict: The vector field of the collection.
+    """
+    # Validate before anything is created
+    requested = build_vector_field(index_config or default_index_config())
+    await try_create_collection(artifact_manager, workspace, artifact_id, index_config)
+    config = await artifact_manager.get_vector_collection_config(workspace, artifact_id)
+    existing = next(
+        (field for field in config.get("vector_fields", []) if field.get("name") == requested["name"]),
+        None,
+    )
+    if existing is None:
+        return requested
+    if not vector_fields_match(existing, requested):
+        raise ValueError(
+            f"Collection {artifact_id} already exists with a {existing.get('algorithm')} index "
+            f"{existing.get('attributes')}, not the requested {requested['algorithm']} index "
+            f"{requested['attributes']}; delete it first to change its index"
+        )
+    return existing
+
+
 def get_image_tensor(image_data, preprocess, device):
     """
     Convert base64 encoded image data to a tensor.
@@ -83,6 +169,8 @@ def process_image_tensor(image_tensor, model):
     Returns:
         ndarray: The image features.
     """
+    import torch
+
     with torch.no_grad():
         image_features = model.encode_image(image_tensor).cpu().numpy().flatten()
 
@@ -103,33 +191,72 @@ def image_to_vector(image_data, torch_config, length=512):
     Returns:
         ndarray: The image vector.
     """
-
-    image_tensor = get_image_tensor(
-        image_data, torch_config.preprocess, torch_config.device
-    )
+    cache_key = torch_config.embedding_cache.key(base64.b64decode(image_data))
+    cached_vector = torch_config.embedding_cache.get(cache_key)
+    if cached_vector is not None:
+        # Callers may modify the vector, which must not change the cached one
+        return cached_vector.copy()
+
+    backend = torch_config.backend
+    image = decode_base64_image(image_data)
     query_vector = (
-        process_image_tensor(image_tensor, torch_config.model)
-        .reshape(1, length)
-        .astype(np.float32)
+        backend.encode([backend.preprocess(image)]).reshape(1, length).astype(np.float32)
     )
 
+    torch_config.embedding_cache.put(cache_key, query_vector.flatten())
     return query_vector.flatten()
 
 
-def images_to_vectors(images, torch_config):
+def preprocess_image(image_data, preprocess):
+    """
+    Decode a base64 encoded image and preprocess it for CLIP.
+
+    Args:
+        image_data (str): The base64 encoded image data.
+        preprocess (function): The preprocessing function.
+
+    Returns:
+        Tensor: The preprocessed image, without a batch dimension.
+    """
+    return preprocess(decode_base64_image(image_data).convert("RGB"))
+
+
+def images_to_vectors(images, torch_config, batch_size=None):
     """
     Convert a list of images to vectors.
 
+    Cached embeddings are reused. The remaining images are decoded and
+    preprocessed in parallel, then embedded in batches with one forward pass
+    and one device-to-host transfer per batch.
+
     Args:
         images (list): A list of base64 encoded images.
-        model (Model): The model to use.
-        preprocess (function): The preprocessing function.
-        device (str): The device to use.
+        torch_config (TorchConfig): The embedding backend and cache.
+        batch_size (int, optional): Images per forward pass. Defaults to torch_config.batch_size.
 
     Returns:
         list: The image vectors.
     """
-    return [image_to_vector(image, torch_config).tolist() for image in images]
+    batch_size = batch_size or torch_config.batch_size
+    cache = torch_config.embedding_cache
+    cache_keys = [cache.key(base64.b64decode(image)) for image in images]
+    vectors = [cache.get(cache_key) for cache_key in cache_keys]
+    # Only images that are not cached go through the model
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    backend = torch_config.backend if missing else None
+    for start in range(0, len(missing), batch_size):
+        batch_indices = missing[start:start + batch_size]
+        inputs = list(
+            torch_config.preprocess_executor.map(
+                partial(preprocess_image, preprocess=backend.preprocess),
+                [images[i] for i in batch_indices],
+            )
+        )
+        features = backend.encode(inputs)
+        for i, vector in zip(batch_indices, features.astype(np.float32)):
+            cache.put(cache_keys[i], vector)
+            vectors[i] = vector
+    return [vector.tolist() for vector in vectors]
 
 
 def decode_base64_image(image_data):
@@ -145,33 +272,164 @@ def decode_base64_image(image_data):
     return Image.open(io.BytesIO(base64.b64decode(image_data)))
 
 
-def make_thumbnail(image_data, size=(256, 256)):
+def make_thumbnail(image_data, size=(256, 256), image_format=THUMBNAIL_FORMAT):
     """
     Create a thumbnail from an image.
 
     Args:
         image_data (str): Base64 encoded image data.
         size (tuple): The size of the thumbnail.
+        image_format (str): The lossy format of the thumbnail, "WEBP" or "JPEG".
 
     Returns:
-        str: The base64-encoded thumbnail.
+        bytes: The encoded thumbnail.
     """
     image = decode_base64_image(image_data).convert("RGB")
     image.thumbnail(size)
     buffered = io.BytesIO()
-    image.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    return img_str
+    image.save(buffered, format=image_format, quality=THUMBNAIL_QUALITY)
+    return buffered.getvalue()
+
+
+def thumbnail_path(vector_id, image_format=THUMBNAIL_FORMAT):
+    """Get the file path of a vector's thumbnail in its collection."""
+    return f"thumbnails/{vector_id}.{image_format.lower()}"
+
+
+async def get_thumbnails(artifact_manager, workspace, artifact_id, vector_ids):
+    """
+    Fetch the thumbnails of search results in one call.
+
+    Args:
+        vector_ids (list): IDs of the vectors, as returned by the search.
+
+    Returns:
+        dict: The base64 encoded thumbnail of each vector ID, or None if it has none.
+    """
+    files = await artifact_manager.get_files(
+        workspace, artifact_id, [thumbnail_path(vector_id) for vector_id in vector_ids]
+    )
+    thumbnails = {}
+    for vector_id in vector_ids:
+        content = files[thumbnail_path(vector_id)]
+        thumbnails[vector_id] = base64.b64encode(content).decode() if content is not None else None
+    return thumbnails
 
 
 async def find_similar_cells(
-    artifact_manager, torch_config, search_cell_image, workspace, artifact_id, top_k=5
+    artifact_manager,
+    torch_config,
+    search_cell_image,
+    workspace,
+    artifact_id,
+    top_k=5,
+    include_thumbnails=False,
+    filters=None,
 ):
+    """
+    Find the most similar cells to a query image.
+
+    Results hold the vector ID, score and annotation. Thumbnails are fetched
+    separately with get_thumbnails, or added with `include_thumbnails`.
+
+    Args:
+        filters (dict, optional): Only search cells whose fields match, applied
+            inside the vector search, e.g. {"annotation": "mitotic"}.
+
+    Returns:
+        list: The search results, most similar first.
+    """
     await try_create_collection(artifact_manager, workspace, artifact_id)
-    query_vector = image_to_vector(search_cell_image, torch_config)
-    return await artifact_manager.search_vectors(
-        workspace, artifact_id, query_vector.tolist(), top_k
+    query_vector = await torch_config.inference_executor.submit(search_cell_image)
+    results = await search_collection(
+        artifact_manager, workspace, artifact_id, query_vector, top_k, filters
     )
+    if include_thumbnails:
+        await attach_thumbnails(artifact_manager, workspace, artifact_id, results)
+    return results
+
+
+async def find_similar_cells_batch(
+    artifact_manager,
+    torch_config,
+    images,
+    workspace,
+    artifact_id,
+    top_k=5,
+    max_concurrency=8,
+    include_thumbnails=False,
+    filters=None,
+):
+    """
+    Find the most similar cells for many query images at once.
+
+    The collection is checked once, all queries are embedded together through
+    the inference executor and the searches are sent concurrently.
+
+    Args:
+        images (list): Base64 encoded query images.
+        top_k (int, optional): The number of results per query.
+        max_concurrency (int, optional): Maximum number of searches in flight.
+        include_thumbnails (bool, optional): Add the thumbnail of every result.
+        filters (dict, optional): Field filters applied to every query, see find_similar_cells.
+
+    Returns:
+        list: The search results of each query image, in input order.
+    """
+    await try_create_collection(artifact_manager, workspace, artifact_id)
+    query_vectors = await torch_config.inference_executor.submit_many(images)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _search(query_vector):
+        async with semaphore:
+            return await search_collection(
+                artifact_manager, workspace, artifact_id, query_vector, top_k, filters
+            )
+
+    results = await asyncio.gather(*[_search(vector) for vector in query_vectors])
+    if include_thumbnails:
+        await attach_thumbnails(
+            artifact_manager,
+            workspace,
+            artifact_id,
+            [result for query_results in results for result in query_results],
+        )
+    return results
+
+
+async def attach_thumbnails(artifact_manager, workspace, artifact_id, results):
+    """Add the thumbnail of every search result, fetching each distinct vector once."""
+    vector_ids = list(dict.fromkeys(result["id"] for result in results))
+    thumbnails = await get_thumbnails(artifact_manager, workspace, artifact_id, vector_ids)
+    for result in results:
+        result["thumbnail"] = thumbnails[result["id"]]
+
+
+async def search_collection(
+    artifact_manager, workspace, artifact_id, query_vector, top_k, filters=None
+):
+    """Search a collection, creating it again if it was deleted since it was registered."""
+    try:
+        return await artifact_manager.search_vectors(
+            workspace,
+            artifact_id,
+            query_vector,
+            top_k,
+            return_fields=SEARCH_RETURN_FIELDS,
+            filters=filters,
+        )
+    except Exception as e:
+        if not is_not_found_error(e):
+            raise
+        await try_create_collection(artifact_manager, workspace, artifact_id)
+        return await artifact_manager.search_vectors(
+            workspace,
+            artifact_id,
+            query_vector,
+            top_k,
+            return_fields=SEARCH_RETURN_FIELDS,
+            filters=filters,
+        )
 
 
 async def save_cell_images(
@@ -181,37 +439,196 @@ async def save_cell_images(
     workspace,
     artifact_id,
     annotations=None,
+    embedding_chunk_size=64,
 ):
+    """
+    Embed cell images and add them with their thumbnails to a collection.
+
+    Images are embedded in chunks through the inference executor while the
+    previous chunk's vectors are added, so embedding overlaps with uploading.
+    Once all vectors are added, the thumbnails of the vectors that were added
+    are uploaded as files named by vector ID in a single stage/commit cycle.
+    Images that fail to embed or vectors that fail to be added are skipped
+    and reported.
+
+    Returns:
+        dict: The number of inserted and failed vectors, any upload errors, the
+            vector IDs in input order, the IDs that were not stored and the
+            thumbnails that failed to upload.
+    """
     await try_create_collection(artifact_manager, workspace, artifact_id)
-    cell_image_vectors = images_to_vectors(cell_images, torch_config)
     annotations = annotations or ["" for _ in range(len(cell_images))]
-    thumbnails = [make_thumbnail(cell_image) for cell_image in cell_images]
-    vector_data = zip(cell_image_vectors, annotations, thumbnails)
-    cell_vectors = [
-        {
-            "cell_image_vector": cell_image_vector,
-            "annotation": annotation,
-            "thumbnail": thumbnail,
-        }
-        for cell_image_vector, annotation, thumbnail in vector_data
-    ]
-    await artifact_manager.add_vectors(workspace, artifact_id, cell_vectors)
+    vector_ids = [str(uuid.uuid4()) for _ in cell_images]
+    result = {"inserted": 0, "failed": 0, "errors": [], "failed_ids": [], "thumbnail_errors": {}}
+    thumbnails = {}
+
+    def _make_thumbnails(images):
+        thumbnails = []
+        for image in images:
+            try:
+                thumbnails.append(make_thumbnail(image))
+            except Exception as e:
+                thumbnails.append(e)
+        return thumbnails
+
+    async def _embed_chunk(start):
+        images = cell_images[start:start + embedding_chunk_size]
+        cell_image_vectors, chunk_thumbnails = await asyncio.gather(
+            asyncio.gather(
+                *[torch_config.inference_executor.submit(image) for image in images], return_exceptions=True
+            ),
+            asyncio.to_thread(_make_thumbnails, images),
+        )
+        return start, cell_image_vectors, chunk_thumbnails
+
+    async def _store_chunk(start, cell_image_vectors, chunk_thumbnails):
+        end = start + len(cell_image_vectors)
+        vectors, chunk_thumbnail_files = [], {}
+        vector_data = zip(vector_ids[start:end], cell_image_vectors, annotations[start:end], chunk_thumbnails)
+        for vector_id, cell_image_vector, annotation, thumbnail in vector_data:
+            if isinstance(cell_image_vector, BaseException):
+                result["failed"] += 1
+                result["errors"].append(str(cell_image_vector))
+                result["failed_ids"].append(vector_id)
+                continue
+            vectors.append({"id": vector_id, "cell_image_vector": cell_image_vector, "annotation": annotation})
+            if isinstance(thumbnail, BaseException):
+                result["thumbnail_errors"][thumbnail_path(vector_id)] = str(thumbnail)
+            else:
+                chunk_thumbnail_files[thumbnail_path(vector_id)] = thumbnail
+        if not vectors:
+            return
+
+        added = await artifact_manager.add_vectors(workspace, artifact_id, vectors)
+        result["inserted"] += added["inserted"]
+        result["failed"] += added["failed"]
+        result["errors"].extend(added["errors"])
+        result["failed_ids"].extend(added["failed_ids"])
+        # Thumbnails of vectors that were not added would never be found
+        for vector_id in added["failed_ids"]:
+            chunk_thumbnail_files.pop(thumbnail_path(vector_id), None)
+        thumbnails.update(chunk_thumbnail_files)
+
+    starts = range(0, len(cell_images), embedding_chunk_size)
+    next_chunk = asyncio.create_task(_embed_chunk(starts[0])) if starts else None
+    try:
+        for i in range(len(starts)):
+            chunk = await next_chunk
+            next_chunk = asyncio.create_task(_embed_chunk(starts[i + 1])) if i + 1 < len(starts) else None
+            await _store_chunk(*chunk)
+    except BaseException:
+        if next_chunk is not None:
+            next_chunk.cancel()
+        raise
+    if thumbnails:
+        # Every stage/commit cycle creates a new artifact version, so all
+        # thumbnails go into one
+        upload = await artifact_manager.add_files(workspace, artifact_id, thumbnails)
+        result["thumbnail_errors"].update(upload["failed"])
+    return {**result, "ids": vector_ids}
+
+
+async def remove_vectors(
+    artifact_manager,
+    workspace,
+    artifact_id,
+    vector_ids=None,
+    fast_clear=True,
+    progress_callback=None,
+):
+    """
+    Remove cell vectors from a collection.
 
+    Args:
+        workspace (str): The workspace.
+        artifact_id (str): The collection name.
+        vector_ids (list, optional): The vectors to remove. Defaults to all vectors.
+        fast_clear (bool, optional): Clear all vectors by recreating the collection.
+        progress_callback (callable, optional): Called with (removed, total) while
+            removing vectors page by page.
+
+    Thumbnails of the removed vectors are removed with them. A fast clear
+    deletes the collection together with its files, thumbnails included,
+    and recreates it empty.
 
-async def remove_vectors(artifact_manager, workspace, artifact_id):
+    Returns:
+        int: The number of removed vectors, or None after a fast clear.
+    """
     await try_create_collection(artifact_manager, workspace, artifact_id)
-    await artifact_manager.remove_vectors(workspace, artifact_id)
+    if vector_ids is None and not fast_clear:
+        # The IDs are needed to find the thumbnails
+        vector_ids = await artifact_manager.list_vector_ids(workspace, artifact_id)
+    removed = await artifact_manager.remove_vectors(
+        workspace,
+        artifact_id,
+        vector_ids=vector_ids,
+        fast_clear=fast_clear,
+        progress_callback=progress_callback,
+    )
+    if vector_ids:
+        await artifact_manager.remove_files(
+            workspace, artifact_id, [thumbnail_path(vector_id) for vector_id in vector_ids]
+        )
+    return removed
+
+
+def get_inference_metrics(torch_config):
+    """
+    Get the metrics of the embedding inference executor and cache.
+
+    Returns:
+        dict: Queue depth, batch size and per-stage latencies of the executor,
+            and the hit/miss counts of the embedding cache.
+    """
+    return {
+        **torch_config.inference_executor.get_metrics(),
+        "embedding_cache": torch_config.embedding_cache.get_stats(),
+    }
+
+
+def get_status(torch_config, startup):
+    """
+    Get the readiness of the service.
+
+    Returns:
+        dict: "warming" until the model is loaded, then "ready" (or "failed"),
+            with the registration and model load times in seconds.
+    """
+    return {
+        "status": get_readiness([torch_config.clip_model]),
+        "model": torch_config.clip_model.get_status(),
+        "registration_seconds": startup.get("registration_seconds"),
+    }
+
+
+async def warm_up(torch_config, startup):
+    """
+    Load the model now instead of on the first request.
+
+    Returns:
+        dict: The readiness of the service after loading.
+    """
+    await torch_config.clip_model.warm_up()
+    return get_status(torch_config, startup)
 
 
 async def setup_service(server, service_id="similarity-search"):
     """
     Set up the similarity search service.
 
+    The service is registered before the model is loaded, and the model is
+    warmed up in the background afterwards.
+
     Args:
         server (Server): The server instance.
     """
+    started = time.perf_counter()
+    startup = {}
     artifact_manager = AgentLensArtifactManager()
     await artifact_manager.connect_server(server)
+    # Searches are served from local mirrors of the collections when a mirror directory is configured
+    artifact_manager.vector_mirror_dir = os.environ.get("AGENT_LENS_VECTOR_MIRROR_DIR")
+    artifact_manager.mirror_vectors = artifact_manager.vector_mirror_dir is not None
     torch_config = TorchConfig()
 
     await server.register_service(
@@ -221,11 +638,24 @@ async def setup_service(server, service_id="similarity-search"):
             "find_similar_cells": partial(
                 find_similar_cells, artifact_manager, torch_config
             ),
+            "find_similar_cells_batch": partial(
+                find_similar_cells_batch, artifact_manager, torch_config
+            ),
             "save_cell_images": partial(
                 save_cell_images, artifact_manager, torch_config
             ),
+            "get_thumbnails": partial(get_thumbnails, artifact_manager),
             "remove_vectors": partial(remove_vectors, artifact_manager),
+            "create_collection": partial(create_collection, artifact_manager),
+            "get_inference_metrics": partial(get_inference_metrics, torch_config),
+            "get_status": partial(get_status, torch_config, startup),
+            "warm_up": partial(warm_up, torch_config, startup),
         }
     )
+    startup["registration_seconds"] = time.perf_counter() - started
+    torch_config.clip_model.start_warmup()
 
-    print("Similarity search service registered successfully.")
+    print(
+        "Similarity search service registered successfully in "
+        f"{startup['registration_seconds']:.2f}s, warming up the model in the background."
+    )
@@ -0,0 +1,165 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+import pytest
+from agent_lens.artifact_cache import MetadataCache, PresignedUrlCache, SortedListingIndex, parse_presigned_url_expiry
+from agent_lens.artifact_manager import AgentLensArtifactManager
+
+
+def _presigned_url(signed_at, expires_in):
+    amz_date = datetime.fromtimestamp(signed_at, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return (
+        "https://s3.example.com/bucket/t0/A.zip?X-Amz-Algorithm=AWS4-HMAC-SHA256"
+        f"&X-Amz-Date={amz_date}&X-Amz-Expires={expires_in}&X-Amz-Signature=abc"
+    )
+
+
+class TestPresignedUrlCache:
+    @staticmethod
+    def test_parse_expiry():
+        signed_at = int(time.time()) - 1800
+        assert parse_presigned_url_expiry(_presigned_url(signed_at, 3600)) == signed_at + 3600
+        assert parse_presigned_url_expiry("https://example.com/a?Expires=1700000000") == 1700000000
+        assert parse_presigned_url_expiry("https://example.com/a", default_ttl=60, now=1000) == 1060
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_lookup():
+        cache = PresignedUrlCache()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return _presigned_url(time.time(), 3600)
+
+        urls = await asyncio.gather(*[cache.get("ws/ds", "t0/A.zip", fetch) for _ in range(10)])
+        assert len(set(urls)) == 1
+        assert len(calls) == 1
+        assert await cache.get("ws/ds", "t0/A.zip", fetch) == urls[0]
+        assert cache.get_stats() == {"hits": 1, "misses": 1, "coalesced": 9, "size": 1}
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_urls_close_to_expiry_are_refreshed():
+        cache = PresignedUrlCache(expiry_buffer=300)
+        urls = iter([
+            # Signed almost an hour ago, so only 200s are left
+            _presigned_url(time.time() - 3400, 3600),
+            _presigned_url(time.time(), 3600),
+        ])
+
+        async def fetch():
+            return next(urls)
+
+        first = await cache.get("ws/ds", "t0/A.zip", fetch)
+        second = await cache.get("ws/ds", "t0/A.zip", fetch)
+        assert first != second
+        assert await cache.get("ws/ds", "t0/A.zip", fetch) == second
+
+        cache.invalidate("ws/ds")
+        assert cache.get_stats()["size"] == 0
+
+
+class FakeListingService:
+    """Stand-in for the artifact manager service counting listing calls.
+
+    Like hypha, a listing is truncated to `limit` entries.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.files = {None: [{"type": "directory", "name": "t0"}], "t0": [{"type": "file", "name": "A.zip", "size": 1}]}
+
+    async def list_files(self, artifact_id, dir_path=None, limit=1000):
+        self.calls += 1
+        return list(self.files[dir_path][:limit])
+
+
+class TestMetadataCache:
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_stale_entries_are_served_while_refreshing():
+        cache = MetadataCache(default_ttl=0.05, stale_ttl=10)
+        values = iter(["v1", "v2"])
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            return next(values)
+
+        assert await cache.get("key", fetch) == "v1"
+        assert await cache.get("key", fetch) == "v1"
+        await asyncio.sleep(0.06)
+        # Stale: the old value comes back at once and a refresh runs in the background
+        assert await cache.get("key", fetch) == "v1"
+        await asyncio.sleep(0.02)
+        assert await cache.get("key", fetch) == "v2"
+        stats = cache.get_stats()
+        assert (stats["misses"], stats["hits"], stats["stale_hits"], stats["refreshes"]) == (1, 2, 1, 1)
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_artifact_manager_listings_are_cached_and_invalidated():
+        artifact_manager = AgentLensArtifactManager()
+        svc = FakeListingService()
+        artifact_manager._svc = svc
+        for _ in range(3):
+            assert await artifact_manager.list_subfolders("ws/ds") == [{"type": "directory", "name": "t0"}]
+            assert (await artifact_manager.get_file_details("ws/ds", "t0/A.zip"))["size"] == 1
+        assert svc.calls == 2
+
+        svc.files["t0"] = [{"type": "file", "name": "A.zip", "size": 2}]
+        artifact_manager.invalidate_metadata("ws/ds")
+        assert (await artifact_manager.get_file_details("ws/ds", "t0/A.zip"))["size"] == 2
+        assert svc.calls == 3
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_listings_longer_than_one_server_page_are_complete():
+        artifact_manager = AgentLensArtifactManager()
+        svc = FakeListingService()
+        svc.files["t0"] = [{"type": "file", "name": f"fov_{i:05d}.png"} for i in range(4500)]
+        artifact_manager._svc = svc
+        assert len(await artifact_manager.list_files("ws/ds", "t0")) == 4500
+        page = await artifact_manager.list_directory_page("ws/ds", "t0", offset=4490, limit=20)
+        assert page["total"] == 4500
+        assert [item["name"] for item in page["items"]] == [f"fov_{i:05d}.png" for i in range(4490, 4500)]
+        # 1000, 4000 and 16000 entries were requested
+        assert svc.calls == 3
+
+
+class TestSortedListingIndex:
+    @staticmethod
+    def _listing():
+        files = [{"type": "file", "name": f"fov_{i:04d}.png"} for i in range(250)]
+        files += [{"type": "file", "name": "notes.txt"}]
+        dirs = [{"type": "directory", "name": name} for name in ("t1", "fov_dir", "t0")]
+        return files[::-1] + dirs
+
+    @staticmethod
+    def test_cursor_pages_cover_the_sorted_listing():
+        index = SortedListingIndex(TestSortedListingIndex._listing())
+        names, cursor = [], None
+        while True:
+            page = index.page(cursor=cursor, limit=40)
+            assert page["total"] == 254
+            names += [item["name"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert names[:3] == ["fov_dir", "t0", "t1"]
+        assert names[3:] == sorted(names[3:])
+        assert len(names) == 254
+        assert [item["name"] for item in index.page(offset=3, limit=2)["items"]] == ["fov_0000.png", "fov_0001.png"]
+
+    @staticmethod
+    def test_prefix_filter_spans_directories_and_files():
+        index = SortedListingIndex(TestSortedListingIndex._listing())
+        page = index.page(limit=3, prefix="fov_")
+        assert page["total"] == 251
+        assert [item["name"] for item in page["items"]] == ["fov_dir", "fov_0000.png", "fov_0001.png"]
+        last = index.page(limit=10, prefix="fov_02", cursor=index.encode_cursor((1, "fov_0245.png")))
+        assert [item["name"] for item in last["items"]] == [f"fov_{i:04d}.png" for i in range(246, 250)]
+        assert last["next_cursor"] is None
+        with pytest.raises(ValueError):
+            index.page(cursor="not-a-cursor")
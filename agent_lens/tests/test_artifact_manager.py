@@ -0,0 +1,752 @@
+import asyncio
+import json
+import httpx
+import numpy as np
+import pytest
+from aiohttp import web
+from hypha_rpc.rpc import RemoteException
+from agent_lens.artifact_manager import AgentLensArtifactManager
+
+
+class FakeArtifactService:
+    """Minimal stand-in for the artifact manager service, handing out URLs of a local server."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    async def get_file(self, artifact_id, file_path):
+        return f"{self.base_url}/{file_path}"
+
+
+class TestArtifactManagerHTTP:
+    @staticmethod
+    async def _serve(files, failures=0):
+        """
+        Serve in-memory files, failing the first `failures` requests with a 503.
+
+        The client address of every request is recorded, so tests can count the
+        TCP connections the server actually accepted.
+        """
+        state = {"failures": failures, "requests": 0, "peers": set()}
+
+        async def handler(request):
+            state["requests"] += 1
+            state["peers"].add(request.transport.get_extra_info("peername"))
+            if state["failures"] > 0:
+                state["failures"] -= 1
+                return web.Response(status=503)
+            path = request.match_info["path"]
+            if path not in files:
+                return web.Response(status=404)
+            return web.Response(body=files[path])
+
+        app = web.Application()
+        app.router.add_get("/{path:.*}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return runner, f"http://127.0.0.1:{port}", state
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_file_downloads_reuse_connections():
+        runner, base_url, state = await TestArtifactManagerHTTP._serve({"a.bin": b"a" * 1000, "b.bin": b"b" * 10})
+        artifact_manager = AgentLensArtifactManager()
+        artifact_manager._svc = FakeArtifactService(base_url)
+        try:
+            for _ in range(3):
+                assert await artifact_manager.get_file("ws", "coll", "a.bin") == b"a" * 1000
+                assert await artifact_manager.get_file("ws", "coll", "b.bin") == b"b" * 10
+            # All six requests arrived over the one TCP connection the server accepted
+            assert state["requests"] == 6
+            assert len(state["peers"]) == 1
+            stats = artifact_manager.get_http_stats()
+            assert stats["requests"] == 6
+            assert stats["new_connections"] == 1
+            assert stats["reused_connections"] == 5
+        finally:
+            await artifact_manager.close()
+            await runner.cleanup()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_managers_can_share_one_client():
+        runner, base_url, state = await TestArtifactManagerHTTP._serve({"a.bin": b"a" * 1000})
+        owner = AgentLensArtifactManager()
+        owner._svc = FakeArtifactService(base_url)
+        tiles = AgentLensArtifactManager()
+        tiles._svc = FakeArtifactService(base_url)
+        tiles.share_http_client(owner)
+        try:
+            assert await owner.get_file("ws", "coll", "a.bin") == b"a" * 1000
+            assert await tiles.get_file("ws", "coll", "a.bin") == b"a" * 1000
+            assert tiles.http_client is owner.http_client
+            stats = owner.get_http_stats()
+            assert stats["requests"] == 2
+            # The second manager reused the connection the first one opened
+            assert len(state["peers"]) == 1
+            assert stats["new_connections"] == 1
+            assert tiles.get_http_stats() == stats
+
+            await tiles.close()
+            assert not owner.http_client.is_closed
+        finally:
+            await owner.close()
+            await runner.cleanup()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_transient_errors_are_retried():
+        runner, base_url, state = await TestArtifactManagerHTTP._serve({"a.bin": b"data"}, failures=2)
+        artifact_manager = AgentLensArtifactManager(retry_backoff=0.01)
+        artifact_manager._svc = FakeArtifactService(base_url)
+        try:
+            assert await artifact_manager.get_file("ws", "coll", "a.bin") == b"data"
+            assert state["requests"] == 3
+            assert artifact_manager.get_http_stats()["retries"] == 2
+
+            # Client errors are not retried
+            with pytest.raises(httpx.HTTPStatusError):
+                await artifact_manager.get_file("ws", "coll", "missing.bin")
+            assert state["requests"] == 4
+
+            files = await artifact_manager.get_files("ws", "coll", ["a.bin", "missing.bin"])
+            assert files == {"a.bin": b"data", "missing.bin": None}
+        finally:
+            await artifact_manager.close()
+            await runner.cleanup()
+
+
+class TestArtifactManagerDownload:
+    @staticmethod
+    async def _serve_file(path, broken_ranges=None):
+        """
+        Serve a file with HTTP range support, recording the Range header of every request.
+        The first request for each of `broken_ranges` drops the connection halfway through the body.
+        """
+        ranges = []
+        broken_ranges = set(broken_ranges or ())
+
+        async def handler(request):
+            ranges.append(request.headers.get("Range"))
+            if request.headers.get("Range") in broken_ranges:
+                broken_ranges.discard(request.headers["Range"])
+                start, end = map(int, request.headers["Range"][len("bytes="):].split("-"))
+                response = web.StreamResponse(status=206, headers={
+                    "Content-Range": f"bytes {start}-{end}/{path.stat().st_size}",
+                    "Content-Length": str(end - start + 1),
+                })
+                await response.prepare(request)
+                await response.write(path.read_bytes()[start:start + (end - start + 1) // 2])
+                request.transport.close()
+                return response
+            return web.FileResponse(path)
+
+        app = web.Application()
+        app.router.add_get("/{path:.*}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return runner, f"http://127.0.0.1:{port}", ranges
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_parallel_download_resumes_missing_ranges(tmp_path):
+        content = np.random.bytes(10_000)
+        source = tmp_path / "source.bin"
+        source.write_bytes(content)
+        runner, base_url, ranges = await TestArtifactManagerDownload._serve_file(source)
+        artifact_manager = AgentLensArtifactManager()
+        artifact_manager._svc = FakeArtifactService(base_url)
+        artifact_manager.parallel_download_threshold = 4096
+        artifact_manager.download_part_size = 3000
+        local_path = tmp_path / "local.bin"
+        try:
+            # Simulate an interrupted download where only the second range finished
+            part_path = tmp_path / "local.bin.part"
+            part_path.write_bytes(b"\0" * 3000 + content[3000:6000] + b"\0" * 4000)
+            (tmp_path / "local.bin.part.progress").write_text(
+                json.dumps({"size": 10_000, "part_size": 3000, "completed": [3000]})
+            )
+
+            await artifact_manager.download_file("ds", "source.bin", str(local_path))
+            assert local_path.read_bytes() == content
+            assert sorted(ranges[1:]) == ["bytes=0-2999", "bytes=6000-8999", "bytes=9000-9999"]
+            assert not part_path.exists()
+            assert not (tmp_path / "local.bin.part.progress").exists()
+        finally:
+            await artifact_manager.close()
+            await runner.cleanup()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_parallel_download_fails_cleanly_when_a_range_breaks(tmp_path):
+        content = np.random.bytes(10_000)
+        source = tmp_path / "source.bin"
+        source.write_bytes(content)
+        runner, base_url, ranges = await TestArtifactManagerDownload._serve_file(
+            source, broken_ranges={"bytes=3000-5999"}
+        )
+        artifact_manager = AgentLensArtifactManager(max_retries=0)
+        artifact_manager._svc = FakeArtifactService(base_url)
+        artifact_manager.parallel_download_threshold = 4096
+        artifact_manager.download_part_size = 3000
+        local_path = tmp_path / "local.bin"
+        try:
+            with pytest.raises(httpx.TransportError):
+                await artifact_manager.download_file("ds", "source.bin", str(local_path))
+            assert not local_path.exists()
+            progress = json.loads((tmp_path / "local.bin.part.progress").read_text())
+            assert 3000 not in progress["completed"]
+
+            # The retry only fetches the ranges that did not complete
+            ranges.clear()
+            done = set(progress["completed"])
+            await artifact_manager.download_file("ds", "source.bin", str(local_path))
+            assert local_path.read_bytes() == content
+            expected = {f"bytes={start}-{min(start + 3000, 10_000) - 1}" for start in range(0, 10_000, 3000)}
+            assert set(ranges[1:]) == {r for r in expected if int(r[6:].split("-")[0]) not in done}
+        finally:
+            await artifact_manager.close()
+            await runner.cleanup()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_streaming_download_and_iterator(tmp_path):
+        content = np.random.bytes(10_000)
+        source = tmp_path / "source.bin"
+        source.write_bytes(content)
+        runner, base_url, ranges = await TestArtifactManagerDownload._serve_file(source)
+        artifact_manager = AgentLensArtifactManager()
+        artifact_manager._svc = FakeArtifactService(base_url)
+        local_path = tmp_path / "local.bin"
+        try:
+            (tmp_path / "local.bin.part").write_bytes(content[:4000])
+            await artifact_manager.download_file("ds", "source.bin", str(local_path))
+            assert local_path.read_bytes() == content
+            assert ranges[-1] == "bytes=4000-"
+
+            chunks = [chunk async for chunk in artifact_manager.get_file_stream("ws", "coll", "source.bin", chunk_size=1024)]
+            assert len(chunks) > 1
+            assert b"".join(chunks) == content
+        finally:
+            await artifact_manager.close()
+            await runner.cleanup()
+
+
+class FakeUploadService:
+    """Stand-in for the artifact manager service that accepts uploads on a local server.
+
+    Like hypha, every commit creates a new version that only keeps the files of
+    the previous version when it was staged with `copy_files=True`, a path is
+    staged when its upload URL is issued, and a commit fails if a staged path
+    has no uploaded object.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.objects = {}
+        self.staged = None
+        self.commits = 0
+
+    async def edit(self, artifact_id, version=None, copy_files=None):
+        if version == "stage" and self.staged is None:
+            self.staged = dict(self.objects) if copy_files else {}
+
+    async def commit(self, artifact_id):
+        for file_path, content in self.staged.items():
+            if content is None:
+                raise FileNotFoundError(f"File '{file_path}' does not exist in the artifact.")
+        self.objects, self.staged = self.staged, None
+        self.commits += 1
+
+    async def put_file(self, artifact_id, file_path, download_weight=0):
+        self.staged.setdefault(file_path, None)
+        return f"{self.base_url}/object/{file_path}"
+
+    async def remove_file(self, artifact_id, file_path):
+        if file_path.startswith("locked"):
+            raise PermissionError(file_path)
+        self.staged.pop(file_path, None)
+
+
+class TestArtifactManagerUpload:
+    @staticmethod
+    async def _serve(svc_factory, failures=0):
+        """Accept PUTs of whole objects, failing the first `failures` of them with a 503."""
+        state = {"svc": None, "requests": 0}
+
+        async def put_object(request):
+            if request.match_info["path"].startswith("forbidden"):
+                return web.Response(status=403)
+            body = await request.read()
+            state["requests"] += 1
+            if state["requests"] <= failures:
+                return web.Response(status=503)
+            state["svc"].staged[request.match_info["path"]] = body
+            return web.Response()
+
+        app = web.Application(client_max_size=2**24)
+        app.router.add_put("/object/{path:.*}", put_object)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        state["svc"] = svc_factory(f"http://127.0.0.1:{port}")
+        return runner, state
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_file_upload_is_streamed_and_retried(tmp_path):
+        content = np.random.bytes(3 * 2**20 + 10)
+        source = tmp_path / "channel.zip"
+        source.write_bytes(content)
+        runner, state = await TestArtifactManagerUpload._serve(FakeUploadService, failures=1)
+        artifact_manager = AgentLensArtifactManager(retry_backoff=0.01)
+        artifact_manager._svc = state["svc"]
+        progress = []
+        try:
+            await artifact_manager.upload_file(
+                "ws", "coll", str(source), "t0/channel.zip",
+                progress_callback=lambda done, total: progress.append((done, total)),
+            )
+            assert state["svc"].objects["t0/channel.zip"] == content
+            assert state["svc"].commits == 1
+            assert state["requests"] == 2
+            assert artifact_manager.http_stats["retries"] == 1
+            # Progress is reported per chunk read, and restarts with the retry
+            assert progress[-1] == (len(content), len(content))
+            assert len(progress) == 8
+        finally:
+            await artifact_manager.close()
+            await runner.cleanup()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_stream_upload_with_and_without_size():
+        content = np.random.bytes(10_000)
+
+        async def stream():
+            for i in range(0, len(content), 700):
+                yield content[i:i + 700]
+
+        runner, state = await TestArtifactManagerUpload._serve(FakeUploadService)
+        artifact_manager = AgentLensArtifactManager()
+        artifact_manager._svc = state["svc"]
+        try:
+            await artifact_manager.upload_file("ws", "coll", stream(), "a.bin", size=len(content))
+            await artifact_manager.upload_file("ws", "coll", stream(), "b.bin")
+            assert state["svc"].objects["a.bin"] == content
+            assert state["svc"].objects["b.bin"] == content
+        finally:
+            await artifact_manager.close()
+            await runner.cleanup()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_add_files_commits_once_and_reports_missing(tmp_path):
+        large = np.random.bytes(10_000)
+        (tmp_path / "large.zip").write_bytes(large)
+        runner, state = await TestArtifactManagerUpload._serve(FakeUploadService)
+        artifact_manager = AgentLensArtifactManager()
+        artifact_manager._svc = state["svc"]
+        files = {f"t0/{channel}.zip": channel.encode() * 100 for channel in ("A", "B", "C")}
+        files["t0/large.zip"] = str(tmp_path / "large.zip")
+        files["t0/gone.zip"] = str(tmp_path / "gone.zip")
+        files["forbidden/D.zip"] = b"D"
+        try:
+            report = await artifact_manager.add_files("ws", "coll", files, max_concurrency=2)
+            assert sorted(report["uploaded"]) == ["t0/A.zip", "t0/B.zip", "t0/C.zip", "t0/large.zip"]
+            assert sorted(report["failed"]) == ["forbidden/D.zip", "t0/gone.zip"]
+            assert state["svc"].commits == 1
+            assert state["svc"].objects["t0/large.zip"] == large
+            assert state["svc"].objects["t0/B.zip"] == b"B" * 100
+
+            report = await artifact_manager.remove_files("ws", "coll", ["t0/A.zip", "t0/B.zip", "locked/E.zip"])
+            assert sorted(report["removed"]) == ["t0/A.zip", "t0/B.zip"]
+            assert list(report["failed"]) == ["locked/E.zip"]
+            assert sorted(state["svc"].objects) == ["t0/C.zip", "t0/large.zip"]
+            assert state["svc"].commits == 2
+        finally:
+            await artifact_manager.close()
+            await runner.cleanup()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_files_of_earlier_commits_are_kept():
+        runner, state = await TestArtifactManagerUpload._serve(FakeUploadService)
+        artifact_manager = AgentLensArtifactManager()
+        artifact_manager._svc = state["svc"]
+        try:
+            await artifact_manager.add_files("ws", "coll", {"t0/A.zip": b"A"})
+            await artifact_manager.add_files("ws", "coll", {"t1/A.zip": b"B"})
+            await artifact_manager.add_file("ws", "coll", b"C", "t2/A.zip")
+            assert state["svc"].objects == {"t0/A.zip": b"A", "t1/A.zip": b"B", "t2/A.zip": b"C"}
+            await artifact_manager.remove_files("ws", "coll", ["t1/A.zip"])
+            assert state["svc"].objects == {"t0/A.zip": b"A", "t2/A.zip": b"C"}
+            assert state["svc"].commits == 4
+        finally:
+            await artifact_manager.close()
+            await runner.cleanup()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_failed_uploads_are_unstaged_before_commit():
+        runner, state = await TestArtifactManagerUpload._serve(FakeUploadService)
+        artifact_manager = AgentLensArtifactManager(max_retries=0)
+        artifact_manager._svc = state["svc"]
+        try:
+            # The upload URL is issued, then the PUT itself is rejected
+            report = await artifact_manager.add_files(
+                "ws", "coll", {"t0/A.zip": b"A", "forbidden/B.zip": b"B"}
+            )
+            assert report["uploaded"] == ["t0/A.zip"]
+            assert list(report["failed"]) == ["forbidden/B.zip"]
+            assert state["svc"].commits == 1
+            assert state["svc"].objects == {"t0/A.zip": b"A"}
+        finally:
+            await artifact_manager.close()
+            await runner.cleanup()
+
+
+class FakeVectorService:
+    """In-memory stand-in for the vector collection calls of the artifact manager service."""
+
+    def __init__(self, vector_count):
+        self.collections = {
+            "ws/agent-lens-cells": {
+                "manifest": {"name": "Cell images"},
+                "config": {"vector_fields": [{"type": "TAG", "name": "annotation"}]},
+                "vectors": [{"id": str(i)} for i in range(vector_count)],
+                "files": ["thumbnails/0.webp"],
+                "last_modified": 0,
+            }
+        }
+        self.calls = []
+        self.orphaned_files = []
+
+    async def read(self, artifact_id):
+        self.calls.append("read")
+        collection = self.collections[artifact_id]
+        return {
+            "manifest": collection["manifest"],
+            "config": collection["config"],
+            "last_modified": collection["last_modified"],
+        }
+
+    async def delete(self, artifact_id, delete_files=False):
+        self.calls.append("delete")
+        collection = self.collections.pop(artifact_id)
+        if not delete_files:
+            self.orphaned_files.extend(collection.get("files", []))
+
+    async def create(self, alias, type, manifest, config, overwrite=False):
+        self.calls.append("create")
+        self.collections[alias] = {
+            "manifest": manifest, "config": config, "vectors": [], "files": [], "last_modified": 0
+        }
+
+    async def list_vectors(self, artifact_id, offset=0, limit=10, return_fields=None, pagination=False):
+        self.calls.append("list_vectors")
+        vectors = self.collections[artifact_id]["vectors"]
+        items = vectors[offset:offset + limit]
+        return {"items": items, "total": len(vectors)} if pagination else items
+
+    async def remove_vectors(self, artifact_id, ids):
+        self.calls.append("remove_vectors")
+        ids = set(ids)
+        collection = self.collections[artifact_id]
+        collection["vectors"] = [v for v in collection["vectors"] if v["id"] not in ids]
+        collection["last_modified"] += 1
+
+
+class FakeMirroredVectorService(FakeVectorService):
+    """FakeVectorService with random cell vectors that can be added and searched."""
+
+    def __init__(self):
+        super().__init__(0)
+        rng = np.random.default_rng(0)
+        self.collections["ws/agent-lens-cells"]["vectors"] = [
+            {"id": str(i), "cell_image_vector": rng.normal(size=512).astype(np.float32).tobytes(),
+             "annotation": f"cell {i}"}
+            for i in range(30)
+        ]
+        self.filters = None
+
+    async def add_vectors(self, artifact_id, vectors):
+        self.calls.append("add_vectors")
+        self.collections[artifact_id]["vectors"] += vectors
+        self.collections[artifact_id]["last_modified"] += 1
+
+    async def search_vectors(self, artifact_id, query, limit, return_fields=None, filters=None):
+        self.calls.append("search_vectors")
+        self.filters = filters
+        return []
+
+
+class TestArtifactManagerVectors:
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_fast_clear_recreates_collection():
+        artifact_manager = AgentLensArtifactManager()
+        artifact_manager._svc = FakeVectorService(5000)
+        assert await artifact_manager.remove_vectors("ws", "cells") is None
+        collection = artifact_manager._svc.collections["ws/agent-lens-cells"]
+        assert collection["vectors"] == []
+        assert collection["config"] == {"vector_fields": [{"type": "TAG", "name": "annotation"}]}
+        assert artifact_manager._svc.calls == ["read", "delete", "create"]
+        # The thumbnails of the cleared vectors are deleted with the collection
+        assert artifact_manager._svc.orphaned_files == []
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_paginated_removal_reports_progress():
+        artifact_manager = AgentLensArtifactManager()
+        artifact_manager._svc = FakeVectorService(2500)
+        progress = []
+
+        async def on_progress(removed, total):
+            progress.append((removed, total))
+
+        removed = await artifact_manager.remove_vectors(
+            "ws", "cells", fast_clear=False, batch_size=1000, progress_callback=on_progress
+        )
+        assert removed == 2500
+        assert artifact_manager._svc.collections["ws/agent-lens-cells"]["vectors"] == []
+        assert artifact_manager._svc.calls.count("list_vectors") == 3
+        assert artifact_manager._svc.calls.count("remove_vectors") == 3
+        assert progress[-1] == (2500, 2500)
+
+        artifact_manager._svc = FakeVectorService(10)
+        assert await artifact_manager.remove_vectors("ws", "cells", vector_ids=["1", "2"]) == 2
+        assert len(artifact_manager._svc.collections["ws/agent-lens-cells"]["vectors"]) == 8
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_add_vectors_in_bounded_batches():
+        class FlakyVectorService:
+            def __init__(self):
+                self.batches = []
+                self.failures = 1
+
+            async def add_vectors(self, artifact_id, vectors):
+                if self.failures:
+                    self.failures -= 1
+                    raise RuntimeError("connection reset")
+                self.batches.append(len(vectors))
+
+        artifact_manager = AgentLensArtifactManager(retry_backoff=0.01)
+        artifact_manager._svc = FlakyVectorService()
+
+        async def cell_vectors():
+            for i in range(1000):
+                yield {"cell_image_vector": [0.0] * 512, "annotation": str(i), "thumbnail": "x" * 1000}
+
+        # Each vector is estimated at about 5 KB, so 100 KB batches hold 19 vectors
+        result = await artifact_manager.add_vectors(
+            "ws", "cells", cell_vectors(), batch_size=50, max_batch_bytes=100_000
+        )
+        assert result == {"inserted": 1000, "failed": 0, "errors": [], "failed_ids": []}
+        assert sum(artifact_manager._svc.batches) == 1000
+        assert max(artifact_manager._svc.batches) == 19
+
+        result = await artifact_manager.add_vectors("ws", "cells", [{"annotation": "a"}] * 120, batch_size=50)
+        assert result["inserted"] == 120
+        assert artifact_manager._svc.batches[-3:] == [50, 50, 20]
+
+        # Batches that fail every attempt report the IDs of their vectors
+        artifact_manager._svc.failures = artifact_manager.max_retries + 1
+        result = await artifact_manager.add_vectors("ws", "cells", [{"id": "v0"}, {"id": "v1"}])
+        assert result["failed_ids"] == ["v0", "v1"]
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_known_collections_skip_create():
+        class SearchService:
+            def __init__(self):
+                self.creates = 0
+                self.exists = True
+
+            async def create(self, alias, type, manifest, config, overwrite=False):
+                self.creates += 1
+                self.exists = True
+
+            async def search_vectors(self, artifact_id, query, limit, return_fields=None, filters=None):
+                if not self.exists:
+                    raise KeyError(f"Artifact with ID '{artifact_id}' does not exist.")
+                return []
+
+        artifact_manager = AgentLensArtifactManager()
+        svc = artifact_manager._svc = SearchService()
+        for _ in range(3):
+            await artifact_manager.ensure_vector_collection("ws", "cells", {}, {})
+            await artifact_manager.search_vectors("ws", "cells", [0.0] * 512, 5)
+        assert svc.creates == 1
+
+        # A not-found search drops the collection from the registry
+        svc.exists = False
+        with pytest.raises(KeyError):
+            await artifact_manager.search_vectors("ws", "cells", [0.0] * 512, 5)
+        await artifact_manager.ensure_vector_collection("ws", "cells", {}, {})
+        assert svc.creates == 2
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_only_existing_collections_are_remembered_after_create_errors():
+        class FailingService:
+            def __init__(self):
+                self.error = None
+
+            async def create(self, alias, type, manifest, config, overwrite=False):
+                raise RemoteException(self.error)
+
+        artifact_manager = AgentLensArtifactManager()
+        svc = artifact_manager._svc = FailingService()
+        svc.error = "PermissionError: Permission denied for workspace ws"
+        with pytest.raises(RemoteException):
+            await artifact_manager.ensure_vector_collection("ws", "cells", {}, {})
+        assert not artifact_manager._known_collections
+
+        svc.error = "Artifact with alias 'ws/agent-lens-cells' already exists."
+        await artifact_manager.ensure_vector_collection("ws", "cells", {}, {})
+        assert artifact_manager._known_collections == {"ws/agent-lens-cells"}
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_searches_served_from_local_mirror(tmp_path):
+        artifact_manager = AgentLensArtifactManager()
+        artifact_manager.vector_mirror_dir = str(tmp_path)
+        svc = artifact_manager._svc = FakeMirroredVectorService()
+        mirror = await artifact_manager.load_vector_mirror("ws", "cells", page_size=8)
+        assert len(mirror) == 30
+
+        query = np.frombuffer(svc.collections["ws/agent-lens-cells"]["vectors"][4]["cell_image_vector"], np.float32)
+        results = await artifact_manager.search_vectors("ws", "cells", query.tolist(), 3)
+        assert results[0]["id"] == "4"
+        assert "search_vectors" not in svc.calls
+
+        # Writes through the manager are mirrored
+        await artifact_manager.add_vectors(
+            "ws", "cells", [{"id": "new", "cell_image_vector": [1.0] * 512, "annotation": "new"}]
+        )
+        await artifact_manager.remove_vectors("ws", "cells", ["4"])
+        results = await artifact_manager.search_vectors("ws", "cells", [1.0] * 512, 3)
+        assert results[0]["id"] == "new"
+        assert "4" not in [r["id"] for r in await artifact_manager.search_vectors("ws", "cells", query, 3)]
+
+        # Tag filters are applied in the mirror, filters on fields it does not keep go to the collection
+        results = await artifact_manager.search_vectors(
+            "ws", "cells", query, 5, filters={"annotation": "cell 7"}
+        )
+        assert [r["id"] for r in results] == ["7"]
+        assert "search_vectors" not in svc.calls
+        await artifact_manager.search_vectors("ws", "cells", query, 5, filters={"plate": "p1"})
+        assert svc.filters == {"plate": "p1"}
+        svc.calls.clear()
+
+        # A stale mirror falls back to the collection
+        mirror.mark_stale()
+        assert await artifact_manager.search_vectors("ws", "cells", query, 3) == []
+        assert "search_vectors" in svc.calls
+
+        # A persisted mirror that was written to after its export is exported again
+        async def restart():
+            await artifact_manager.close()
+            svc.calls.clear()
+            restarted = AgentLensArtifactManager()
+            restarted.vector_mirror_dir = str(tmp_path)
+            restarted._svc = svc
+            assert len(await restarted.load_vector_mirror("ws", "cells", page_size=8)) == 30
+            return restarted
+
+        artifact_manager = await restart()
+        assert svc.calls.count("list_vectors") == 4
+        # The persisted mirror is reused while the collection is unchanged
+        artifact_manager = await restart()
+        assert sorted(svc.calls) == ["list_vectors", "read"]
+        # A change that keeps the vector count still invalidates it
+        svc.collections["ws/agent-lens-cells"]["last_modified"] += 1
+        artifact_manager = await restart()
+        assert svc.calls.count("list_vectors") == 4
+        await artifact_manager.close()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_persisted_mirror_of_another_size_is_not_reused(tmp_path):
+        svc = FakeMirroredVectorService()
+
+        async def load():
+            svc.calls.clear()
+            artifact_manager = AgentLensArtifactManager()
+            artifact_manager.vector_mirror_dir = str(tmp_path)
+            artifact_manager._svc = svc
+            try:
+                return len(await artifact_manager.load_vector_mirror("ws", "cells", page_size=8))
+            finally:
+                await artifact_manager.close()
+
+        assert await load() == 30
+        # Drop vectors from the persisted mirror but keep the version it records
+        path = next(tmp_path.iterdir()) / "mirror.npz"
+        with np.load(path) as data:
+            vectors, meta = data["vectors"], json.loads(data["meta"].tobytes())
+        meta["ids"], meta["records"] = meta["ids"][:20], meta["records"][:20]
+        with open(path, "wb") as f:
+            np.savez(f, vectors=vectors[:20], meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8))
+        assert await load() == 30
+        assert svc.calls.count("list_vectors") == 4
+
+        # Same version and count, but the collection now holds vectors of another dimension
+        for vector in svc.collections["ws/agent-lens-cells"]["vectors"]:
+            vector["cell_image_vector"] = vector["cell_image_vector"][:1024]
+        with pytest.raises(ValueError, match="dimension 512"):
+            await load()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_writes_during_a_mirror_load_are_kept():
+        class SlowExportService(FakeMirroredVectorService):
+            def __init__(self):
+                super().__init__()
+                self.export_started = asyncio.Event()
+                self.release_export = asyncio.Event()
+
+            async def list_vectors(self, artifact_id, **kwargs):
+                # Export the collection as it was before the writes below
+                page = await super().list_vectors(artifact_id, **kwargs)
+                self.export_started.set()
+                await self.release_export.wait()
+                return page
+
+        artifact_manager = AgentLensArtifactManager()
+        svc = artifact_manager._svc = SlowExportService()
+        load = asyncio.create_task(artifact_manager.load_vector_mirror("ws", "cells", page_size=100))
+        await svc.export_started.wait()
+        mirror = artifact_manager.vector_mirrors["ws/agent-lens-cells"]
+        assert not mirror.is_fresh()
+
+        await artifact_manager.add_vectors(
+            "ws", "cells", [{"id": "new", "cell_image_vector": [1.0] * 512, "annotation": "new"}]
+        )
+        await artifact_manager.remove_vectors("ws", "cells", ["3"])
+        svc.release_export.set()
+        assert await load is mirror
+        assert mirror.is_fresh()
+        assert len(mirror) == 30
+        assert (await artifact_manager.search_vectors("ws", "cells", [1.0] * 512, 1))[0]["id"] == "new"
+        assert "search_vectors" not in svc.calls
+
+        # close() waits for a load it cancels
+        artifact_manager.mirror_vectors = True
+        mirror.mark_stale()
+        svc.release_export.clear()
+        await artifact_manager.search_vectors("ws", "cells", [1.0] * 512, 1)
+        load = artifact_manager._mirror_loads["ws/agent-lens-cells"]
+        await artifact_manager.close()
+        assert load.done()
+        assert not mirror.is_fresh()
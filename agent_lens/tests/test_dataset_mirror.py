@@ -0,0 +1,90 @@
+import os
+import zipfile
+import numpy as np
+import pytest
+from aiohttp import web
+from agent_lens.artifact_manager import AgentLensArtifactManager
+from agent_lens.dataset_mirror import mirror_dataset, load_manifest
+
+
+class FakeArtifactService:
+    """Minimal stand-in for the artifact manager service, serving files from a directory."""
+
+    def __init__(self, source_dir, base_url):
+        self.source_dir = source_dir
+        self.base_url = base_url
+
+    async def list_files(self, dataset_id, dir_path=None, limit=1000):
+        path = os.path.join(self.source_dir, dir_path or "")
+        items = []
+        for name in sorted(os.listdir(path)):
+            full_path = os.path.join(path, name)
+            if os.path.isdir(full_path):
+                items.append({"type": "directory", "name": name})
+            else:
+                items.append({
+                    "type": "file",
+                    "name": name,
+                    "size": os.path.getsize(full_path),
+                    "last_modified": os.path.getmtime(full_path),
+                })
+        return items[:limit]
+
+    async def get_file(self, dataset_id, file_path):
+        return f"{self.base_url}/{file_path}"
+
+
+class TestDatasetMirror:
+    @staticmethod
+    def _write_zip(path):
+        with zipfile.ZipFile(path, "w") as zf:
+            for i in range(4):
+                zf.writestr(f"scale0/0.{i}", np.random.bytes(4096))
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_mirror_resumes_and_skips_unchanged(tmp_path):
+        source_dir = tmp_path / "source"
+        (source_dir / "t0").mkdir(parents=True)
+        for channel in ("A", "B"):
+            TestDatasetMirror._write_zip(source_dir / "t0" / f"{channel}.zip")
+
+        ranges = []
+
+        async def handler(request):
+            ranges.append(request.headers.get("Range"))
+            return web.FileResponse(source_dir / request.match_info["path"])
+
+        app = web.Application()
+        app.router.add_get("/{path:.*}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        try:
+            artifact_manager = AgentLensArtifactManager()
+            artifact_manager._svc = FakeArtifactService(str(source_dir), f"http://127.0.0.1:{port}")
+            local_dir = tmp_path / "mirror"
+            dataset_dir = local_dir / "agent-lens" / "ds"
+
+            # Simulate an interrupted download of A.zip
+            (dataset_dir / "t0").mkdir(parents=True)
+            content = (source_dir / "t0" / "A.zip").read_bytes()
+            (dataset_dir / "t0" / "A.zip.part").write_bytes(content[:1000])
+
+            summary = await mirror_dataset(artifact_manager, "agent-lens/ds", str(local_dir))
+            assert sorted(summary["downloaded"]) == ["t0/A.zip", "t0/B.zip"]
+            assert not summary["failed"]
+            assert "bytes=1000-" in ranges
+            assert (dataset_dir / "t0" / "A.zip").read_bytes() == content
+            assert not (dataset_dir / "t0" / "A.zip.part").exists()
+            assert set(load_manifest(str(dataset_dir))) == {"t0/A.zip", "t0/B.zip"}
+
+            ranges.clear()
+            summary = await mirror_dataset(artifact_manager, "agent-lens/ds", str(local_dir), verify=True)
+            assert sorted(summary["skipped"]) == ["t0/A.zip", "t0/B.zip"]
+            assert ranges == []
+        finally:
+            await artifact_manager.close()
+            await runner.cleanup()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from PIL import Image
+from agent_lens.embedding_backend import (
+    CLIP_MEAN,
+    CLIP_STD,
+    _atomic_path,
+    check_accuracy_drift,
+    clip_preprocess_numpy,
+    create_embedding_backend,
+)
+
+
+class FakeBackend:
+    def __init__(self, weights):
+        self.weights = weights
+
+    @staticmethod
+    def preprocess(image):
+        return np.asarray(image, dtype=np.float32).mean(axis=(0, 1))
+
+    def encode(self, inputs):
+        return np.stack(inputs) @ self.weights
+
+
+class TestEmbeddingBackend:
+    @staticmethod
+    def test_numpy_preprocessing_matches_clip_transform():
+        image = Image.new("RGB", (400, 300), (255, 128, 0))
+        pixels = clip_preprocess_numpy(image)
+        assert pixels.shape == (3, 224, 224)
+        assert pixels.dtype == np.float32
+        expected = (np.array([255, 128, 0]) / 255.0 - CLIP_MEAN) / CLIP_STD
+        np.testing.assert_allclose(pixels[:, 112, 112], expected, rtol=1e-5)
+
+    @staticmethod
+    def test_backends_are_selected_by_name():
+        backends = [create_embedding_backend(name) for name in ("torch", "onnx", "onnx-int8")]
+        # Each backend gets its own embedding cache entries
+        assert len({backend.cache_id for backend in backends}) == 3
+        assert backends[2].model_path.endswith("ViT-B-32-int8.onnx")
+        with pytest.raises(ValueError):
+            create_embedding_backend("tensorrt")
+
+    @staticmethod
+    def test_accuracy_drift():
+        rng = np.random.default_rng(0)
+        weights = rng.normal(size=(3, 16)).astype(np.float32)
+        images = [Image.fromarray(rng.integers(0, 256, (8, 8, 3), dtype=np.uint8)) for _ in range(8)]
+        reference = FakeBackend(weights)
+
+        close = check_accuracy_drift(reference, FakeBackend(weights * 1.001), images)
+        assert close["passed"]
+        assert close["min_cosine"] == pytest.approx(1.0, abs=1e-5)
+
+        drifted = check_accuracy_drift(reference, FakeBackend(rng.normal(size=(3, 16))), images)
+        assert not drifted["passed"]
+        assert drifted["mean_cosine"] < 0.99
+
+    @staticmethod
+    def test_interrupted_export_leaves_no_partial_model(tmp_path):
+        model_path = tmp_path / "ViT-B-32.onnx"
+        with pytest.raises(RuntimeError):
+            with _atomic_path(str(model_path)) as tmp:
+                with open(tmp, "wb") as f:
+                    f.write(b"partial")
+                raise RuntimeError("export interrupted")
+        assert list(tmp_path.iterdir()) == []
+
+        with _atomic_path(str(model_path)) as tmp:
+            with open(tmp, "wb") as f:
+                f.write(b"model")
+        assert model_path.read_bytes() == b"model"
+        assert list(tmp_path.iterdir()) == [model_path]
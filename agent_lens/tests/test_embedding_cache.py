@@ -0,0 +1,29 @@
+import numpy as np
+from agent_lens.embedding_cache import EmbeddingCache
+
+
+class TestEmbeddingCache:
+    @staticmethod
+    def test_memory_lru_and_model_keys():
+        cache = EmbeddingCache("ViT-B/32", max_entries=2)
+        keys = [cache.key(f"image {i}".encode()) for i in range(3)]
+        assert EmbeddingCache("ViT-L/14").key(b"image 0") != keys[0]
+
+        for i, key in enumerate(keys):
+            cache.put(key, np.full(512, i))
+        # The least recently used vector was evicted
+        assert cache.get(keys[0]) is None
+        np.testing.assert_array_equal(cache.get(keys[2]), np.full(512, 2, dtype=np.float32))
+        assert cache.get_stats() == {"hits": 1, "disk_hits": 0, "misses": 1, "size": 2}
+
+    @staticmethod
+    def test_disk_tier_survives_restarts(tmp_path):
+        cache = EmbeddingCache("ViT-B/32", disk_dir=str(tmp_path))
+        key = cache.key(b"cell crop")
+        vector = np.random.rand(512).astype(np.float32)
+        cache.put(key, vector)
+
+        restarted = EmbeddingCache("ViT-B/32", disk_dir=str(tmp_path))
+        np.testing.assert_array_equal(restarted.get(key), vector)
+        np.testing.assert_array_equal(restarted.get(key), vector)
+        assert restarted.get_stats() == {"hits": 1, "disk_hits": 1, "misses": 0, "size": 1}
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import pytest
+from agent_lens.inference_executor import MicroBatchExecutor
+
+
+class TestMicroBatchExecutor:
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_batches():
+        batches = []
+        threads = set()
+
+        def double(items):
+            batches.append(list(items))
+            threads.add(threading.current_thread().name)
+            return [item * 2 for item in items]
+
+        executor = MicroBatchExecutor(double, max_batch_size=4, max_wait=0.05)
+        try:
+            results = await asyncio.gather(*[executor.submit(i) for i in range(10)])
+            assert results == [i * 2 for i in range(10)]
+            assert [len(batch) for batch in batches] == [4, 4, 2]
+            # The batch function never runs on the event loop thread
+            assert threading.current_thread().name not in threads
+
+            assert await executor.submit_many([20, 21]) == [40, 42]
+            metrics = executor.get_metrics()
+            assert metrics["requests"] == 12
+            assert metrics["batches"] == 4
+            assert metrics["avg_batch_size"] == 3
+            assert metrics["queue_depth"] == 0
+            assert metrics["max_queue_depth"] >= 4
+            for stage in ("queue_wait_ms", "inference_ms", "total_ms"):
+                assert set(metrics[stage]) == {"mean", "p95"}
+        finally:
+            await executor.close()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_failed_batches_only_fail_the_bad_request():
+        batches = []
+
+        def fail_on_negative(items):
+            batches.append(list(items))
+            if any(item < 0 for item in items):
+                raise ValueError("negative input")
+            return items
+
+        executor = MicroBatchExecutor(fail_on_negative, max_wait=0.05)
+        try:
+            results = await asyncio.gather(
+                executor.submit(1), executor.submit(-1), executor.submit(2), return_exceptions=True
+            )
+            assert results[0] == 1 and results[2] == 2
+            assert isinstance(results[1], ValueError)
+            # The failed batch was retried one input at a time
+            assert batches == [[1, -1, 2], [1], [-1], [2]]
+            # The worker keeps serving requests after a failed batch
+            assert await executor.submit(3) == 3
+            metrics = executor.get_metrics()
+            assert metrics["errors"] == 1
+            assert metrics["retried_batches"] == 1
+        finally:
+            await executor.close()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_result_count_must_match_the_batch():
+        executor = MicroBatchExecutor(lambda items: items[:1], max_wait=0.05)
+        try:
+            results = await asyncio.gather(executor.submit(1), executor.submit(2), return_exceptions=True)
+            # Each input alone gets exactly one result
+            assert results == [1, 2]
+            assert executor.get_metrics()["retried_batches"] == 1
+
+            executor.batch_fn = lambda items: []
+            with pytest.raises(ValueError, match="0 results for 1 inputs"):
+                await executor.submit(3)
+        finally:
+            await executor.close()
@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import pytest
+from agent_lens.lazy_resource import LazyResource, get_readiness
+
+
+class TestLazyResource:
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_background_warmup_reports_warming_then_ready():
+        release = threading.Event()
+        calls = []
+
+        def load_model():
+            calls.append(1)
+            release.wait(5)
+            return "model"
+
+        model = LazyResource(load_model, name="model")
+        ready = LazyResource(lambda: "index", name="index")
+        ready.get()
+        assert model.get_status()["state"] == "cold"
+
+        task = model.start_warmup()
+        assert get_readiness([model, ready]) == "warming"
+        # A request during warm-up waits for the same load instead of starting another
+        request = asyncio.create_task(model.warm_up())
+        await asyncio.sleep(0.05)
+        release.set()
+        await task
+        assert await request == "model"
+
+        assert len(calls) == 1
+        assert get_readiness([model, ready]) == "ready"
+        assert model.get_status()["load_seconds"] > 0
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_failed_load_is_reported_and_retried():
+        attempts = []
+
+        def flaky_loader():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("weights not found")
+            return "model"
+
+        model = LazyResource(flaky_loader, name="model")
+        await model.start_warmup()
+        assert get_readiness([model]) == "failed"
+        assert model.get_status()["error"] == "weights not found"
+
+        assert model.get() == "model"
+        assert model.get_status()["state"] == "ready"
+        assert model.get_status()["error"] is None
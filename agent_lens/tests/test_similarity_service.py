@@ -1,7 +1,9 @@
 import pytest
+import asyncio
 import base64
 import io
 import os
+from types import SimpleNamespace
 import numpy as np
 from PIL import Image
 import dotenv
@@ -11,6 +13,92 @@ from agent_lens import register_similarity_search_service
 dotenv.load_dotenv()
 
 
+class FakeExecutor:
+    """Stand-in for the inference executor, embedding an image as its position in the alphabet."""
+
+    def __init__(self, failing=()):
+        self.calls = []
+        self.failing = set(failing)
+
+    def _embed(self, image):
+        if image in self.failing:
+            raise ValueError(f"Cannot embed {image!r}")
+        return [float(ord(image[0]) - ord("a"))]
+
+    async def submit(self, image):
+        self.calls.append([image])
+        return self._embed(image)
+
+    async def submit_many(self, images):
+        self.calls.append(list(images))
+        return [self._embed(image) for image in images]
+
+
+class FakeCollectionManager:
+    """Stand-in for the artifact manager keeping vectors and files in memory."""
+
+    def __init__(self, files=None, rejected_annotation=None):
+        self.files = dict(files or {})
+        self.vectors = {}
+        self.rejected_annotation = rejected_annotation
+        self.config = None
+        self.ensure_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.file_commits = 0
+
+    async def ensure_vector_collection(self, workspace, name, manifest, config):
+        self.ensure_calls += 1
+        self.config = self.config or config
+
+    async def get_vector_collection_config(self, workspace, name):
+        return self.config
+
+    async def search_vectors(self, workspace, coll_name, vector, top_k, return_fields=None, filters=None):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # Later queries finish first, so results come back out of input order
+        await asyncio.sleep(0.01 * (10 - vector[0]))
+        self.in_flight -= 1
+        return [{"id": f"cell-{int(vector[0])}", "score": "0.0", "annotation": ""}]
+
+    async def add_vectors(self, workspace, coll_name, vectors):
+        result = {"inserted": 0, "failed": 0, "errors": [], "failed_ids": []}
+        for vector in vectors:
+            if vector["annotation"] == self.rejected_annotation:
+                result["failed"] += 1
+                result["failed_ids"].append(vector["id"])
+            else:
+                result["inserted"] += 1
+                self.vectors[vector["id"]] = vector
+        return result
+
+    async def add_files(self, workspace, coll_name, files):
+        self.file_commits += 1
+        self.files.update(files)
+        return {"uploaded": list(files), "failed": {}}
+
+    async def get_files(self, workspace, coll_name, file_paths, max_concurrency=8):
+        return {path: self.files.get(path) for path in file_paths}
+
+    async def list_vector_ids(self, workspace, coll_name):
+        return list(self.vectors)
+
+    async def remove_vectors(self, workspace, coll_name, vector_ids=None, fast_clear=True, progress_callback=None):
+        if vector_ids is None and fast_clear:
+            # Like clear_vectors, which deletes the collection with its files
+            self.vectors, self.files = {}, {}
+            return None
+        for vector_id in vector_ids:
+            self.vectors.pop(vector_id, None)
+        return len(vector_ids)
+
+    async def remove_files(self, workspace, coll_name, file_paths):
+        for path in file_paths:
+            self.files.pop(path, None)
+        return {"removed": list(file_paths), "failed": {}}
+
+
 class TestSimilaritySearchService:
     @staticmethod
     def _generate_random_image():
@@ -65,11 +153,102 @@ class TestSimilaritySearchService:
             assert "score" in result
             assert "id" in result
             assert "annotation" in result
-            assert "thumbnail" in result
+            assert "thumbnail" not in result
             assert isinstance(result["score"], str)
             assert isinstance(result["id"], str)
             assert isinstance(result["annotation"], str)
-            assert isinstance(result["thumbnail"], str)
             assert result["annotation"] in annotations
             score = float(result["score"])
             assert 0 <= score <= 1
+
+        thumbnails = await similarity_service.get_thumbnails(
+            workspace, "similarity-search-test", [result["id"] for result in results]
+        )
+        assert all(isinstance(thumbnail, str) for thumbnail in thumbnails.values())
+
+
+class TestSimilaritySearchHelpers:
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_batch_search_keeps_input_order_and_bounds_concurrency():
+        images = list("abcdefghij")
+        artifact_manager = FakeCollectionManager()
+        torch_config = SimpleNamespace(inference_executor=FakeExecutor())
+        results = await register_similarity_search_service.find_similar_cells_batch(
+            artifact_manager, torch_config, images, "ws", "cells", top_k=1, max_concurrency=3
+        )
+        assert [query_results[0]["id"] for query_results in results] == [f"cell-{i}" for i in range(10)]
+        assert artifact_manager.max_in_flight == 3
+        # The collection is checked and the images are embedded once for the whole batch
+        assert artifact_manager.ensure_calls == 1
+        assert torch_config.inference_executor.calls == [images]
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_thumbnails_are_looked_up_by_vector_id():
+        artifact_manager = FakeCollectionManager(
+            files={"thumbnails/b.webp": b"thumb-b", "thumbnails/a.webp": b"thumb-a"}
+        )
+        thumbnails = await register_similarity_search_service.get_thumbnails(
+            artifact_manager, "ws", "cells", ["a", "missing", "b", "a"]
+        )
+        assert thumbnails == {
+            "a": base64.b64encode(b"thumb-a").decode(),
+            "missing": None,
+            "b": base64.b64encode(b"thumb-b").decode(),
+        }
+
+        results = [{"id": "b"}, {"id": "missing"}, {"id": "b"}]
+        await register_similarity_search_service.attach_thumbnails(artifact_manager, "ws", "cells", results)
+        assert [result["thumbnail"] for result in results] == [thumbnails["b"], None, thumbnails["b"]]
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_saved_cells_skip_failures_and_are_removed_with_their_thumbnails():
+        image = TestSimilaritySearchService._generate_random_image()
+        images = [image, "not an image", image, image, image]
+        annotations = ["a", "b", "rejected", "d", "e"]
+        artifact_manager = FakeCollectionManager(rejected_annotation="rejected")
+        torch_config = SimpleNamespace(inference_executor=FakeExecutor(failing=["not an image"]))
+        result = await register_similarity_search_service.save_cell_images(
+            artifact_manager, torch_config, images, "ws", "cells", annotations, embedding_chunk_size=2
+        )
+        ids = result["ids"]
+        assert result["inserted"] == 3
+        assert result["failed"] == 2
+        assert result["failed_ids"] == [ids[1], ids[2]]
+        assert sorted(artifact_manager.vectors) == sorted([ids[0], ids[3], ids[4]])
+        # Only vectors that were stored get a thumbnail, all in one commit
+        assert sorted(artifact_manager.files) == sorted(f"thumbnails/{i}.webp" for i in (ids[0], ids[3], ids[4]))
+        assert artifact_manager.file_commits == 1
+        # The thumbnail of the first chunk is still readable after the last chunk
+        thumbnails = await register_similarity_search_service.get_thumbnails(artifact_manager, "ws", "cells", [ids[0]])
+        assert thumbnails[ids[0]] is not None
+
+        await register_similarity_search_service.remove_vectors(artifact_manager, "ws", "cells", [ids[0]])
+        assert sorted(artifact_manager.files) == sorted(f"thumbnails/{i}.webp" for i in (ids[3], ids[4]))
+        await register_similarity_search_service.remove_vectors(artifact_manager, "ws", "cells", fast_clear=False)
+        assert artifact_manager.vectors == {} and artifact_manager.files == {}
+
+        await register_similarity_search_service.save_cell_images(
+            artifact_manager, torch_config, [image], "ws", "cells", ["a"]
+        )
+        assert artifact_manager.files
+        assert await register_similarity_search_service.remove_vectors(artifact_manager, "ws", "cells") is None
+        assert artifact_manager.vectors == {} and artifact_manager.files == {}
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_create_collection_refuses_a_different_index():
+        artifact_manager = FakeCollectionManager()
+        hnsw = {"algorithm": "HNSW", "M": 16, "EF_RUNTIME": 64}
+        field = await register_similarity_search_service.create_collection(artifact_manager, "ws", "cells", hnsw)
+        assert field["algorithm"] == "HNSW"
+        assert field["attributes"]["M"] == 16
+        # Creating it again with the same index returns the index in effect
+        assert await register_similarity_search_service.create_collection(artifact_manager, "ws", "cells", hnsw) == field
+
+        with pytest.raises(ValueError, match="already exists with a HNSW index"):
+            await register_similarity_search_service.create_collection(
+                artifact_manager, "ws", "cells", {"algorithm": "FLAT"}
+            )
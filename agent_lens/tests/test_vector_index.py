@@ -0,0 +1,49 @@
+import pytest
+from agent_lens.benchmark_vector_index import run_benchmark
+from agent_lens.vector_index import build_vector_field, default_index_config, parse_index_config, vector_fields_match
+
+
+class TestVectorIndex:
+    @staticmethod
+    def test_vector_field_config():
+        assert build_vector_field() == {
+            "type": "VECTOR",
+            "name": "cell_image_vector",
+            "algorithm": "FLAT",
+            "attributes": {"TYPE": "FLOAT32", "DIM": 512, "DISTANCE_METRIC": "COSINE"},
+        }
+        field = build_vector_field({"algorithm": "hnsw", "m": 32, "EF_RUNTIME": 100})
+        assert field["algorithm"] == "HNSW"
+        assert field["attributes"]["M"] == 32
+        assert field["attributes"]["EF_RUNTIME"] == 100
+
+        with pytest.raises(ValueError):
+            build_vector_field({"algorithm": "IVF"})
+        with pytest.raises(ValueError):
+            build_vector_field({"algorithm": "FLAT", "M": 16})
+
+        # Stored configs may differ in case and value types
+        stored = {"type": "VECTOR", "name": "cell_image_vector", "algorithm": "hnsw",
+                  "attributes": {"type": "FLOAT32", "dim": "512", "distance_metric": "cosine", "M": "32", "EF_RUNTIME": 100}}
+        assert vector_fields_match(stored, field)
+        assert not vector_fields_match(stored, build_vector_field({"algorithm": "HNSW", "M": 16}))
+        assert not vector_fields_match(stored, build_vector_field())
+
+    @staticmethod
+    def test_index_config_from_text_and_environment(monkeypatch):
+        assert parse_index_config("HNSW:M=16,EF_CONSTRUCTION=200,EPSILON=0.01") == {
+            "algorithm": "HNSW", "M": 16, "EF_CONSTRUCTION": 200, "EPSILON": 0.01
+        }
+        assert default_index_config() == {"algorithm": "FLAT"}
+        monkeypatch.setenv("AGENT_LENS_VECTOR_INDEX", '{"algorithm": "HNSW", "M": 24}')
+        assert default_index_config() == {"algorithm": "HNSW", "M": 24}
+        monkeypatch.setenv("AGENT_LENS_VECTOR_INDEX", "HNSW:M=8")
+        assert default_index_config() == {"algorithm": "HNSW", "M": 8}
+
+    @staticmethod
+    def test_benchmark_reports_exact_recall_for_flat():
+        [(size, config, metrics)] = run_benchmark(["FLAT"], [500], num_queries=20, k=5)
+        assert (size, config) == (500, "FLAT")
+        assert metrics["recall"] == 1.0
+        assert metrics["memory_mb"] > 0
+        assert metrics["p99_ms"] >= metrics["p50_ms"]
@@ -0,0 +1,148 @@
+import numpy as np
+import pytest
+from agent_lens.vector_mirror import VectorMirror
+
+
+def _random_cells(count, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"id": f"cell-{i}", "cell_image_vector": rng.normal(size=dim).astype(np.float32), "annotation": f"a{i}"}
+        for i in range(count)
+    ]
+
+
+# Tests of both indexes take a use_hnsw argument and call _require_index first
+index_kinds = pytest.mark.parametrize("use_hnsw", [False, True], ids=["exact", "hnsw"])
+
+
+def _require_index(use_hnsw):
+    if use_hnsw:
+        pytest.importorskip("hnswlib")
+
+
+class TestVectorMirror:
+    @staticmethod
+    @index_kinds
+    def test_search_add_and_remove(use_hnsw):
+        _require_index(use_hnsw)
+        cells = _random_cells(50)
+        mirror = VectorMirror(dim=16, use_hnsw=use_hnsw)
+        mirror.load(cells)
+
+        results = mirror.search(cells[7]["cell_image_vector"], top_k=3)
+        assert results[0]["id"] == "cell-7"
+        assert results[0]["annotation"] == "a7"
+        assert float(results[0]["score"]) < 1e-5
+        assert [float(r["score"]) for r in results] == sorted(float(r["score"]) for r in results)
+        assert set(mirror.search(cells[7]["cell_image_vector"], 2, ["score"])[0]) == {"id", "score"}
+
+        mirror.remove(["cell-7"])
+        assert "cell-7" not in [r["id"] for r in mirror.search(cells[7]["cell_image_vector"], top_k=50)]
+        # Vectors come back from the vector engine as float32 bytes
+        mirror.add([{**cells[7], "cell_image_vector": cells[7]["cell_image_vector"].tobytes()}])
+        assert mirror.search(cells[7]["cell_image_vector"], top_k=1)[0]["id"] == "cell-7"
+        assert len(mirror) == 50
+
+    @staticmethod
+    def test_records_without_ids_mark_the_mirror_stale():
+        mirror = VectorMirror(dim=16, use_hnsw=False)
+        assert mirror.is_fresh()
+        mirror.add([{"cell_image_vector": np.ones(16)}])
+        assert not mirror.is_fresh()
+        assert len(mirror) == 0
+
+    @staticmethod
+    @index_kinds
+    def test_persisted_between_restarts(tmp_path, use_hnsw):
+        _require_index(use_hnsw)
+        cells = _random_cells(20)
+        mirror = VectorMirror(dim=16, path=str(tmp_path), use_hnsw=use_hnsw)
+        mirror.load(cells)
+        mirror.remove(["cell-3"])
+        mirror.save()
+
+        restarted = VectorMirror(dim=16, path=str(tmp_path), use_hnsw=use_hnsw)
+        assert restarted.load_from_disk()
+        assert len(restarted) == 19
+        query = cells[5]["cell_image_vector"]
+        assert [r["id"] for r in restarted.search(query, top_k=5)] == [r["id"] for r in mirror.search(query, top_k=5)]
+
+        # A save that did not complete leaves the previous mirror in place
+        (tmp_path / "mirror.npz.tmp").write_bytes(b"PK partial")
+        assert VectorMirror(dim=16, path=str(tmp_path), use_hnsw=use_hnsw).load_from_disk()
+        (tmp_path / "mirror.npz").write_bytes((tmp_path / "mirror.npz").read_bytes()[:100])
+        assert not VectorMirror(dim=16, path=str(tmp_path), use_hnsw=use_hnsw).load_from_disk()
+
+    @staticmethod
+    def test_hnsw_round_trip(tmp_path):
+        hnswlib = pytest.importorskip("hnswlib")
+        cells = _random_cells(300)
+        mirror = VectorMirror(dim=16, path=str(tmp_path), use_hnsw=True)
+        mirror.load(cells[:200])
+        # Grow past the initial capacity and leave holes in the labels
+        mirror.add(cells[200:])
+        mirror.remove([f"cell-{i}" for i in range(0, 300, 7)])
+        mirror.version = {"last_modified": 3, "total": 257}
+        mirror.save()
+
+        restarted = VectorMirror(dim=16, path=str(tmp_path), use_hnsw=True)
+        assert restarted.load_from_disk()
+        assert isinstance(restarted._index, hnswlib.Index)
+        assert restarted.version == {"last_modified": 3, "total": 257}
+        assert len(restarted) == len(mirror) == 257
+        for i in (1, 150, 299):
+            query = cells[i]["cell_image_vector"]
+            assert restarted.search(query, top_k=1)[0]["id"] == f"cell-{i}"
+            assert [r["id"] for r in restarted.search(query, top_k=10)] == [r["id"] for r in mirror.search(query, top_k=10)]
+        assert "cell-7" not in [r["id"] for r in restarted.search(cells[7]["cell_image_vector"], top_k=20)]
+
+    @staticmethod
+    @index_kinds
+    def test_filtered_search(use_hnsw):
+        _require_index(use_hnsw)
+        cells = _random_cells(40)
+        for i, cell in enumerate(cells):
+            cell["annotation"] = "mitotic, round" if i % 4 == 0 else "interphase"
+            cell["area"] = i * 10
+        mirror = VectorMirror(dim=16, fields=("annotation", "area"), use_hnsw=use_hnsw)
+        mirror.load(cells)
+
+        query = cells[5]["cell_image_vector"]
+        results = mirror.search(query, top_k=20, filters={"annotation": "Mitotic"})
+        assert len(results) == 10
+        assert all(int(r["id"].split("-")[1]) % 4 == 0 for r in results)
+
+        results = mirror.search(query, top_k=20, filters={"annotation": "round", "area": [100, 200]})
+        assert sorted(r["id"] for r in results) == ["cell-12", "cell-16", "cell-20"]
+
+        mirror.remove(["cell-16"])
+        assert len(mirror.search(query, top_k=20, filters={"annotation": "round", "area": [100, 200]})) == 2
+        assert mirror.search(query, filters={"annotation": "apoptotic"}) == []
+        assert not mirror.can_filter({"plate": "p1"})
+
+    @staticmethod
+    def test_writes_during_a_load_are_replayed():
+        cells = _random_cells(10)
+        mirror = VectorMirror(dim=16, use_hnsw=False)
+        mirror.begin_load()
+        assert not mirror.is_fresh()
+        mirror.add([{**cells[0], "id": "new"}])
+        mirror.remove(["cell-3"])
+        assert len(mirror) == 0
+
+        # The export was taken before the writes
+        assert mirror.load(cells)
+        mirror.version = {"total": 10}
+        mirror.finish_load()
+        assert mirror.is_fresh()
+        assert "cell-3" not in [r["id"] for r in mirror.search(cells[3]["cell_image_vector"], top_k=10)]
+        assert mirror.search(cells[0]["cell_image_vector"], top_k=2)[0]["id"] in ("cell-0", "new")
+        assert len(mirror) == 10
+        # The content no longer matches the exported version
+        assert mirror.version is None
+
+        mirror.begin_load()
+        mirror.add([{"cell_image_vector": np.ones(16)}])
+        mirror.load(cells)
+        mirror.finish_load()
+        assert not mirror.is_fresh()
@@ -0,0 +1,147 @@
+import time
+import numpy as np
+import pytest
+import zarr
+from agent_lens.artifact_manager import ZarrTileManager
+
+
+class TestZarrTileManager:
+    @staticmethod
+    def _make_tile_manager(timepoints, channels, shape=(600, 700), chunks=(256, 256), dtype=np.uint8):
+        """Create a tile manager whose Zarr group cache is pre-filled with in-memory groups."""
+        tile_manager = ZarrTileManager()
+
+        async def list_timepoints(dataset_id, start_timepoint=None, end_timepoint=None):
+            return list(timepoints)
+
+        tile_manager.list_timepoints = list_timepoints
+        for t_index, timepoint in enumerate(timepoints):
+            for c_index, channel in enumerate(channels):
+                group = zarr.group()
+                data = np.full(shape, 10 * t_index + c_index + 1, dtype=dtype)
+                group.create_dataset("scale0", data=data, chunks=chunks)
+                tile_manager.zarr_groups_cache[f"ds:{timepoint}:{channel}"] = {
+                    "group": group,
+                    "url": "",
+                    "expiry": time.time() + 3600,
+                }
+        return tile_manager
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_timeseries_region_single_channel():
+        tile_manager = TestZarrTileManager._make_tile_manager(["t0", "t1", "t2"], ["A"])
+        # Region overlaps the right edge of the image, the rest must be zero-padded
+        stack, timepoints = await tile_manager.get_timeseries_region(
+            "ds", "A", 0, 650, 500, 100, 200
+        )
+        assert timepoints == ["t0", "t1", "t2"]
+        assert stack.shape == (3, 200, 100)
+        assert list(stack[:, 0, 0]) == [1, 11, 21]
+        assert not stack[:, :, 50:].any()
+        assert not stack[:, 100:, :].any()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_iter_timeseries_region_multi_channel():
+        tile_manager = TestZarrTileManager._make_tile_manager(["t0", "t1"], ["A", "B"])
+        seen = {}
+        async for index, timepoint, data, missing in tile_manager.iter_timeseries_region(
+            "ds", ["A", "B"], 0, 0, 0, 16, 8, max_concurrency=2
+        ):
+            seen[index] = (timepoint, data)
+            assert missing == []
+        assert sorted(seen) == [0, 1]
+        assert seen[1][0] == "t1"
+        assert seen[1][1].shape == (2, 8, 16)
+        assert list(seen[1][1][:, 0, 0]) == [11, 12]
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_timeseries_keeps_dtype_when_a_timepoint_is_missing():
+        tile_manager = TestZarrTileManager._make_tile_manager(["t0", "t1", "t2"], ["A"], dtype=np.uint16)
+        for key in ("ds:t0:A", "ds:t1:A"):
+            tile_manager.zarr_groups_cache[key]["group"]["scale0"][:] = 1000
+        # The first timepoint has no data, so its zero-filled region completes first
+        del tile_manager.zarr_groups_cache["ds:t2:A"]
+        missing = {}
+        async for index, _, _, missing_channels in tile_manager.iter_timeseries_region(
+            "ds", "A", 0, 0, 0, 8, 8
+        ):
+            missing[index] = missing_channels
+        assert missing == {0: [], 1: [], 2: ["A"]}
+
+        stack, _ = await tile_manager.get_timeseries_region("ds", "A", 0, 0, 0, 8, 8)
+        assert stack.dtype == np.uint16
+        assert list(stack[:, 0, 0]) == [1000, 1000, 0]
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_multichannel_region_reports_missing_channels():
+        tile_manager = TestZarrTileManager._make_tile_manager(["t0"], ["A", "C"])
+        data, missing = await tile_manager.get_multichannel_region_np_data(
+            "ds", "t0", 0, 200, 200, 100, 100, channels=["A", "B", "C"]
+        )
+        assert data.shape == (3, 100, 100)
+        assert data.flags["C_CONTIGUOUS"]
+        assert missing == ["B"]
+        assert list(data[:, 50, 50]) == [1, 0, 2]
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_large_tile_assembled_from_chunks():
+        tile_manager = TestZarrTileManager._make_tile_manager(["t0"], ["A"], shape=(1100, 1100))
+        group = tile_manager.zarr_groups_cache["ds:t0:A"]["group"]
+        group["scale0"][:] = np.arange(1100 * 1100, dtype=np.uint32).reshape(1100, 1100) % 251
+        tile = await tile_manager.get_tile_np_data("ds", "t0", "A", 0, 1, 0, tile_size=512)
+        assert tile.shape == (512, 512)
+        np.testing.assert_array_equal(tile, group["scale0"][0:512, 512:1024])
+        # Tiles reaching past the image edge are zero-padded
+        edge_tile = await tile_manager.get_tile_np_data("ds", "t0", "A", 0, 1, 1, tile_size=1024)
+        assert edge_tile.shape == (1024, 1024)
+        np.testing.assert_array_equal(edge_tile[:76, :76], group["scale0"][1024:, 1024:])
+        assert not edge_tile[76:, :].any()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_small_tiles_reuse_decoded_chunk():
+        tile_manager = TestZarrTileManager._make_tile_manager(
+            ["t0"], ["A"], shape=(1024, 1024), chunks=(512, 512)
+        )
+        group = tile_manager.zarr_groups_cache["ds:t0:A"]["group"]
+        calls = []
+        original_decode = group["scale0"]._decode_chunk
+
+        class CountingArray:
+            """Wrap the array so every chunk decode is recorded."""
+
+            def __init__(self, array):
+                self._array = array
+
+            def __getattr__(self, name):
+                return getattr(self._array, name)
+
+            def _decode_chunk(self, cdata):
+                calls.append(1)
+                return original_decode(cdata)
+
+        counting_array = CountingArray(group["scale0"])
+
+        async def get_scale_array(dataset_id, timestamp, channel, scale):
+            return counting_array
+
+        tile_manager._get_scale_array = get_scale_array
+        for x in range(2):
+            for y in range(2):
+                tile = await tile_manager.get_tile_np_data("ds", "t0", "A", 0, x, y)
+                assert tile.shape == (256, 256)
+        assert len(calls) == 1
+
+    @staticmethod
+    def test_validate_tile_size():
+        tile_manager = ZarrTileManager()
+        assert tile_manager.validate_tile_size(None) == 256
+        assert tile_manager.validate_tile_size(1024) == 1024
+        for bad_size in (0, 300, 4096):
+            with pytest.raises(ValueError):
+                tile_manager.validate_tile_size(bad_size)
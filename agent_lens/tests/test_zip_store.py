@@ -0,0 +1,110 @@
+import time
+import aiohttp
+import numpy as np
+import pytest
+import zarr
+from aiohttp import web
+from agent_lens.artifact_manager import ZarrTileManager
+from agent_lens.zip_store import HTTPZipStore, MmapZipStore
+
+
+class TestHTTPZipStore:
+    @staticmethod
+    def _write_zarr_zip(path, shape=(700, 900), chunks=(256, 256)):
+        data = (np.arange(shape[0] * shape[1], dtype=np.uint32).reshape(shape) % 253).astype(np.uint8)
+        with zarr.ZipStore(str(path), mode="w") as store:
+            root = zarr.group(store=store)
+            root.create_dataset("scale0", data=data, chunks=chunks)
+        return data
+
+    @staticmethod
+    async def _serve(path):
+        """Serve a file with HTTP range support, counting the requests made."""
+        requests = []
+
+        async def handler(request):
+            requests.append(request.headers.get("Range"))
+            return web.FileResponse(path)
+
+        app = web.Application()
+        app.router.add_get("/data.zip", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return runner, f"http://127.0.0.1:{port}/data.zip", requests
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_read_chunks_with_range_requests(tmp_path):
+        path = tmp_path / "channel.zip"
+        data = TestHTTPZipStore._write_zarr_zip(path)
+        runner, url, requests = await TestHTTPZipStore._serve(path)
+        try:
+            async with aiohttp.ClientSession() as session:
+                store = await HTTPZipStore.open(url, session)
+                assert "scale0/.zarray" in store
+                group = zarr.open_group(store=store, mode="r")
+                assert group["scale0"].shape == data.shape
+
+                requests.clear()
+                chunks = await store.getitems_async(["scale0/0.0", "scale0/0.1", "scale0/9.9"])
+                assert sorted(chunks) == ["scale0/0.0", "scale0/0.1"]
+                # Neighbouring chunks are fetched with a single coalesced range request
+                assert len(requests) == 1
+                chunk = group["scale0"]._decode_chunk(chunks["scale0/0.1"])
+                np.testing.assert_array_equal(chunk, data[:256, 256:512])
+        finally:
+            await runner.cleanup()
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_tile_manager_reads_through_async_store(tmp_path):
+        path = tmp_path / "channel.zip"
+        data = TestHTTPZipStore._write_zarr_zip(path)
+        runner, url, _ = await TestHTTPZipStore._serve(path)
+        try:
+            async with aiohttp.ClientSession() as session:
+                store = await HTTPZipStore.open(url, session)
+                tile_manager = ZarrTileManager()
+                tile_manager.zarr_groups_cache["ds:t0:A"] = {
+                    "group": zarr.open_group(store=store, mode="r"),
+                    "url": url,
+                    "expiry": time.time() + 3600,
+                }
+                tile = await tile_manager.get_tile_np_data("ds", "t0", "A", 0, 1, 1, tile_size=512)
+                np.testing.assert_array_equal(tile[:188, :388], data[512:, 512:])
+                assert not tile[188:, :].any()
+        finally:
+            await runner.cleanup()
+
+
+class TestMmapZipStore:
+    @staticmethod
+    def test_stored_members_are_zero_copy(tmp_path):
+        path = tmp_path / "channel.zip"
+        data = TestHTTPZipStore._write_zarr_zip(path)
+        store = MmapZipStore(str(path))
+        chunk_bytes = store["scale0/1.2"]
+        assert isinstance(chunk_bytes, memoryview)
+        group = zarr.open_group(store=store, mode="r")
+        np.testing.assert_array_equal(group["scale0"][300:700, 100:600], data[300:700, 100:600])
+
+    @staticmethod
+    @pytest.mark.asyncio
+    async def test_tile_manager_uses_local_data_dir(tmp_path):
+        zip_path = tmp_path / "agent-lens" / "ds" / "t0" / "A.zip"
+        zip_path.parent.mkdir(parents=True)
+        data = TestHTTPZipStore._write_zarr_zip(zip_path)
+        tile_manager = ZarrTileManager()
+        tile_manager.local_data_dir = str(tmp_path)
+        # No artifact manager is connected, so the tile can only come from the local zip
+        tile = await tile_manager.get_tile_np_data("agent-lens/ds", "t0", "A", 0, 1, 0)
+        np.testing.assert_array_equal(tile, data[:256, 256:512])
+        assert tile_manager.get_local_zip_path("agent-lens/ds", "t0", "B") is None
+
+        store = tile_manager.zarr_groups_cache["agent-lens/ds:t0:A"]["store"]
+        await tile_manager.close()
+        assert store._mmap.closed
+        assert store._file.closed
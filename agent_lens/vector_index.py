@@ -0,0 +1,93 @@
+"""
+This module builds the vector field configuration of cell image collections,
+with a configurable index algorithm and parameters.
+"""
+
+import json
+import os
+
+# Index parameters accepted by the vector engine (Redis search) for each algorithm
+INDEX_PARAMETERS = {
+    "FLAT": ("INITIAL_CAP", "BLOCK_SIZE"),
+    "HNSW": ("INITIAL_CAP", "M", "EF_CONSTRUCTION", "EF_RUNTIME", "EPSILON"),
+}
+DEFAULT_INDEX_CONFIG = {"algorithm": "FLAT"}
+
+
+def build_vector_field(index_config=None, name="cell_image_vector", dim=512, distance_metric="COSINE"):
+    """
+    Build the vector field of a collection config.
+
+    Args:
+        index_config (dict, optional): The "algorithm" ("FLAT" or "HNSW") and its
+            parameters, e.g. {"algorithm": "HNSW", "M": 16, "EF_CONSTRUCTION": 200}.
+            Defaults to a FLAT index.
+        name (str, optional): The field name.
+        dim (int, optional): The vector dimension.
+        distance_metric (str, optional): The distance metric.
+
+    Returns:
+        dict: The vector field.
+    """
+    index_config = {key.upper(): value for key, value in (index_config or DEFAULT_INDEX_CONFIG).items()}
+    algorithm = str(index_config.pop("ALGORITHM", "FLAT")).upper()
+    if algorithm not in INDEX_PARAMETERS:
+        raise ValueError(f"Unknown index algorithm {algorithm!r}, expected one of {', '.join(INDEX_PARAMETERS)}")
+    unknown = set(index_config) - set(INDEX_PARAMETERS[algorithm])
+    if unknown:
+        raise ValueError(f"Unknown {algorithm} index parameters: {', '.join(sorted(unknown))}")
+    return {
+        "type": "VECTOR",
+        "name": name,
+        "algorithm": algorithm,
+        "attributes": {"TYPE": "FLOAT32", "DIM": dim, "DISTANCE_METRIC": distance_metric, **index_config},
+    }
+
+
+def vector_fields_match(existing, requested):
+    """
+    Whether an existing vector field has the index of a requested one, comparing
+    algorithm and attribute names case-insensitively and values as text.
+    """
+    def _normalize(field):
+        attributes = {key.upper(): str(value).upper() for key, value in (field.get("attributes") or {}).items()}
+        return str(field.get("algorithm", "")).upper(), attributes
+
+    return _normalize(existing) == _normalize(requested)
+
+
+def parse_index_config(text):
+    """
+    Parse an index config written as "ALGORITHM" or "ALGORITHM:PARAM=VALUE,...".
+
+    For example "HNSW:M=16,EF_CONSTRUCTION=200,EF_RUNTIME=64".
+
+    Returns:
+        dict: The index config.
+    """
+    algorithm, _, params = text.partition(":")
+    index_config = {"algorithm": algorithm.strip().upper()}
+    for param in filter(None, params.split(",")):
+        key, _, value = param.partition("=")
+        value = value.strip()
+        index_config[key.strip().upper()] = float(value) if "." in value else int(value)
+    build_vector_field(index_config)
+    return index_config
+
+
+def default_index_config():
+    """
+    Get the index config of new collections.
+
+    Returns:
+        dict: The AGENT_LENS_VECTOR_INDEX environment variable, as JSON or in the
+            "ALGORITHM:PARAM=VALUE" form, or a FLAT index.
+    """
+    value = os.environ.get("AGENT_LENS_VECTOR_INDEX")
+    if not value:
+        return dict(DEFAULT_INDEX_CONFIG)
+    if value.lstrip().startswith("{"):
+        index_config = json.loads(value)
+        build_vector_field(index_config)
+        return index_config
+    return parse_index_config(value)
@@ -0,0 +1,421 @@
+"""
+This module provides an in-process mirror of a vector collection, so
+similarity searches can be answered locally instead of over RPC.
+
+The mirror uses an HNSW index when hnswlib is installed and an exact numpy
+index otherwise. It is kept in sync with the writes of this process and
+persisted to disk between restarts.
+"""
+
+import json
+import os
+import threading
+import time
+import zipfile
+import numpy as np
+
+try:
+    import hnswlib
+
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+
+def _to_vector(value, dim):
+    """Convert a list, array or float32 bytes from the vector engine to a vector."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        vector = np.frombuffer(value, dtype=np.float32)
+    else:
+        vector = np.asarray(value, dtype=np.float32)
+    if vector.shape != (dim,):
+        raise ValueError(f"Expected a vector of dimension {dim}, got shape {vector.shape}")
+    return vector
+
+
+def _split_tags(value):
+    """Split a TAG field value into its tags, like the vector engine's default "," separator."""
+    return {tag.strip().lower() for tag in value.split(",") if tag.strip()}
+
+
+class VectorMirror:
+    """
+    Local copy of a vector collection with cosine-distance search.
+
+    Search results have the shape of the vector engine's: the vector ID, the
+    requested fields and the cosine distance as a string "score".
+    """
+
+    def __init__(
+        self,
+        dim=512,
+        vector_field="cell_image_vector",
+        fields=("annotation",),
+        path=None,
+        max_staleness=300,
+        M=16,
+        ef_construction=200,
+        ef_search=64,
+        use_hnsw=None,
+    ):
+        """
+        Args:
+            dim (int, optional): Dimension of the vectors.
+            vector_field (str, optional): Name of the vector field in the collection.
+            fields (tuple, optional): Other fields kept for search results.
+            path (str, optional): Directory the mirror is persisted to. In memory only by default.
+            max_staleness (float, optional): Seconds after the last sync before the
+                mirror is considered stale.
+            M (int, optional): HNSW graph degree.
+            ef_construction (int, optional): HNSW candidate list size while building.
+            ef_search (int, optional): HNSW candidate list size while searching.
+            use_hnsw (bool, optional): Use hnswlib. Defaults to whether it is installed.
+        """
+        self.dim = dim
+        self.vector_field = vector_field
+        self.fields = tuple(fields)
+        self.path = path
+        self.max_staleness = max_staleness
+        self.M = M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.use_hnsw = HNSWLIB_AVAILABLE if use_hnsw is None else use_hnsw
+        self.stats = {"searches": 0, "added": 0, "removed": 0}
+        # Version of the collection the content was exported from, None once written to
+        self.version = None
+        # Guards the index against a save running in another thread
+        self._lock = threading.RLock()
+        self._pending = None  # writes made while a load is in progress
+        self.clear()
+
+    def clear(self):
+        """Remove every vector and mark the mirror as freshly synced."""
+        self.version = None
+        if self._pending is not None:
+            self._pending.append(("clear", None))
+            return
+        self._reset()
+        self.stale = False
+        self.synced_at = time.time()
+
+    def _reset(self):
+        with self._lock:
+            self._ids = []  # label -> vector ID, None once removed
+            self._labels = {}  # vector ID -> label
+            self._records = {}  # vector ID -> fields
+            self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            self._live = np.zeros(0, dtype=bool)
+            self._tags = {field: {} for field in self.fields}  # field -> tag -> labels
+            self._index = None
+            if self.use_hnsw:
+                self._index = hnswlib.Index(space="cosine", dim=self.dim)
+                self._index.init_index(max_elements=1024, ef_construction=self.ef_construction, M=self.M)
+                self._index.set_ef(self.ef_search)
+
+    def __len__(self):
+        return len(self._labels)
+
+    def is_fresh(self):
+        """Whether searches can be served locally."""
+        return not self.stale and time.time() - self.synced_at <= self.max_staleness
+
+    def mark_stale(self):
+        """Mark the mirror as out of sync with the collection, e.g. after a write it could not mirror."""
+        self.stale = True
+        self.version = None
+        if self._pending is not None:
+            self._pending.append(("stale", None))
+
+    def begin_load(self):
+        """
+        Start replacing the content with an export of the collection.
+
+        Until finish_load, the mirror is stale and writes are recorded instead of
+        applied, so the export cannot overwrite them.
+        """
+        self._pending = []
+        self.stale = True
+
+    def finish_load(self):
+        """Apply the writes recorded during the load and mark the mirror as synced, unless a write marked it stale."""
+        pending, self._pending = self._pending or [], None
+        stale = False
+        for operation, argument in pending:
+            if operation == "add":
+                self._add(argument)
+            elif operation == "remove":
+                self._remove(argument)
+            elif operation == "clear":
+                self._reset()
+            else:
+                stale = True
+        if pending:
+            self.version = None
+        self.stale = stale
+        self.touch()
+
+    def abort_load(self):
+        """Give up a load, leaving the mirror stale."""
+        self._pending = None
+        self.stale = True
+
+    def load(self, items):
+        """
+        Replace the mirror's content with exported vectors.
+
+        Returns:
+            bool: Whether every record was mirrored. Records without an ID or
+                with a duplicate ID leave the mirror out of sync.
+        """
+        items = list(items)
+        self._reset()
+        self._add([item for item in items if "id" in item])
+        complete = len(items) == len(self)
+        if self._pending is None:
+            self.stale = not complete
+            self.synced_at = time.time()
+        return complete
+
+    def add(self, items):
+        """
+        Add or replace vectors.
+
+        Args:
+            items (list): Vector records with an "id", the vector field and other fields.
+                Records without an ID cannot be mirrored and mark the mirror as stale.
+        """
+        items = list(items)
+        if any("id" not in item for item in items):
+            self.mark_stale()
+            items = [item for item in items if "id" in item]
+        if not items:
+            return
+        self.version = None
+        if self._pending is not None:
+            self._pending.append(("add", items))
+            return
+        self._add(items)
+
+    def _add(self, items):
+        if not items:
+            return
+        with self._lock:
+            self._remove([item["id"] for item in items if item["id"] in self._labels])
+
+            vectors = np.stack([_to_vector(item[self.vector_field], self.dim) for item in items])
+            labels = np.arange(len(self._ids), len(self._ids) + len(items))
+            for item, label in zip(items, labels):
+                self._ids.append(item["id"])
+                self._labels[item["id"]] = int(label)
+                self._records[item["id"]] = {field: item.get(field) for field in self.fields}
+                self._index_tags(self._records[item["id"]], int(label), add=True)
+            if self.use_hnsw:
+                capacity = self._index.get_max_elements()
+                if len(self._ids) > capacity:
+                    self._index.resize_index(max(len(self._ids), capacity * 2))
+                self._index.add_items(vectors, labels)
+            else:
+                self._vectors = np.concatenate([self._vectors, self._normalize(vectors)])
+                self._live = np.concatenate([self._live, np.ones(len(items), dtype=bool)])
+            self.stats["added"] += len(items)
+
+    def remove(self, vector_ids):
+        """Remove vectors by ID. Unknown IDs are ignored."""
+        vector_ids = list(vector_ids)
+        self.version = None
+        if self._pending is not None:
+            self._pending.append(("remove", vector_ids))
+            return
+        self._remove(vector_ids)
+
+    def _remove(self, vector_ids):
+        with self._lock:
+            for vector_id in vector_ids:
+                label = self._labels.pop(vector_id, None)
+                if label is None:
+                    continue
+                self._ids[label] = None
+                self._index_tags(self._records.pop(vector_id), label, add=False)
+                if self.use_hnsw:
+                    self._index.mark_deleted(label)
+                else:
+                    self._live[label] = False
+                self.stats["removed"] += 1
+
+    def _index_tags(self, record, label, add):
+        for field, value in record.items():
+            if not isinstance(value, str):
+                continue
+            for tag in _split_tags(value):
+                labels = self._tags[field].setdefault(tag, set())
+                if add:
+                    labels.add(label)
+                else:
+                    labels.discard(label)
+
+    def can_filter(self, filters):
+        """Whether the mirror keeps every field used by the filters."""
+        return all(field in self.fields for field in (filters or {}))
+
+    def _matching_labels(self, filters):
+        """
+        Get the labels of the vectors matching every filter, with the vector
+        engine's semantics: a string matches a TAG field value, a [min, max]
+        pair is an inclusive numeric range.
+        """
+        matching = None
+        for field, value in filters.items():
+            if isinstance(value, str):
+                labels = set(self._tags[field].get(value.strip().lower(), ()))
+            elif isinstance(value, (list, tuple)) and len(value) == 2:
+                low, high = float(value[0]), float(value[1])
+                labels = set()
+                for vector_id, record in self._records.items():
+                    try:
+                        if low <= float(record[field]) <= high:
+                            labels.add(self._labels[vector_id])
+                    except (TypeError, ValueError):
+                        continue
+            else:
+                raise ValueError(f"Filter of {field!r} must be a string or a [min, max] pair")
+            matching = labels if matching is None else matching & labels
+        return matching
+
+    def memory_bytes(self):
+        """Approximate memory used by the index, in bytes."""
+        if self.use_hnsw:
+            # Vector data plus the level-0 links (2 * M) and label of every element
+            return self._index.element_count * (self.dim * 4 + self.M * 2 * 4 + 12)
+        return self._vectors.nbytes
+
+    def touch(self):
+        """Record that the mirror is in sync with the collection."""
+        self.synced_at = time.time()
+
+    @staticmethod
+    def _normalize(vectors):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    def search(self, vector, top_k=5, return_fields=None, filters=None):
+        """
+        Find the nearest vectors by cosine distance.
+
+        Args:
+            vector (list): The query vector.
+            top_k (int, optional): The number of results.
+            return_fields (list, optional): Fields of each result. Defaults to all kept fields and the score.
+            filters (dict, optional): Only search vectors whose fields match, e.g.
+                {"annotation": "mitotic"} for a TAG or {"area": [100, 500]} for a range.
+
+        Returns:
+            list: The results, nearest first.
+        """
+        self.stats["searches"] += 1
+        matching = self._matching_labels(filters) if filters else None
+        top_k = min(top_k or 5, len(self) if matching is None else len(matching))
+        if top_k == 0:
+            return []
+        query = _to_vector(vector, self.dim)
+        if self.use_hnsw:
+            labels, distances = self._hnsw_query(query, top_k, matching)
+        else:
+            distances = 1 - self._vectors @ self._normalize(query[None])[0]
+            live = self._live
+            if matching is not None:
+                live = np.zeros_like(live)
+                live[list(matching)] = True
+            distances[~live] = np.inf
+            labels, distances = self._nearest(np.arange(len(distances)), distances, top_k)
+
+        return_fields = return_fields or [*self.fields, "score"]
+        results = []
+        for label, distance in zip(labels, distances):
+            vector_id = self._ids[label]
+            record = self._records[vector_id]
+            result = {"id": vector_id}
+            result.update({field: record[field] for field in return_fields if field in record})
+            if "score" in return_fields:
+                result["score"] = str(float(distance))
+            results.append(result)
+        return results
+
+    def _hnsw_query(self, query, top_k, matching, max_exact=1000):
+        if matching is None:
+            labels, distances = self._index.knn_query(query, k=top_k)
+            return labels[0], distances[0]
+        if len(matching) > max_exact:
+            try:
+                labels, distances = self._index.knn_query(query, k=top_k, filter=lambda label: label in matching)
+                return labels[0], distances[0]
+            except RuntimeError:
+                pass  # The graph search reached fewer than top_k matching vectors
+        # Compare with each matching vector exactly
+        labels = np.fromiter(matching, dtype=np.int64)
+        vectors = self._normalize(np.asarray(self._index.get_items(labels), dtype=np.float32))
+        return self._nearest(labels, 1 - vectors @ self._normalize(query[None])[0], top_k)
+
+    @staticmethod
+    def _nearest(labels, distances, top_k):
+        order = np.argpartition(distances, top_k - 1)[:top_k]
+        order = order[np.argsort(distances[order])]
+        return labels[order], distances[order]
+
+    def save(self):
+        """
+        Persist the mirror to its path.
+
+        Vectors and metadata are written to one file, which replaces the
+        previous one only once it is complete.
+        """
+        if not self.path:
+            return
+        with self._lock:
+            live_ids = [vector_id for vector_id in self._ids if vector_id is not None]
+            labels = [self._labels[i] for i in live_ids]
+            if not labels:
+                vectors = np.zeros((0, self.dim), dtype=np.float32)
+            elif self.use_hnsw:
+                vectors = np.asarray(self._index.get_items(labels), dtype=np.float32)
+            else:
+                vectors = self._vectors[labels]
+            meta = {
+                "ids": live_ids,
+                "records": [self._records[i] for i in live_ids],
+                "synced_at": self.synced_at,
+                "version": self.version,
+            }
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = os.path.join(self.path, "mirror.npz.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                vectors=vectors.reshape(-1, self.dim),
+                meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+            )
+        os.replace(tmp_path, os.path.join(self.path, "mirror.npz"))
+
+    def load_from_disk(self):
+        """
+        Load the mirror persisted at its path.
+
+        Returns:
+            bool: Whether a complete persisted mirror was found and loaded.
+        """
+        if not self.path:
+            return False
+        try:
+            with np.load(os.path.join(self.path, "mirror.npz")) as data:
+                vectors = data["vectors"]
+                meta = json.loads(data["meta"].tobytes())
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return False
+        if vectors.shape != (len(meta["ids"]), self.dim) or len(meta["records"]) != len(meta["ids"]):
+            return False
+        complete = self.load(
+            {"id": vector_id, self.vector_field: vector, **record}
+            for vector_id, vector, record in zip(meta["ids"], vectors, meta["records"])
+        )
+        self.synced_at = meta["synced_at"]
+        self.version = meta.get("version")
+        return complete
@@ -0,0 +1,400 @@
+"""
+This module provides read-only Zarr stores for zarr groups packed in zip files.
+HTTPZipStore reads a zip served over HTTP (e.g. a pre-signed S3/MinIO URL) with
+asyncio range requests on a shared aiohttp session, so fetching chunks never
+leaves the event loop. MmapZipStore reads a zip from local disk through mmap.
+"""
+
+import asyncio
+import logging
+import mmap
+import struct
+import zlib
+from collections import namedtuple
+from zarr.errors import ReadOnlyError
+from zarr.storage import BaseStore
+
+logger = logging.getLogger(__name__)
+
+# Zip record signatures and layouts (see the PKWARE APPNOTE)
+EOCD_SIGNATURE = b"PK\x05\x06"
+EOCD_STRUCT = struct.Struct("<4sHHHHIIH")
+ZIP64_LOCATOR_SIGNATURE = b"PK\x06\x07"
+ZIP64_LOCATOR_STRUCT = struct.Struct("<4sIQI")
+ZIP64_EOCD_SIGNATURE = b"PK\x06\x06"
+ZIP64_EOCD_STRUCT = struct.Struct("<4sQHHIIQQQQ")
+CENTRAL_HEADER_SIGNATURE = b"PK\x01\x02"
+CENTRAL_HEADER_STRUCT = struct.Struct("<4sHHHHHHIIIHHHHHII")
+LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+LOCAL_HEADER_STRUCT = struct.Struct("<4sHHHHHIIIHH")
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+# The end of central directory record is 22 bytes plus a comment of up to 64 KiB
+MAX_EOCD_SEARCH = EOCD_STRUCT.size + 0xFFFF
+ZARR_METADATA_KEYS = (".zgroup", ".zarray", ".zattrs", ".zmetadata")
+
+ZipEntry = namedtuple(
+    "ZipEntry", ["name", "header_offset", "compressed_size", "file_size", "compress_type", "extra_length"]
+)
+
+
+def find_central_directory(tail, tail_offset):
+    """
+    Locate the central directory from the last bytes of a zip file.
+
+    Args:
+        tail (bytes): The last bytes of the zip file, containing the end of central
+            directory record.
+        tail_offset (int): Offset of `tail` within the zip file.
+
+    Returns:
+        tuple: (cd_offset, cd_size, zip64_eocd_offset) where zip64_eocd_offset is the
+        offset of the Zip64 end of central directory record that has to be read to
+        get the real values, or None for a plain zip.
+    """
+    position = tail.rfind(EOCD_SIGNATURE)
+    if position < 0:
+        raise ValueError("Not a zip file: end of central directory record not found")
+    _, _, _, _, _, cd_size, cd_offset, _ = EOCD_STRUCT.unpack_from(tail, position)
+
+    locator_position = position - ZIP64_LOCATOR_STRUCT.size
+    if locator_position >= 0 and tail[locator_position:locator_position + 4] == ZIP64_LOCATOR_SIGNATURE:
+        _, _, zip64_eocd_offset, _ = ZIP64_LOCATOR_STRUCT.unpack_from(tail, locator_position)
+        return cd_offset, cd_size, zip64_eocd_offset
+    return cd_offset, cd_size, None
+
+
+def parse_zip64_end_record(data):
+    """Return (cd_offset, cd_size) from a Zip64 end of central directory record."""
+    signature, _, _, _, _, _, _, _, cd_size, cd_offset = ZIP64_EOCD_STRUCT.unpack_from(data, 0)
+    if signature != ZIP64_EOCD_SIGNATURE:
+        raise ValueError("Invalid Zip64 end of central directory record")
+    return cd_offset, cd_size
+
+
+def parse_central_directory(data):
+    """
+    Parse the central directory of a zip file.
+
+    Args:
+        data (bytes): The complete central directory.
+
+    Returns:
+        dict: ZipEntry objects keyed by member name. Directory entries are skipped.
+    """
+    entries = {}
+    position = 0
+    while position + CENTRAL_HEADER_STRUCT.size <= len(data):
+        (signature, _, _, flags, compress_type, _, _, _, compressed_size, file_size,
+         name_length, extra_length, comment_length, _, _, _, header_offset) = CENTRAL_HEADER_STRUCT.unpack_from(data, position)
+        if signature != CENTRAL_HEADER_SIGNATURE:
+            break
+        position += CENTRAL_HEADER_STRUCT.size
+        raw_name = data[position:position + name_length]
+        extra = data[position + name_length:position + name_length + extra_length]
+        position += name_length + extra_length + comment_length
+
+        # Bit 11 marks UTF-8 names, anything else is CP437
+        name = raw_name.decode("utf-8" if flags & 0x800 else "cp437")
+        if 0xFFFFFFFF in (compressed_size, file_size, header_offset):
+            file_size, compressed_size, header_offset = _apply_zip64_extra(
+                extra, file_size, compressed_size, header_offset
+            )
+        if not name.endswith("/"):
+            entries[name] = ZipEntry(name, header_offset, compressed_size, file_size, compress_type, extra_length)
+    return entries
+
+
+def _apply_zip64_extra(extra, file_size, compressed_size, header_offset):
+    """Replace the 32-bit placeholder values with the ones from the Zip64 extra field."""
+    position = 0
+    while position + 4 <= len(extra):
+        header_id, size = struct.unpack_from("<HH", extra, position)
+        if header_id == 0x0001:
+            values = iter(struct.unpack_from(f"<{size // 8}Q", extra, position + 4))
+            if file_size == 0xFFFFFFFF:
+                file_size = next(values)
+            if compressed_size == 0xFFFFFFFF:
+                compressed_size = next(values)
+            if header_offset == 0xFFFFFFFF:
+                header_offset = next(values)
+            break
+        position += 4 + size
+    return file_size, compressed_size, header_offset
+
+
+def local_header_size(data, offset=0):
+    """Return the size of the local file header starting at `offset` in `data`."""
+    signature, _, _, _, _, _, _, _, _, name_length, extra_length = LOCAL_HEADER_STRUCT.unpack_from(data, offset)
+    if signature != LOCAL_HEADER_SIGNATURE:
+        raise ValueError("Invalid local file header")
+    return LOCAL_HEADER_STRUCT.size + name_length + extra_length
+
+
+def decompress_member(entry, data):
+    """Return the uncompressed content of a zip member."""
+    if entry.compress_type == ZIP_STORED:
+        return data
+    if entry.compress_type == ZIP_DEFLATED:
+        return zlib.decompress(data, -15)
+    raise ValueError(f"Unsupported zip compression method {entry.compress_type} for {entry.name}")
+
+
+class HTTPZipStore(BaseStore):
+    """
+    Read-only Zarr store over a zip file served by HTTP range requests.
+
+    The central directory is read once when the store is opened, so every chunk maps
+    to a known byte range in the zip. Chunks are then fetched with range GETs on a
+    shared aiohttp session (pooled, keep-alive connections), and requests for chunks
+    that sit next to each other in the zip are coalesced into a single GET.
+
+    Use `getitems_async` from the event loop. The synchronous mapping interface that
+    zarr uses serves metadata from memory and, for chunks, only works from worker
+    threads, where it waits on the event loop the store was opened on.
+    """
+
+    def __init__(self, url, session, coalesce_gap=4096, max_request_size=2**24, max_concurrent_requests=16):
+        self.url = url
+        self.session = session
+        self.coalesce_gap = coalesce_gap
+        self.max_request_size = max_request_size
+        self.entries = {}
+        self.size = None
+        self._metadata = {}
+        self._loop = None
+        self._request_semaphore = asyncio.Semaphore(max_concurrent_requests)
+
+    @classmethod
+    async def open(cls, url, session, **kwargs):
+        """
+        Open a zip over HTTP: read its central directory and all Zarr metadata.
+
+        Args:
+            url (str): The URL of the zip file.
+            session (aiohttp.ClientSession): The session used for all requests.
+
+        Returns:
+            HTTPZipStore: The opened store.
+        """
+        store = cls(url, session, **kwargs)
+        store._loop = asyncio.get_running_loop()
+        await store._read_central_directory()
+        await store._read_metadata()
+        return store
+
+    async def _get_range(self, start=None, end=None, suffix=None):
+        """Fetch an inclusive byte range, or the last `suffix` bytes of the file."""
+        byte_range = f"bytes=-{suffix}" if suffix is not None else f"bytes={start}-{end}"
+        async with self._request_semaphore:
+            async with self.session.get(self.url, headers={"Range": byte_range}) as response:
+                response.raise_for_status()
+                data = await response.read()
+                content_range = response.headers.get("Content-Range")
+        if response.status == 200:
+            # The server ignored the range and sent the whole file
+            total_size = len(data)
+            if suffix is not None:
+                data = data[-suffix:]
+            else:
+                data = data[start:end + 1]
+        else:
+            total_size = int(content_range.rsplit("/", 1)[1]) if content_range else None
+        if self.size is None:
+            self.size = total_size
+        return data
+
+    async def _read_central_directory(self):
+        tail = await self._get_range(suffix=MAX_EOCD_SEARCH)
+        tail_offset = self.size - len(tail)
+        cd_offset, cd_size, zip64_eocd_offset = find_central_directory(tail, tail_offset)
+        if zip64_eocd_offset is not None:
+            if zip64_eocd_offset >= tail_offset:
+                record = tail[zip64_eocd_offset - tail_offset:]
+            else:
+                record = await self._get_range(zip64_eocd_offset, zip64_eocd_offset + ZIP64_EOCD_STRUCT.size - 1)
+            cd_offset, cd_size = parse_zip64_end_record(record)
+
+        if cd_offset >= tail_offset:
+            # Small zips: the central directory is already in the tail
+            central_directory = tail[cd_offset - tail_offset:cd_offset - tail_offset + cd_size]
+        else:
+            central_directory = await self._get_range(cd_offset, cd_offset + cd_size - 1)
+        self.entries = parse_central_directory(central_directory)
+        logger.info(f"Read zip central directory with {len(self.entries)} entries ({self.size} bytes)")
+
+    async def _read_metadata(self):
+        metadata_keys = [key for key in self.entries if key.rsplit("/", 1)[-1] in ZARR_METADATA_KEYS]
+        self._metadata = await self.getitems_async(metadata_keys)
+
+    def _estimated_end(self, entry):
+        """Offset just past the data of an entry, assuming the local extra field matches the central one."""
+        return (entry.header_offset + LOCAL_HEADER_STRUCT.size + len(entry.name.encode("utf-8"))
+                + entry.extra_length + entry.compressed_size)
+
+    def _coalesce(self, entries):
+        """Group entries sorted by offset into runs that can be fetched with one request."""
+        runs = []
+        for entry in sorted(entries, key=lambda e: e.header_offset):
+            end = self._estimated_end(entry)
+            if runs:
+                run = runs[-1]
+                if (entry.header_offset - run["end"] <= self.coalesce_gap
+                        and end - run["start"] <= self.max_request_size):
+                    run["entries"].append(entry)
+                    run["end"] = max(run["end"], end)
+                    continue
+            runs.append({"start": entry.header_offset, "end": end, "entries": [entry]})
+        return runs
+
+    async def _fetch_run(self, run):
+        buffer = await self._get_range(run["start"], run["end"] - 1)
+        results = {}
+        for entry in run["entries"]:
+            offset = entry.header_offset - run["start"]
+            data_start = offset + local_header_size(buffer, offset)
+            data_end = data_start + entry.compressed_size
+            if data_end <= len(buffer):
+                data = buffer[data_start:data_end]
+            else:
+                # The local extra field was longer than the central one
+                data = await self._get_range(run["start"] + data_start, run["start"] + data_end - 1)
+            results[entry.name] = data
+        return results
+
+    async def getitems_async(self, keys):
+        """
+        Fetch several zip members concurrently.
+
+        Args:
+            keys (list): Member names (Zarr keys) to fetch.
+
+        Returns:
+            dict: Member content keyed by name, for the keys that exist in the zip.
+        """
+        entries = [self.entries[key] for key in keys if key in self.entries]
+        if not entries:
+            return {}
+        fetched = await asyncio.gather(*[self._fetch_run(run) for run in self._coalesce(entries)])
+        results = {}
+        for run_results in fetched:
+            for name, data in run_results.items():
+                entry = self.entries[name]
+                if entry.compress_type != ZIP_STORED:
+                    # Members are normally stored uncompressed, deflate is rare and cheap to undo
+                    data = await asyncio.to_thread(decompress_member, entry, data)
+                results[name] = data
+        return results
+
+    async def get_async(self, key):
+        """Fetch a single zip member, raising KeyError if it does not exist."""
+        results = await self.getitems_async([key])
+        if key not in results:
+            raise KeyError(key)
+        return results[key]
+
+    def _run_sync(self, coroutine):
+        """Run a coroutine on the store's event loop from a worker thread."""
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            coroutine.close()
+            raise RuntimeError("Synchronous chunk access would block the event loop, use getitems_async")
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def __getitem__(self, key):
+        if key in self._metadata:
+            return self._metadata[key]
+        if key not in self.entries:
+            raise KeyError(key)
+        return self._run_sync(self.get_async(key))
+
+    def getitems(self, keys, *, contexts):
+        results = {key: self._metadata[key] for key in keys if key in self._metadata}
+        remaining = [key for key in keys if key not in results and key in self.entries]
+        if remaining:
+            results.update(self._run_sync(self.getitems_async(remaining)))
+        return results
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __setitem__(self, key, value):
+        raise ReadOnlyError()
+
+    def __delitem__(self, key):
+        raise ReadOnlyError()
+
+
+class MmapZipStore(BaseStore):
+    """
+    Read-only Zarr store over a local zip file, memory-mapped.
+
+    Uncompressed (stored) members, which is how Zarr zips are normally written, are
+    returned as memoryview slices of the map, so chunk bytes go to the decoder
+    without being copied. Deflated members are decompressed on read.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._data_offsets = {}
+        self.size = len(self._mmap)
+
+        tail_offset = max(0, self.size - MAX_EOCD_SEARCH)
+        cd_offset, cd_size, zip64_eocd_offset = find_central_directory(self._mmap[tail_offset:], tail_offset)
+        if zip64_eocd_offset is not None:
+            cd_offset, cd_size = parse_zip64_end_record(self._mmap[zip64_eocd_offset:zip64_eocd_offset + ZIP64_EOCD_STRUCT.size])
+        self.entries = parse_central_directory(self._mmap[cd_offset:cd_offset + cd_size])
+
+    def _data_offset(self, entry):
+        offset = self._data_offsets.get(entry.name)
+        if offset is None:
+            offset = entry.header_offset + local_header_size(self._mmap, entry.header_offset)
+            self._data_offsets[entry.name] = offset
+        return offset
+
+    def __getitem__(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            raise KeyError(key)
+        start = self._data_offset(entry)
+        data = self._view[start:start + entry.compressed_size]
+        if entry.compress_type == ZIP_STORED:
+            return data
+        return decompress_member(entry, data)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __setitem__(self, key, value):
+        raise ReadOnlyError()
+
+    def __delitem__(self, key):
+        raise ReadOnlyError()
+
+    def close(self):
+        """Unmap the file. Chunks still referencing the map keep it alive until released."""
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            logger.info(f"Zip {self.path} still has chunks in use, leaving it mapped")
+        self._file.close()